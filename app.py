@@ -1,61 +1,125 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+import io
+import logging
+import math
 import os
 import json
+from datetime import date
 from mcp_data_service import MCPDataService
+from mcp_store import MCPDataStore
+from transactions import read_feed
+from response_encoding import ResponseEncoder, negotiate_encoding
+from insight_job import DEFAULT_MAX_AGE, INSIGHT_TYPES, InsightStore, PrecomputedInsights
+from dashboard import DashboardAssembler, parse_fields, parse_list
+from instrumentation import RequestProfiler, instrument_app, metrics, stage
+from chart_cache import ChartCache, CHART_SECTIONS
 from gemini_finance_agent import GeminiFinanceAgent
 from dotenv import load_dotenv
-import plotly
-import plotly.express as px
-import pandas as pd
-from datetime import datetime
-import base64
+import figure_specs
+import threading
+import uuid
 
 # Load environment variables from .env file
 load_dotenv()
 
 app = Flask(__name__, static_folder="static")
 
-# Initialize MCP data service
-mcp_service = MCPDataService()
+logger = logging.getLogger(__name__)
 
-# Initialize Gemini agent
+# Per-route latency histograms for /metrics, and per-request profiling when PROFILE_REQUESTS=1: a
+# PROFILE_SAMPLE_RATE fraction of all requests, plus requests with ?profile=<PROFILE_TOKEN> (or ?profile=1
+# from localhost when no token is set), reported to PROFILE_DIR
+instrument_app(app, profiler=RequestProfiler(
+    enabled=os.getenv("PROFILE_REQUESTS", "").lower() in ("1", "true"),
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    directory=os.getenv("PROFILE_DIR", "profiles"),
+    token=os.getenv("PROFILE_TOKEN")
+))
+
+# Initialize MCP data service, backed by the multi-user store when MCP_DB_PATH is set; history points appended
+# for store users are written to the store, and for the data file's user to MCP_HISTORY_LOG, which every worker reads
+# at most every MCP_HISTORY_POLL_INTERVAL seconds
+mcp_store = MCPDataStore(os.getenv("MCP_DB_PATH")) if os.getenv("MCP_DB_PATH") else None
+# Mutual funds are compared against index data from MCP_BENCHMARK_DATA (and fund NAVs from MCP_FUND_NAV_DATA)
+# when set, e.g. fixtures/sample_benchmark_data.json in development; otherwise against static category averages
+mcp_service = MCPDataService(store=mcp_store, history_log_path=os.getenv("MCP_HISTORY_LOG", "mcp_history.jsonl"),
+                             history_poll_interval=float(os.getenv("MCP_HISTORY_POLL_INTERVAL", "1")),
+                             benchmark_data_path=os.getenv("MCP_BENCHMARK_DATA"),
+                             fund_nav_path=os.getenv("MCP_FUND_NAV_DATA"))
+
+# Pick up edits to mcp_data.json without a restart (MCP_DATA_RELOAD_INTERVAL=0 disables)
+if float(os.getenv("MCP_DATA_RELOAD_INTERVAL", "2")) > 0:
+    mcp_service.watch_data_file(float(os.getenv("MCP_DATA_RELOAD_INTERVAL", "2")))
+
+# Serialized chart JSON shared by the dashboard and the agent's insights
+chart_cache = ChartCache()
+
+# Encoded (and compressed) /data response bodies per data version
+response_encoder = ResponseEncoder()
+
+# Insights precomputed by insight_job.py into MCP_INSIGHT_CACHE_DIR, served while fresh
+precomputed_insights = PrecomputedInsights(
+    InsightStore(os.getenv("MCP_INSIGHT_CACHE_DIR")), mcp_service,
+    max_age=float(os.getenv("MCP_INSIGHT_MAX_AGE", DEFAULT_MAX_AGE))
+) if os.getenv("MCP_INSIGHT_CACHE_DIR") else None
+
+# Cache hit counters exported as /metrics gauges
+metrics.register_stats("aggregate_cache", mcp_service.get_aggregate_stats, "Derived aggregate cache of the data service")
+metrics.register_stats("chart_cache", chart_cache.get_stats, "Serialized chart cache")
+metrics.register_stats("response_encoder", response_encoder.get_stats, "Pre-encoded /data and /dashboard bodies")
+if precomputed_insights:
+    metrics.register_stats("precomputed_insights", precomputed_insights.get_stats, "Precomputed insight lookups")
+
+@app.before_request
+def reject_unknown_user():
+    """Every route that takes a user_id answers 404 for a user the data service does not know"""
+    user_id = request.args.get('user_id')
+    if user_id is not None and not mcp_service.has_user(user_id):
+        return jsonify({"error": f"Unknown user: {user_id}"}), 404
+
+# Gemini agent, created on first use so the Gemini SDK import stays off the startup path
 gemini_agent = None
-try:
-    gemini_agent = GeminiFinanceAgent(mcp_service)
-except Exception as e:
-    print(f"Error initializing Gemini agent: {str(e)}")
+_gemini_agent_initialized = False
+_gemini_agent_lock = threading.Lock()
 
-@app.route('/')
-def index():
-    """Render the home page"""
-    # Get user information
-    user_info = mcp_service.get_user_info()
-    # Get financial summary
-    financial_summary = {
-        "bank_balance": mcp_service.get_total_bank_balance(),
-        "net_worth": mcp_service.get_net_worth()["net_worth"],
-        "total_investments": (mcp_service.get_total_mutual_fund_value() + 
-                            mcp_service.get_total_stock_value()),
-        "total_debt": mcp_service.get_total_loan_outstanding() + mcp_service.get_total_credit_card_debt(),
-        "credit_score": mcp_service.get_credit_score()["score"]
-    }
-    
-    # Generate a simple net worth chart for the dashboard
-    net_worth_history = mcp_service.get_net_worth_history()
+def get_gemini_agent():
+    """Get the Gemini agent, initializing it on the first call (None if initialization failed)"""
+    global gemini_agent, _gemini_agent_initialized
+    if not _gemini_agent_initialized:
+        with _gemini_agent_lock:
+            if not _gemini_agent_initialized:
+                try:
+                    # PROMPT_CONTEXT_BASELINE=1 also reports the tokens compact prompt context saves over
+                    # pretty-printed JSON, at the cost of a second serialization per prompt
+                    gemini_agent = GeminiFinanceAgent(
+                        mcp_service, chart_cache=chart_cache,
+                        measure_context_baseline=os.getenv("PROMPT_CONTEXT_BASELINE", "").lower() in ("1", "true")
+                    )
+                    metrics.register_stats("response_cache", gemini_agent.response_cache.get_stats,
+                                           "Cached chat answers and the model calls they avoided",
+                                           counters=("lookups", "exact_hits", "fuzzy_hits", "misses",
+                                                     "llm_calls_avoided"))
+                    metrics.register_stats("prompt_context", gemini_agent.get_context_stats,
+                                           "Tokens of financial data embedded in prompts",
+                                           counters=("requests", "tokens", "baseline_tokens", "tokens_saved"))
+                except Exception as e:
+                    logger.exception("Error initializing Gemini agent: %s", e)
+                _gemini_agent_initialized = True
+    return gemini_agent
+
+def build_dashboard_net_worth_chart(user_id=None):
+    """Build the small net worth trend chart shown on the dashboard, as JSON text"""
+    net_worth_history = mcp_service.get_history_range("net_worth", user_id=user_id)
     dates = [entry["date"] for entry in net_worth_history]
     values = [entry["net_worth"] for entry in net_worth_history]
     
     # Create a simple Plotly figure
-    df = pd.DataFrame({
-        'date': dates,
-        'net_worth': values
-    })
-    
-    fig = px.line(df, x='date', y='net_worth', 
+    fig = figure_specs.line_figure(dates, values,
                  title='Net Worth Trend',
+                 x_name='date', y_name='net_worth',
                  template='plotly_white')
     
-    fig.update_layout(
+    figure_specs.update_layout(fig,
         margin=dict(l=20, r=20, t=30, b=20),
         height=200,
         xaxis_title='',
@@ -65,7 +129,41 @@ def index():
     )
     
     # Convert the figure to JSON for embedding in the template
-    net_worth_chart = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+    return figure_specs.to_json(fig)
+
+def get_dashboard_net_worth_chart(user_id=None):
+    """Get the dashboard's net worth chart, rebuilt only when the net worth data changes"""
+    return chart_cache.get(
+        "dashboard_net_worth",
+        mcp_service.get_data_version(CHART_SECTIONS["dashboard_net_worth"], user_id),
+        lambda: build_dashboard_net_worth_chart(user_id),
+        user_id=user_id,
+        serialized=True
+    )
+
+# Summary metrics shown on the home page and available from /dashboard: name -> getter(user_id)
+DASHBOARD_METRICS = {
+    "bank_balance": mcp_service.get_total_bank_balance,
+    "net_worth": lambda user_id=None: mcp_service.get_net_worth(user_id)["net_worth"],
+    "total_investments": lambda user_id=None: (mcp_service.get_total_mutual_fund_value(user_id) +
+                                               mcp_service.get_total_stock_value(user_id)),
+    "total_debt": lambda user_id=None: (mcp_service.get_total_loan_outstanding(user_id) +
+                                        mcp_service.get_total_credit_card_debt(user_id)),
+    "credit_score": lambda user_id=None: mcp_service.get_credit_score(user_id)["score"],
+    "monthly_emi": mcp_service.get_total_loan_emi
+}
+
+@app.route('/')
+def index():
+    """Render the home page"""
+    # Get user information
+    user_info = mcp_service.get_user_info()
+    # Get financial summary
+    financial_summary = {name: DASHBOARD_METRICS[name]() for name in
+                         ("bank_balance", "net_worth", "total_investments", "total_debt", "credit_score")}
+    
+    # Get the net worth chart for the dashboard
+    net_worth_chart = get_dashboard_net_worth_chart().text
     
     # Get recent transactions
     recent_transactions = mcp_service.get_recent_transactions()
@@ -89,15 +187,16 @@ def chat():
     if not query:
         return jsonify({"error": "No query provided"}), 400
     
+    gemini_agent = get_gemini_agent()
     if not gemini_agent:
         return jsonify({"error": "Gemini agent not initialized. Please check your API key."}), 500
     
     try:
-        # Process the query
-        response = gemini_agent.process_query(query)
+        # Each browser (or API caller passing session_id) gets its own conversation
+        session_id = data.get('session_id') or request.cookies.get('chat_session_id') or uuid.uuid4().hex
         
-        # Check if we need to generate a visualization
-        chart_data, chart_type = gemini_agent.get_visualization_for_query(query)
+        # Get the model's answer while the visualization is built in parallel
+        response, chart_data, chart_type = gemini_agent.answer_query(query, session_id=session_id)
         
         result = {
             "response": response,
@@ -108,63 +207,417 @@ def chat():
         if chart_data:
             result["chart_data"] = chart_data
         
-        return jsonify(result)
+        with stage("serialization"):
+            http_response = jsonify(result)
+        http_response.set_cookie('chat_session_id', session_id, httponly=True, samesite='Lax')
+        return http_response
     
     except Exception as e:
+        logger.exception("Chat query failed")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/insights/<insight_type>')
-def get_insight(insight_type):
-    """Get specific financial insight"""
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Process a chat query, streaming the answer as Server-Sent Events"""
+    data = request.json
+    query = data.get('query', '')
+    
+    if not query:
+        return jsonify({"error": "No query provided"}), 400
+    
+    gemini_agent = get_gemini_agent()
     if not gemini_agent:
         return jsonify({"error": "Gemini agent not initialized. Please check your API key."}), 500
     
+    session_id = data.get('session_id') or request.cookies.get('chat_session_id') or uuid.uuid4().hex
+    
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    
+    def generate():
+        try:
+            for event, payload in gemini_agent.stream_answer(query, session_id=session_id):
+                if event == "token":
+                    yield sse("token", {"text": payload})
+                elif event == "chart":
+                    chart_data, chart_type = payload
+                    yield sse("chart", {
+                        "has_visualization": chart_data is not None,
+                        "chart_type": chart_type,
+                        "chart_data": chart_data
+                    })
+            yield sse("done", {})
+        except Exception as e:
+            logger.exception("Streamed chat query failed")
+            yield sse("error", {"error": str(e)})
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop reverse proxies (e.g. nginx) from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.set_cookie('chat_session_id', session_id, httponly=True, samesite='Lax')
+    return response
+
+def get_insight_entry(insight_type, user_id=None):
+    """
+    Get an insight as a CachedChart: precomputed when a fresh one exists, otherwise computed by
+    the agent. None for unknown insight types.
+    """
+    # A fresh precomputed insight is served without touching the agent or the compute path
+    if precomputed_insights and insight_type in INSIGHT_TYPES:
+        entry = precomputed_insights.get(insight_type, user_id)
+        if entry is not None:
+            return entry
+    
+    gemini_agent = get_gemini_agent()
+    if not gemini_agent:
+        raise RuntimeError("Gemini agent not initialized. Please check your API key.")
+    return gemini_agent.get_insight_entry(insight_type, user_id)
+
+@app.route('/insights/<insight_type>')
+def get_insight(insight_type):
+    """Get specific financial insight"""
     try:
-        insight = gemini_agent.generate_insight(insight_type)
-        return jsonify(insight)
+        entry = get_insight_entry(insight_type, request.args.get('user_id'))
+        if entry is None:
+            return jsonify("Insight type not recognized.")
+        
+        # Serve the pre-encoded bytes; a matching If-None-Match gets a 304
+        response = app.response_class(entry.body, mimetype='application/json')
+        response.set_etag(entry.etag)
+        return response.make_conditional(request)
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# /data/<data_type> routes: data type -> (MCP section it reads, service getter)
+DATA_ROUTES = {
+    "user_info": ("user", mcp_service.get_user_info),
+    "bank_accounts": ("accounts", mcp_service.get_bank_accounts),
+    "investments": ("investments", mcp_service.get_investments),
+    "loans": ("loans", mcp_service.get_loans),
+    "credit_score": ("credit_score", mcp_service.get_credit_score),
+    "spending": ("spending", mcp_service.get_spending_summary),
+    "goals": ("financial_goals", mcp_service.get_financial_goals),
+    "net_worth": ("net_worth", mcp_service.get_net_worth),
+    "recommendations": ("recommendations", mcp_service.get_recommendations)
+}
+
+def encoded_json_response(encoded):
+    """
+    Respond with a pre-encoded body: 304 if If-None-Match matches its ETag, otherwise the
+    cached compressed variant the client accepts
+    """
+    if encoded.etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        body, content_encoding = encoded.get(negotiate_encoding(request.headers.get('Accept-Encoding')))
+        response = app.response_class(body, mimetype='application/json')
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+    response.headers['ETag'] = f'"{encoded.etag}"'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
 @app.route('/data/<data_type>')
 def get_data(data_type):
     """Get specific financial data"""
+    user_id = request.args.get('user_id')
     try:
-        if data_type == "user_info":
-            return jsonify(mcp_service.get_user_info())
-        elif data_type == "bank_accounts":
-            return jsonify(mcp_service.get_bank_accounts())
-        elif data_type == "investments":
-            return jsonify(mcp_service.get_investments())
-        elif data_type == "loans":
-            return jsonify(mcp_service.get_loans())
-        elif data_type == "credit_score":
-            return jsonify(mcp_service.get_credit_score())
-        elif data_type == "spending":
-            return jsonify(mcp_service.get_spending_summary())
-        elif data_type == "goals":
-            return jsonify(mcp_service.get_financial_goals())
-        elif data_type == "net_worth":
-            return jsonify(mcp_service.get_net_worth())
-        elif data_type == "recommendations":
-            return jsonify(mcp_service.get_recommendations())
+        # Bodies are encoded once per data version and reused until the section changes
+        if data_type in DATA_ROUTES:
+            section, getter = DATA_ROUTES[data_type]
+            encoded = response_encoder.get((data_type, mcp_service.user_key(user_id)),
+                                           mcp_service.get_data_version([section], user_id),
+                                           lambda: getter(user_id))
         elif data_type == "all":
             # Get all data (for export)
-            with open('mcp_data.json', 'r') as file:
-                all_data = json.load(file)
-            return jsonify(all_data)
+            if user_id:
+                encoded = response_encoder.get(("all", mcp_service.user_key(user_id)),
+                                               mcp_service.get_data_version(None, user_id),
+                                               lambda: mcp_service.get_all_data(user_id))
+            else:
+                # The current snapshot, serialized once when it was loaded
+                snapshot = mcp_service.get_snapshot()
+                encoded = response_encoder.get(("all", None), ("snapshot", snapshot.version), lambda: snapshot.body)
         else:
             return jsonify({"error": f"Unknown data type: {data_type}"}), 400
+        
+        return encoded_json_response(encoded)
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Largest scenario grid /projections returns trajectories for
+MAX_PROJECTION_SCENARIOS = 10000
+
+def _finite_float(value):
+    """Parse a number, rejecting NaN and infinities with a ValueError"""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value} is not a finite number")
+    return number
+
+def _float_list_arg(name, default=None):
+    """Parse a comma-separated list of numbers from the query string"""
+    value = request.args.get(name)
+    if not value:
+        return default
+    return [_finite_float(item) for item in value.split(',')]
+
+# /dashboard parts: sections (each /data type plus recent transactions) and charts, as getter(user_id)
+DASHBOARD_SECTIONS = dict(
+    {data_type: getter for data_type, (_, getter) in DATA_ROUTES.items()},
+    recent_transactions=mcp_service.get_recent_transactions
+)
+DASHBOARD_CHARTS = dict(
+    {insight_type: lambda user_id=None, insight_type=insight_type: get_insight_entry(insight_type, user_id).value
+     for insight_type in INSIGHT_TYPES},
+    net_worth=lambda user_id=None: json.loads(get_dashboard_net_worth_chart(user_id).text)
+)
+
+# What /dashboard returns without arguments: everything the home page shows
+DEFAULT_DASHBOARD = {
+    "sections": ["user_info", "recent_transactions", "recommendations"],
+    "metrics": ["bank_balance", "net_worth", "total_investments", "total_debt", "credit_score"],
+    "charts": ["net_worth"]
+}
+
+dashboard_assembler = DashboardAssembler()
+
+@app.route('/dashboard')
+def get_dashboard():
+    """
+    Get several sections, metrics and charts in one response, e.g.
+    /dashboard?sections=loans,goals&metrics=net_worth,total_debt&charts=net_worth&fields=sections.loans.home_loan.emi
+    (fields trims any section, metric or chart to the listed group.name.path dotted paths)
+    """
+    user_id = request.args.get('user_id')
+    try:
+        registries = {"sections": DASHBOARD_SECTIONS, "metrics": DASHBOARD_METRICS, "charts": DASHBOARD_CHARTS}
+        requested = {group: parse_list(request.args.get(group), DEFAULT_DASHBOARD[group]) for group in registries}
+        for group, names in requested.items():
+            unknown = [name for name in names if name not in registries[group]]
+            if unknown:
+                return jsonify({"error": f"Unknown {group}: {', '.join(unknown)}"}), 400
+        fields = parse_fields(request.args.get('fields'))
+        unrequested = [f"{group}.{name}" for group, names in fields.items() for name in names
+                       if name not in requested.get(group, ())]
+        if unrequested:
+            return jsonify({"error": f"fields must name requested parts as group.name.path: {', '.join(unrequested)}"}), 400
+        
+        def build():
+            groups = {group: {name: (lambda getter=registries[group][name]: getter(user_id)) for name in names}
+                      for group, names in requested.items()}
+            return dashboard_assembler.assemble(groups, fields)
+        
+        # Assembled once per data version (and day, which payoff dates depend on, and precomputed
+        # insight file and expiry) for each distinct request; responses with failed parts are rebuilt next time
+        key = ("dashboard", mcp_service.user_key(user_id),
+               tuple((group, tuple(names)) for group, names in requested.items()),
+               tuple(sorted((group, name, tuple(paths)) for group, names in fields.items()
+                            for name, paths in names.items())))
+        insight_versions = tuple(precomputed_insights.version(name, user_id) for name in requested["charts"]
+                                 if name in INSIGHT_TYPES) if precomputed_insights else ()
+        version = (mcp_service.get_data_version(None, user_id), date.today().isoformat(), insight_versions)
+        return encoded_json_response(response_encoder.get(key, version, build,
+                                                          cache_if=lambda payload: "errors" not in payload))
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/metrics')
+def get_metrics():
+    """Request and stage latency histograms and cache counters in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/projections')
+def get_projections():
+    """
+    Year-by-year net worth projections for every combination of the given scenario parameters,
+    e.g. /projections?years=10&return_rates=0.06,0.08,0.1&savings_rates=0.2,0.3&inflation=0.05
+    """
+    try:
+        years = int(request.args.get('years', 10))
+        if not 0 < years <= 100:
+            return jsonify({"error": "years must be between 1 and 100"}), 400
+        
+        parameters = {
+            "return_rates": _float_list_arg('return_rates', [0.08]),
+            "savings_rates": _float_list_arg('savings_rates'),
+            "salary_growth": _float_list_arg('salary_growth', [0.0]),
+            "inflation": _float_list_arg('inflation', [0.0])
+        }
+        scenarios = 1
+        for values in parameters.values():
+            scenarios *= len(values or [None])
+        if scenarios > MAX_PROJECTION_SCENARIOS:
+            return jsonify({"error": f"At most {MAX_PROJECTION_SCENARIOS} scenarios per request"}), 400
+        
+        return jsonify(mcp_service.get_net_worth_projections(years, user_id=request.args.get('user_id'),
+                                                             **parameters))
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Most Monte Carlo paths /goals/success simulates per goal
+MAX_SIMULATION_PATHS = 100000
+
+@app.route('/goals/success')
+def get_goal_success():
+    """Monte Carlo probability of meeting each financial goal, e.g. /goals/success?paths=50000"""
+    try:
+        paths = int(request.args.get('paths', 20000))
+        if not 0 < paths <= MAX_SIMULATION_PATHS:
+            return jsonify({"error": f"paths must be between 1 and {MAX_SIMULATION_PATHS}"}), 400
+        
+        return jsonify(mcp_service.get_goal_success_probabilities(paths=paths, user_id=request.args.get('user_id')))
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Largest amount x rate x tenure grid /loans/affordability evaluates
+MAX_AFFORDABILITY_CELLS = 100000
+
+@app.route('/loans/affordability')
+def get_loan_affordability():
+    """
+    Affordability of every combination of loan amount, interest rate and tenure in one call,
+    e.g. /loans/affordability?amounts=1000000,2500000,5000000&rates=7.5,8.5,9.5&tenures=10,15,20
+    """
+    try:
+        amounts = _float_list_arg('amounts')
+        rates = _float_list_arg('rates', [8.5])
+        tenures = _float_list_arg('tenures', [20])
+        if not amounts:
+            return jsonify({"error": "amounts is required"}), 400
+        if len(amounts) * len(rates) * len(tenures) > MAX_AFFORDABILITY_CELLS:
+            return jsonify({"error": f"At most {MAX_AFFORDABILITY_CELLS} combinations per request"}), 400
+        if not all(1 / 12 <= tenure <= 50 for tenure in tenures) or min(rates) < 0:
+            return jsonify({"error": "tenures must be between one month and 50 years and rates non-negative"}), 400
+        
+        return jsonify(mcp_service.get_loan_affordability_grid(amounts, rates, tenures,
+                                                               user_id=request.args.get('user_id')))
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/loans/amortization')
+def get_loan_amortization():
+    """Month-by-month amortization schedule, e.g. /loans/amortization?amount=5000000&rate=8.5&tenure=20"""
+    try:
+        amount = _finite_float(request.args['amount'])
+        rate = _finite_float(request.args.get('rate', 8.5))
+        tenure = _finite_float(request.args.get('tenure', 20))
+        if not 1 / 12 <= tenure <= 50 or rate < 0 or amount <= 0:
+            return jsonify({"error": "amount must be positive, rate non-negative and tenure between "
+                                     "one month and 50 years"}), 400
+        
+        return jsonify(mcp_service.get_amortization_schedule(amount, rate, tenure))
     
+    except KeyError:
+        return jsonify({"error": "amount is required"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/debt/payoff')
+def get_debt_payoff():
+    """
+    Compare debt payoff strategies with interest, e.g.
+    /debt/payoff?extra=5000,10000&order=home_loan,personal_loan (order adds a custom strategy)
+    """
+    try:
+        extra_payments = tuple(_float_list_arg('extra', [0.0]))
+        if len(extra_payments) > 100 or min(extra_payments) < 0:
+            return jsonify({"error": "extra takes up to 100 non-negative amounts"}), 400
+        order = request.args.get('order')
+        custom_orders = (tuple(order.split(',')),) if order else None
+        
+        return jsonify(mcp_service.get_debt_payoff_plan(extra_payments=extra_payments, custom_orders=custom_orders,
+                                                        user_id=request.args.get('user_id')))
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/portfolio/analytics')
+def get_portfolio_analytics():
+    """Get allocation, weighted return, best/worst asset, benchmark deltas and concentration of the portfolio"""
+    try:
+        return jsonify(mcp_service.get_portfolio_analytics(request.args.get('user_id')))
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/history/<series>', methods=['GET', 'POST'])
+def history(series):
+    """
+    GET a net_worth or credit_score history range with its metrics, e.g.
+    /history/net_worth?start=2025-01-01&end=2025-06-30&period=month;
+    POST {"date": "2025-08-08", "value": -980000} to append a point
+    """
+    if series not in mcp_service.HISTORY_SERIES:
+        return jsonify({"error": f"Unknown history: {series}"}), 404
+    user_id = request.args.get('user_id')
+    
+    try:
+        if request.method == 'POST':
+            point = request.json or {}
+            if 'date' not in point or 'value' not in point:
+                return jsonify({"error": "date and value are required"}), 400
+            mcp_service.append_history_point(series, point['date'], _finite_float(point['value']), user_id=user_id)
+            return jsonify(mcp_service.get_history_metrics(series, user_id=user_id)), 201
+        
+        start, end = request.args.get('start'), request.args.get('end')
+        return jsonify({
+            "points": mcp_service.get_history_range(series, start, end, request.args.get('period'), user_id=user_id),
+            "metrics": mcp_service.get_history_metrics(series, start, end, user_id=user_id)
+        })
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/transactions/ingest', methods=['POST'])
+def ingest_transactions():
+    """
+    Stream a transaction feed (JSON lines by default, or CSV with ?format=csv or a text/csv body)
+    into the rolling spending aggregates without buffering the whole upload. A malformed line
+    rejects the whole feed (400) with nothing ingested; for the data file's user the result is
+    kept in memory only.
+    """
+    feed_format = request.args.get('format') or ('csv' if request.mimetype == 'text/csv' else 'jsonl')
+    try:
+        stream = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+        count = mcp_service.ingest_transactions(read_feed(stream, feed_format), user_id=request.args.get('user_id'))
+        return jsonify({
+            "ingested": count,
+            "monthly_summary": mcp_service.get_monthly_spending(request.args.get('user_id'))
+        })
+    
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({"error": f"Invalid transaction feed: {e}"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
-    # Check if GEMINI_API_KEY is set
-    if not os.getenv("GEMINI_API_KEY"):
-        print("Warning: GEMINI_API_KEY environment variable not set.")
-        print("Please set it in a .env file or export it as an environment variable.")
-        print("The application will run but AI features (Gemini 2.0 Flash) will not work.")
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    
+    # Check if GEMINI_API_KEY is set (not needed when LLM_BACKEND=fake)
+    if os.getenv("LLM_BACKEND", "gemini").lower() == "gemini" and not os.getenv("GEMINI_API_KEY"):
+        logger.warning("GEMINI_API_KEY environment variable not set. Please set it in a .env file or export it "
+                       "as an environment variable. The application will run but AI features (Gemini 2.0 Flash) "
+                       "will not work.")
     
     # Create templates and static folders if they don't exist
     os.makedirs('templates', exist_ok=True)
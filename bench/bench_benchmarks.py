@@ -0,0 +1,101 @@
+"""
+Compare hundreds of generated funds against their benchmarks: a per-fund Python loop over the index
+levels and NAVs against the benchmark registry's cached rolling returns and vectorized statistics.
+
+Run from the repository root:
+    python -m bench.bench_benchmarks [--funds N] [--repeat N]
+"""
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmark_registry import TRACKING_WINDOW, WINDOWS, BenchmarkRegistry
+
+# Synthetic index levels the generated funds track
+SAMPLE_BENCHMARK_DATA = os.path.join('fixtures', 'sample_benchmark_data.json')
+
+
+def _write_navs(path, benchmarks, funds, seed=7):
+    """NAV series tracking each fund's benchmark with noise, over the benchmark's months"""
+    rng = np.random.default_rng(seed)
+    categories = list(benchmarks["categories"]) + ["Hybrid - Balanced"]
+    document, fund_list = {"start": benchmarks["start"], "funds": {}}, []
+    for index in range(funds):
+        category = categories[index % len(categories)]
+        name = benchmarks["categories"].get(category, benchmarks["default"])
+        levels = np.array(benchmarks["benchmarks"][name]["levels"])
+        monthly = levels[1:] / levels[:-1] * (1 + rng.normal(0.0005, 0.01, len(levels) - 1))
+        nav = np.concatenate([[10.0], 10.0 * np.cumprod(monthly)])
+        document["funds"][f"mf_{index}"] = {"nav": nav.round(4).tolist()}
+        fund_list.append({"id": f"mf_{index}", "name": f"Fund {index}", "category": category,
+                          "returns": {label: round(float((nav[-1] / nav[-1 - months]) ** (12 / months) - 1) * 100, 2)
+                                      for label, months in WINDOWS.items()}})
+    with open(path, 'w') as file:
+        json.dump(document, file)
+    return fund_list
+
+
+def _loop(benchmarks, navs, funds):
+    """Per fund: trailing benchmark returns and tracking statistics from the raw series"""
+    results = []
+    for fund in funds:
+        name = benchmarks["categories"].get(fund["category"], benchmarks["default"])
+        levels = benchmarks["benchmarks"][name]["levels"]
+        nav = navs["funds"][fund["id"]]["nav"]
+        trailing = [((levels[-1] / levels[-1 - months]) ** (12 / months) - 1) * 100 for months in WINDOWS.values()]
+        fund_returns = [nav[-1 - k] / nav[-2 - k] - 1 for k in range(TRACKING_WINDOW)]
+        index_returns = [levels[-1 - k] / levels[-2 - k] - 1 for k in range(TRACKING_WINDOW)]
+        differences = [f - b for f, b in zip(fund_returns, index_returns)]
+        mean_difference = sum(differences) / len(differences)
+        tracking_error = math.sqrt(sum((d - mean_difference) ** 2 for d in differences) / (len(differences) - 1))
+        mean_fund, mean_index = sum(fund_returns) / len(fund_returns), sum(index_returns) / len(index_returns)
+        beta = (sum((f - mean_fund) * (b - mean_index) for f, b in zip(fund_returns, index_returns)) /
+                sum((b - mean_index) ** 2 for b in index_returns))
+        alpha = (mean_fund - beta * mean_index) * 12
+        results.append(trailing + [tracking_error * math.sqrt(12) * 100, beta, alpha * 100])
+    return results
+
+
+def _time(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--funds', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5, help='timing runs (best is reported)')
+    args = parser.parse_args()
+
+    with open(SAMPLE_BENCHMARK_DATA) as file:
+        benchmarks = json.load(file)
+    with tempfile.TemporaryDirectory() as directory:
+        nav_path = os.path.join(directory, 'navs.json')
+        funds = _write_navs(nav_path, benchmarks, args.funds)
+        with open(nav_path) as file:
+            navs = json.load(file)
+        registry = BenchmarkRegistry(SAMPLE_BENCHMARK_DATA, nav_path)
+
+    loop_seconds, expected = _time(lambda: _loop(benchmarks, navs, funds), args.repeat)
+    vector_seconds, comparisons = _time(lambda: registry.compare_funds(funds), args.repeat)
+    actual = [[comparison["returns"][label]["benchmark"] for label in WINDOWS] +
+              [comparison["tracking_error"], comparison["beta"], comparison["alpha"]] for comparison in comparisons]
+    if not np.allclose(np.round(expected, 2), actual, atol=0.011):
+        raise SystemExit("Registry comparisons differ from the per-fund loop")
+
+    print(f"{args.funds} funds, {TRACKING_WINDOW}-month tracking window, best of {args.repeat}")
+    print(f"  per-fund loop   {loop_seconds * 1000:9.2f} ms")
+    print(f"  registry        {vector_seconds * 1000:9.2f} ms  {loop_seconds / vector_seconds:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Load-test the full chat path offline against the fake LLM backend.
+
+Run from the repository root:
+    python -m bench.bench_chat [--requests 200] [--concurrency 16] [--latency 0.2]
+                               [--tokens-per-second 400] [--output-tokens 80] [--stream]
+"""
+import argparse
+import os
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUERIES = [
+    "How is my net worth growing?",
+    "Which of my mutual funds are underperforming the market?",
+    "Am I overspending on food and shopping?",
+    "Can I afford a 50L home loan?",
+    "Will I have enough for retirement by 60?",
+    "What is my credit score and how can I improve it?",
+]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.2, help='fake time to first token (s)')
+    parser.add_argument('--tokens-per-second', type=float, default=400)
+    parser.add_argument('--output-tokens', type=int, default=80)
+    parser.add_argument('--stream', action='store_true', help='use /chat/stream instead of /chat')
+    args = parser.parse_args()
+
+    # Configure the fake backend before the app creates its agent
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.latency)
+    os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["FAKE_LLM_OUTPUT_TOKENS"] = str(args.output_tokens)
+    import app
+
+    agent = app.get_gemini_agent()
+    endpoint = '/chat/stream' if args.stream else '/chat'
+
+    def one_request(index):
+        client = app.app.test_client()
+        payload = {"query": QUERIES[index % len(QUERIES)], "session_id": uuid.uuid4().hex}
+        start = time.perf_counter()
+        response = client.post(endpoint, json=payload, buffered=False)
+        first_byte = None
+        for _ in response.response:
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+        assert response.status_code == 200, response.status_code
+        return first_byte, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    first_bytes = [first for first, _ in results]
+    totals = [total for _, total in results]
+    print(f"{endpoint}: {args.requests} requests, concurrency {args.concurrency}, "
+          f"fake LLM {args.latency * 1000:.0f} ms + {args.output_tokens} tokens @ {args.tokens_per_second:.0f}/s")
+    print(f"throughput:     {args.requests / elapsed:8.1f} req/s")
+    print(f"latency p50:    {statistics.median(totals) * 1000:8.1f} ms")
+    print(f"latency p95:    {_percentile(totals, 0.95) * 1000:8.1f} ms")
+    print(f"first byte p50: {statistics.median(first_bytes) * 1000:8.1f} ms")
+    print(f"LLM calls:      {agent.backend.calls:8d} ({agent.backend.input_tokens} input tokens)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compare loading a dashboard's panels with one /data/<data_type> request each against a single
+/dashboard request for the same sections.
+
+Run from the repository root:
+    python -m bench.bench_dashboard [--requests 500] [--sections loans,goals,credit_score,...]
+"""
+import argparse
+import os
+import time
+
+
+def _rate(function, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        function()
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=500, help='page loads per mode')
+    parser.add_argument('--sections', default='user_info,bank_accounts,loans,goals,credit_score,recommendations')
+    args = parser.parse_args()
+
+    # Keep the agent offline; only data routes are exercised
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    import app
+
+    client = app.app.test_client()
+    sections = args.sections.split(',')
+    dashboard_url = f"/dashboard?sections={args.sections}&metrics=&charts="
+
+    def separate():
+        return sum(len(client.get(f'/data/{section}').data) for section in sections)
+
+    def aggregated():
+        return len(client.get(dashboard_url).data)
+
+    separate_rate = _rate(separate, args.requests)
+    aggregated_rate = _rate(aggregated, args.requests)
+    print(f"{len(sections)} sections per page load")
+    print(f"  /data per section  {separate_rate:8.0f} loads/s  {len(sections)} requests  {separate()} bytes")
+    print(f"  /dashboard         {aggregated_rate:8.0f} loads/s  1 request   {aggregated()} bytes  "
+          f"{aggregated_rate / separate_rate:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
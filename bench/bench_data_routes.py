@@ -0,0 +1,62 @@
+"""
+Measure /data/<data_type> throughput: the pre-encoded route (identity, gzip and If-None-Match
+revalidation) against serializing the getter's result with jsonify on every request.
+
+Run from the repository root:
+    python -m bench.bench_data_routes [--requests 2000]
+"""
+import argparse
+import os
+import time
+
+
+def _rate(function, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        function()
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000, help='requests per route and mode')
+    args = parser.parse_args()
+
+    # Keep the agent offline; only the data routes are exercised
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    from flask import jsonify
+
+    import app
+
+    routes = dict(app.DATA_ROUTES)
+    routes["all"] = (None, lambda user_id: app.mcp_service.get_all_data(user_id))
+
+    # The old path, behind the same routing so the comparison is only the serialization
+    def jsonify_route(data_type):
+        return jsonify(routes[data_type][1](None))
+
+    app.app.add_url_rule('/bench/jsonify/<data_type>', 'bench_jsonify', jsonify_route)
+    client = app.app.test_client()
+
+    print(f"{'route':<18}{'jsonify':>10}{'encoded':>10}{'gzip':>10}{'304':>10}  {'bytes':>8}{'gzip bytes':>12}")
+    for data_type in routes:
+        url = f'/data/{data_type}'
+        baseline_url = f'/bench/jsonify/{data_type}'
+        response = client.get(url)
+        etag = response.headers['ETag']
+        compressed = client.get(url, headers={'Accept-Encoding': 'gzip'})
+
+        rates = [
+            _rate(lambda: client.get(baseline_url), args.requests),
+            _rate(lambda: client.get(url), args.requests),
+            _rate(lambda: client.get(url, headers={'Accept-Encoding': 'gzip'}), args.requests),
+            _rate(lambda: client.get(url, headers={'If-None-Match': etag}), args.requests)
+        ]
+        print(f"{data_type:<18}" + ''.join(f"{rate:>10.0f}" for rate in rates) +
+              f"  {len(response.data):>8}{len(compressed.data):>12}")
+
+    print(f"\nrequests/s per route (Flask test client); encoder cache: {app.response_encoder.get_stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Compare chart construction through pandas + plotly.express against figure_specs.
+
+Run from the repository root, with bench/requirements.txt installed:
+    pip install -r bench/requirements.txt
+    python -m bench.bench_figures [--repeat N]
+"""
+import argparse
+import json
+import timeit
+
+import figure_specs
+from mcp_data_service import MCPDataService
+
+
+def _plotly_express_charts(service):
+    """The original DataFrame + plotly.express chart path"""
+    import pandas as pd
+    import plotly.express as px
+
+    history = service.get_net_worth_history()
+    df = pd.DataFrame({'date': [e["date"] for e in history], 'net_worth': [e["net_worth"] for e in history]})
+    line = px.line(df, x='date', y='net_worth', title='Net Worth Trend', template='plotly_white')
+
+    funds = service.get_mutual_funds()
+    mf_df = pd.DataFrame({'name': [f["name"] for f in funds], 'returns_1y': [f["returns"]["1y"] for f in funds]})
+    bar = px.bar(mf_df, x='name', y='returns_1y', title='Mutual Fund 1-Year Returns', text='returns_1y',
+                 color='returns_1y', color_continuous_scale=['red', 'yellow', 'green'], range_color=[-5, 20])
+    bar.update_layout(coloraxis_showscale=False)
+    bar.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+
+    categories = service.get_monthly_spending()["categories"]
+    spend_df = pd.DataFrame({'category': list(categories), 'amount': list(categories.values())})
+    spend_df = spend_df.sort_values('amount', ascending=False)
+    category_bar = px.bar(spend_df, x='category', y='amount', title='Monthly Spending by Category',
+                          text='amount', color='category')
+    pie = px.pie(spend_df, values='amount', names='category', title='Monthly Spending Distribution', hole=0.4)
+    pie.update_traces(textposition='inside', textinfo='percent+label')
+
+    return [fig.to_json() for fig in (line, bar, category_bar, pie)]
+
+
+def _figure_spec_charts(service):
+    """The same charts through figure_specs"""
+    history = service.get_net_worth_history()
+    line = figure_specs.line_figure([e["date"] for e in history], [e["net_worth"] for e in history],
+                                    title='Net Worth Trend', x_name='date', y_name='net_worth',
+                                    template='plotly_white')
+
+    funds = service.get_mutual_funds()
+    bar = figure_specs.bar_figure([f["name"] for f in funds], [f["returns"]["1y"] for f in funds],
+                                  title='Mutual Fund 1-Year Returns', x_name='name', y_name='returns_1y',
+                                  colorscale=['red', 'yellow', 'green'], range_color=[-5, 20],
+                                  texttemplate='%{text:.1f}%', textposition='outside')
+
+    ranked = sorted(service.get_monthly_spending()["categories"].items(), key=lambda item: item[1], reverse=True)
+    names, amounts = [name for name, _ in ranked], [amount for _, amount in ranked]
+    category_bar = figure_specs.category_bar_figure(names, amounts, title='Monthly Spending by Category',
+                                                    x_name='category', y_name='amount')
+    pie = figure_specs.pie_figure(names, amounts, title='Monthly Spending Distribution', hole=0.4,
+                                  label_name='category', value_name='amount')
+
+    return [figure_specs.to_json(fig) for fig in (line, bar, category_bar, pie)]
+
+
+def _decode_array(value):
+    """Decode plotly>=6 typed arrays ({"dtype": ..., "bdata": ...}) into plain lists"""
+    if isinstance(value, dict) and 'bdata' in value:
+        import base64
+        import numpy as np
+
+        return np.frombuffer(base64.b64decode(value['bdata']), dtype=value['dtype']).tolist()
+    return list(value)
+
+
+def _trace_values(chart_json):
+    """Extract the data arrays of every trace"""
+    figure = json.loads(chart_json)
+    return [
+        {field: _decode_array(trace[field]) for field in ('x', 'y', 'labels', 'values') if field in trace}
+        for trace in figure['data']
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    service = MCPDataService()
+
+    # The lightweight figures must carry the same data as the plotly.express ones
+    for expected, actual in zip(_plotly_express_charts(service), _figure_spec_charts(service)):
+        assert _trace_values(expected) == _trace_values(actual), "figure_specs output diverged from plotly.express"
+
+    results = {}
+    for name, build in (("plotly_express", _plotly_express_charts), ("figure_specs", _figure_spec_charts)):
+        seconds = min(timeit.repeat(lambda: build(service), number=args.repeat, repeat=3)) / args.repeat
+        size = sum(len(chart) for chart in build(service))
+        results[name] = seconds
+        print(f"{name:>15}: {seconds * 1000:8.3f} ms per 4 charts, {size:7d} bytes of JSON")
+    print(f"{'speedup':>15}: {results['plotly_express'] / results['figure_specs']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compare the per-dict portfolio loops against the columnar holdings engine on a generated portfolio.
+
+Run from the repository root:
+    python -m bench.bench_holdings [--funds N] [--stocks N] [--repeat N]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from holdings import CATEGORY_BENCHMARKS, DEFAULT_BENCHMARK_RETURN, Holdings
+
+
+def _generate(funds, stocks, seed=5):
+    rng = random.Random(seed)
+    categories = list(CATEGORY_BENCHMARKS) + ["Hybrid - Balanced"]
+    return {
+        "mutual_funds": [{"name": f"Fund {index}", "category": rng.choice(categories),
+                          "current_value": rng.uniform(1e4, 1e6), "invested_amount": rng.uniform(1e4, 1e6),
+                          "returns": {"1y": rng.uniform(-10, 30)}} for index in range(funds)],
+        "stocks": [{"name": f"Stock {index}", "sector": "Energy", "current_value": rng.uniform(1e3, 1e6),
+                    "invested_amount": rng.uniform(1e3, 1e6), "profit_loss_percentage": rng.uniform(-40, 60)}
+                   for index in range(stocks)],
+        "epf": {"balance": 650000.0, "interest_rate": 8.15},
+        "ppf": {"balance": 320000.0, "interest_rate": 7.1},
+        "fixed_deposits": [{"bank_name": "HDFC Bank", "current_value": 216000.0, "principal_amount": 200000.0,
+                            "interest_rate": 8.0}]
+    }
+
+
+def _loops(investments):
+    """The former per-list loops: allocation totals, weighted return, best/worst and benchmark deltas"""
+    funds, stocks = investments["mutual_funds"], investments["stocks"]
+    total_mf = sum(fund["current_value"] for fund in funds)
+    total_stocks = sum(stock["current_value"] for stock in stocks)
+    epf, ppf = investments["epf"]["balance"], investments["ppf"]["balance"]
+    fd = sum(deposit["current_value"] for deposit in investments["fixed_deposits"])
+    total = total_mf + total_stocks + epf + ppf + fd
+
+    weighted = sum(fund["current_value"] / total * fund["returns"]["1y"] for fund in funds)
+    weighted += sum(stock["current_value"] / total * stock["profit_loss_percentage"] for stock in stocks)
+    weighted += epf / total * investments["epf"]["interest_rate"] + ppf / total * investments["ppf"]["interest_rate"]
+    weighted += sum(deposit["current_value"] / total * deposit["interest_rate"]
+                    for deposit in investments["fixed_deposits"])
+
+    returns = [fund["returns"]["1y"] for fund in funds] + [stock["profit_loss_percentage"] for stock in stocks]
+    best, worst = max(returns), min(returns)
+    underperforming, outperforming = [], []
+    for fund in funds:
+        benchmark = CATEGORY_BENCHMARKS.get(fund["category"], DEFAULT_BENCHMARK_RETURN)
+        difference = round(fund["returns"]["1y"] - benchmark, 2)
+        analysis = {"name": fund["name"], "category": fund["category"], "fund_return_1y": fund["returns"]["1y"],
+                    "benchmark_return": benchmark, "difference": difference}
+        if difference < -1.0:
+            underperforming.append(analysis)
+        elif difference > 1.0:
+            outperforming.append(analysis)
+    return total, weighted, best, worst, len(underperforming), len(outperforming)
+
+
+def _columnar(holdings):
+    summary = holdings.summary()
+    comparison = summary["benchmark_comparison"]
+    return (summary["total_investment_value"], summary["weighted_average_return"],
+            summary["best_performing_asset"]["return"], summary["worst_performing_asset"]["return"],
+            len(comparison["underperforming"]), len(comparison["outperforming"]))
+
+
+def _time(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--funds', type=int, default=2000)
+    parser.add_argument('--stocks', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=5, help='timing runs (best is reported)')
+    args = parser.parse_args()
+
+    investments = _generate(args.funds, args.stocks)
+    build_seconds, holdings = _time(lambda: Holdings.from_investments(investments), args.repeat)
+    loop_seconds, expected = _time(lambda: _loops(investments), args.repeat)
+    vector_seconds, actual = _time(lambda: _columnar(holdings), args.repeat)
+
+    if not np.allclose(expected, actual, rtol=1e-9):
+        raise SystemExit(f"Columnar analytics differ from the loops: {expected} != {actual}")
+
+    print(f"{len(holdings)} holdings, best of {args.repeat}")
+    print(f"  python loops     {loop_seconds * 1000:9.2f} ms")
+    print(f"  columnar         {vector_seconds * 1000:9.2f} ms  {loop_seconds / vector_seconds:6.1f}x")
+    print(f"  build (once per data version) {build_seconds * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Measure streaming transaction ingestion throughput and memory over a generated feed.
+
+Run from the repository root:
+    python -m bench.bench_ingest [--transactions N] [--format jsonl|csv]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from transactions import SpendingAggregator, read_feed
+
+
+MERCHANTS = ["Swiggy", "Zomato Order", "Amazon.in", "Flipkart", "Uber Trip", "Indian Oil Petrol", "Netflix",
+             "Airtel Broadband", "Apollo Pharmacy", "HDFC Home Loan EMI", "Society Maintenance", "Local Store"]
+
+
+def _generate(count, seed=3):
+    """Synthetic transactions over ~5 years: a monthly salary credit plus random debits"""
+    rng = random.Random(seed)
+    start = date(2021, 1, 1)
+    for index in range(count):
+        day = start + timedelta(days=index * 1826 // count)
+        if index % 200 == 0:
+            yield {"date": day.isoformat(), "description": "Salary Credit", "amount": 150000.0, "type": "credit"}
+        else:
+            yield {"date": day.isoformat(), "description": rng.choice(MERCHANTS),
+                   "amount": round(rng.uniform(50, 5000), 2), "type": "debit"}
+
+
+def _write_feed(path, count, feed_format):
+    with open(path, 'w', newline='', encoding='utf-8') as feed:
+        if feed_format == 'csv':
+            writer = csv.DictWriter(feed, fieldnames=["date", "description", "amount", "type"])
+            writer.writeheader()
+            writer.writerows(_generate(count))
+        else:
+            for transaction in _generate(count):
+                feed.write(json.dumps(transaction) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transactions', type=int, default=1000000, help='feed size')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f'feed.{args.format}')
+        _write_feed(path, args.transactions, args.format)
+        size_mb = os.path.getsize(path) / 1e6
+
+        aggregator = SpendingAggregator()
+        start = time.perf_counter()
+        count = aggregator.ingest(read_feed(path, args.format))
+        seconds = time.perf_counter() - start
+
+        # Memory is measured in a second pass, since tracing slows ingestion down several times
+        tracemalloc.start()
+        SpendingAggregator().ingest(read_feed(path, args.format))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"{count:,} transactions ({size_mb:.0f} MB {args.format}) in {seconds:.2f} s: "
+          f"{count / seconds:,.0f} transactions/s, peak traced memory {peak / 1e6:.2f} MB")
+    print(f"{len(aggregator.months())} months; latest: {json.dumps(aggregator.monthly_summary())}")
+
+
+if __name__ == '__main__':
+    main()
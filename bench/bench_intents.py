@@ -0,0 +1,106 @@
+"""
+Compare per-query keyword scans against the compiled IntentRouter over a large query corpus.
+
+Run from the repository root:
+    python -m bench.bench_intents [--queries N] [--repeat N]
+"""
+import argparse
+import random
+import re
+import time
+
+from query_intents import CHART_KEYWORDS, SECTION_KEYWORDS, IntentRouter
+
+
+TEMPLATES = [
+    "How is my net worth growing?",
+    "How much money will I have at {age}?",
+    "Can I afford a {amount}L home loan at {rate}% for {tenure} years?",
+    "Which SIPs are underperforming the market?",
+    "Where am I spending the most this month?",
+    "Should I prepay my personal loan or invest in mutual funds?",
+    "What is my credit score and how can I improve my CIBIL?",
+    "Am I on track for my retirement goal?",
+    "Is my health insurance policy enough?",
+    "Give me advice on my portfolio and any recommendations",
+    "What will my projection look like in 10 years?",
+    "Compare my stock returns against the benchmark",
+    "How much cash is sitting in my savings account?",
+    "Which expense category blew my budget?",
+    "Hello there",
+]
+
+
+def _make_corpus(size, seed=7):
+    """Queries built from templates with varied numbers and casing, so most are distinct strings"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        query = rng.choice(TEMPLATES).format(
+            age=rng.randint(30, 60), amount=rng.randint(5, 150), rate=rng.choice([7.5, 8.5, 9, 10.25]),
+            tenure=rng.randint(5, 30)
+        )
+        corpus.append(query.upper() if rng.random() < 0.1 else query)
+    return corpus
+
+
+def _keyword_scan(query):
+    """The original classification: one any(...) substring scan per section plus uncompiled regexes"""
+    query = query.lower()
+    sections = {section for section, keywords in SECTION_KEYWORDS.items()
+                if any(word in query for word in keywords)}
+    chart_type = next((chart for chart, keywords in CHART_KEYWORDS
+                       if any(word in query for word in keywords)), None)
+    loan_amount = target_age = None
+    if "afford" in query and "loan" in query:
+        amount_matches = re.findall(r'(\d+\.?\d*)[lL]', query)
+        if amount_matches:
+            loan_amount = float(amount_matches[0]) * 100000
+    if "projection" in sections:
+        age_matches = re.findall(r'at (\d+)', query)
+        if age_matches:
+            target_age = int(age_matches[0])
+    return sections, chart_type, loan_amount, target_age
+
+
+def _time(function, corpus, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in corpus:
+            function(query)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=100000, help='corpus size')
+    parser.add_argument('--repeat', type=int, default=3, help='timing runs (best is reported)')
+    args = parser.parse_args()
+
+    corpus = _make_corpus(args.queries)
+    distinct = len(set(query.lower() for query in corpus))
+
+    # Both classifiers must agree on every query before their speed means anything
+    router = IntentRouter(cache_size=0)
+    for query in set(corpus):
+        intent = router.classify(query)
+        expected = _keyword_scan(query)
+        actual = (set(intent.sections), intent.chart_type, intent.loan_amount, intent.target_age)
+        if actual != expected:
+            raise SystemExit(f"Mismatch for {query!r}: {actual} != {expected}")
+
+    scan = _time(_keyword_scan, corpus, args.repeat)
+    compiled = _time(IntentRouter(cache_size=0).classify, corpus, args.repeat)
+    memoized_router = IntentRouter(cache_size=distinct)
+    memoized = _time(memoized_router.classify, corpus, args.repeat)
+
+    print(f"{len(corpus)} queries ({distinct} distinct), best of {args.repeat}")
+    for name, seconds in (("keyword scans", scan), ("compiled router", compiled), ("memoized router", memoized)):
+        print(f"  {name:<16} {seconds * 1000:8.1f} ms  {seconds / len(corpus) * 1e6:6.2f} us/query  "
+              f"{scan / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
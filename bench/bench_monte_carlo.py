@@ -0,0 +1,50 @@
+"""
+Measure Monte Carlo goal simulation throughput (paths per second), serially and fanned out over processes.
+
+Run from the repository root:
+    python -m bench.bench_monte_carlo [--paths N] [--goals N] [--workers N]
+"""
+import argparse
+import os
+import time
+
+from monte_carlo import allocation_from_investments, simulate_goals
+from mcp_data_service import MCPDataService
+
+
+def _run(goals, allocation, paths, workers):
+    start = time.perf_counter()
+    result = simulate_goals(goals, allocation, paths=paths, seed=1, workers=workers)
+    seconds = time.perf_counter() - start
+    path_months = sum(goal["months"] for goal in result["goals"]) * paths
+    return seconds, path_months, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paths', type=int, nargs='+', default=[10000, 100000], help='paths per goal')
+    parser.add_argument('--goals', type=int, default=12, help='goals to simulate (the sample goals, repeated)')
+    parser.add_argument('--workers', type=int, default=max(2, min(4, os.cpu_count() or 1)), help='process pool size')
+    args = parser.parse_args()
+
+    service = MCPDataService()
+    sample_goals = service.get_financial_goals()
+    goals = [sample_goals[index % len(sample_goals)] for index in range(args.goals)]
+    allocation = allocation_from_investments(service.get_investments())
+
+    for paths in args.paths:
+        serial_seconds, path_months, serial = _run(goals, allocation, paths, workers=None)
+        pool_seconds, _, pooled = _run(goals, allocation, paths, workers=args.workers)
+        if serial["goals"] != pooled["goals"]:
+            raise SystemExit("Process pool results differ from the serial run")
+
+        total_paths = paths * len(goals)
+        print(f"{len(goals)} goals x {paths} paths ({path_months / 1e6:.0f}M path-months)")
+        print(f"  serial        {serial_seconds:7.2f} s  {total_paths / serial_seconds:12,.0f} paths/s  "
+              f"{path_months / serial_seconds / 1e6:6.1f}M path-months/s")
+        print(f"  {args.workers} processes   {pool_seconds:7.2f} s  {total_paths / pool_seconds:12,.0f} paths/s  "
+              f"{path_months / pool_seconds / 1e6:6.1f}M path-months/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare per-scenario Python projection loops against the vectorized projection engine.
+
+Run from the repository root:
+    python -m bench.bench_projection [--years N] [--grid N] [--repeat N]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from projection import project_net_worth, scenario_grid
+
+
+def _scalar_projection(current_net_worth, annual_income, savings_rate, years, return_rate, salary_growth, inflation):
+    """The original loop, extended with salary growth and inflation, for one scenario"""
+    net_worth = current_net_worth
+    savings = annual_income * savings_rate
+    trajectory = [net_worth]
+    for year in range(1, years + 1):
+        net_worth += savings
+        if net_worth > 0:
+            net_worth += net_worth * return_rate
+        trajectory.append(net_worth / (1 + inflation) ** year)
+        savings *= 1 + salary_growth
+    return trajectory
+
+
+def _time(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=30, help='projection horizon')
+    parser.add_argument('--grid', type=int, default=10, help='values per parameter (scenarios = grid ** 4)')
+    parser.add_argument('--repeat', type=int, default=3, help='timing runs (best is reported)')
+    args = parser.parse_args()
+
+    grid = scenario_grid(
+        return_rate=np.linspace(0.02, 0.14, args.grid),
+        savings_rate=np.linspace(0.05, 0.5, args.grid),
+        salary_growth=np.linspace(0.0, 0.1, args.grid),
+        inflation=np.linspace(0.0, 0.08, args.grid)
+    )
+    scenarios = len(grid["return_rate"])
+    start_net_worth, annual_income = -1030000.0, 1800000.0
+
+    scalar_seconds, scalar = _time(lambda: [
+        _scalar_projection(start_net_worth, annual_income, grid["savings_rate"][index], args.years,
+                           grid["return_rate"][index], grid["salary_growth"][index], grid["inflation"][index])
+        for index in range(scenarios)
+    ], args.repeat)
+    vector_seconds, vector = _time(lambda: project_net_worth(
+        start_net_worth, annual_income, grid["savings_rate"], args.years, return_rate=grid["return_rate"],
+        salary_growth=grid["salary_growth"], inflation=grid["inflation"]
+    ), args.repeat)
+
+    if not np.allclose(np.array(scalar), vector, rtol=1e-9):
+        raise SystemExit("Vectorized projections differ from the scalar loop")
+
+    print(f"{scenarios} scenarios x {args.years} years, best of {args.repeat}")
+    print(f"  python loop  {scalar_seconds * 1000:9.1f} ms")
+    print(f"  numpy        {vector_seconds * 1000:9.1f} ms  {scalar_seconds / vector_seconds:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Measure worker cold start: module import time and time to the first served request.
+
+Run from the repository root:
+    python -m bench.bench_startup [--module app] [--top 15] [--budget-ms 500]
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+
+FIRST_REQUEST_SCRIPT = """
+import time
+start = time.perf_counter()
+import app
+client = app.app.test_client()
+response = client.get('/')
+assert response.status_code == 200, response.status_code
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def import_times(module):
+    """Run `python -X importtime -c 'import module'` and parse its (self, cumulative, name) rows in microseconds"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def time_to_first_request():
+    """Milliseconds from interpreter start of the import to the first '/' response"""
+    result = subprocess.run(
+        [sys.executable, '-c', FIRST_REQUEST_SCRIPT], capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='exit non-zero if importing the module takes longer than this')
+    args = parser.parse_args()
+
+    rows = import_times(args.module)
+    total_ms = max(cumulative for _, cumulative, _ in rows) / 1000
+    print(f"import {args.module}: {total_ms:.1f} ms cumulative")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+
+    start = time.perf_counter()
+    first_request_ms = time_to_first_request()
+    print(f"time to first request (in-process): {first_request_ms:.1f} ms; "
+          f"with interpreter start: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"FAIL: import time {total_ms:.1f} ms exceeds budget of {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from holdings import CATEGORY_BENCHMARKS, DEFAULT_BENCHMARK_RETURN
+
+logger = logging.getLogger(__name__)
+
+
+# Benchmark registry: month-end index levels per benchmark (and optionally fund NAVs) come from local
+# data files (fixtures/ holds synthetic samples for development, not market data). Rolling returns
+# are computed by array slicing once per (benchmark, window) and cached, and funds are compared
+# against their benchmarks as (funds x windows) arrays.
+
+# Trailing return windows, in months
+WINDOWS = {"1y": 12, "3y": 36, "5y": 60}
+
+# Months of returns used for tracking error, beta and alpha
+TRACKING_WINDOW = 36
+
+
+def _month_index(month):
+    """Months since year 0 of a "YYYY-MM" string"""
+    return int(month[:4]) * 12 + int(month[5:7]) - 1
+
+
+def rolling_returns(levels, window):
+    """
+    Returns (percent) over every window-month span of month-end levels, annualized for windows
+    of a year or more; NaN until the first full window
+    """
+    returns = np.full(len(levels), np.nan)
+    if len(levels) > window:
+        growth = levels[window:] / levels[:-window]
+        returns[window:] = (growth ** (12 / window) if window >= 12 else growth) - 1
+    return returns * 100
+
+
+def _load(path):
+    """A JSON data file, or an empty document if it is missing or malformed"""
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as file:
+            return json.load(file)
+    except Exception as e:
+        logger.error("Error loading %s: %s", path, e)
+        return {}
+
+
+def _series(document, section, key):
+    """Monthly series of a data file section as name -> (month index of the first value, values)"""
+    start = document.get("start", "2000-01")
+    return {
+        name: (_month_index(entry.get("start", start)), np.asarray(entry[key], dtype=float))
+        for name, entry in document.get(section, {}).items()
+    }
+
+
+def _stack(series, first, length):
+    """
+    Series as rows of one NaN-padded (series x length) matrix on a month axis starting at first,
+    with the row of each name and the column of each row's last month
+    """
+    matrix = np.full((len(series), length), np.nan)
+    last = np.empty(len(series), dtype=int)
+    for row, (start, values) in enumerate(series.values()):
+        matrix[row, start - first:start - first + len(values)] = values
+        last[row] = start - first + len(values) - 1
+    return {name: row for row, name in enumerate(series)}, matrix, last
+
+
+def _rounded(matrix):
+    """Rows of a matrix rounded to 2 decimals as Python lists, with None for NaN"""
+    return [[None if value != value else value for value in row] for row in np.round(matrix, 2).tolist()]
+
+
+class BenchmarkRegistry:
+    """
+    Benchmarks by mutual fund category with their month-end index levels, loaded from
+    benchmark_path; fund NAV series from nav_path are used for tracking error and alpha.
+    Without benchmark data, funds are compared with the static 1y category averages only.
+    """
+
+    def __init__(self, benchmark_path=None, nav_path=None):
+        document = _load(benchmark_path)
+        self.categories = document.get("categories", {})
+        self.default = document.get("default")
+        self._levels = _series(document, "benchmarks", "levels")  # benchmark -> (first month, levels)
+        navs = _series(_load(nav_path), "funds", "nav")           # fund id -> (first month, NAVs)
+
+        # Index levels and NAVs on one month axis, so a window of every fund is a single gather
+        spans = [(start, start + len(values)) for start, values in list(self._levels.values()) + list(navs.values())]
+        first = min([start for start, _ in spans], default=0)
+        length = max([end for _, end in spans], default=first) - first
+        self._level_rows, self._level_matrix, self._level_last = _stack(self._levels, first, length)
+        self._nav_rows, self._nav_matrix, self._nav_last = _stack(navs, first, length)
+
+        self._rolling = {}  # (benchmark, window) -> rolling returns
+        self._lock = threading.Lock()
+
+    def benchmark_for(self, category):
+        """Name of the benchmark a fund category is compared against"""
+        return self.categories.get(category, self.default)
+
+    def rolling_returns(self, name, window):
+        """Rolling returns of a benchmark over window months, computed once and cached"""
+        key = (name, window)
+        with self._lock:
+            returns = self._rolling.get(key)
+        if returns is None:
+            levels = self._levels.get(name, (0, np.empty(0)))[1]
+            returns = rolling_returns(levels, window)
+            returns.flags.writeable = False
+            with self._lock:
+                self._rolling[key] = returns
+        return returns
+
+    def trailing_return(self, name, window):
+        """Latest return of a benchmark over window months, NaN without enough history"""
+        returns = self.rolling_returns(name, window)
+        return returns[-1] if len(returns) else np.nan
+
+    def category_return(self, category, label="1y"):
+        """Trailing return of a category's benchmark, falling back to the static 1y averages"""
+        value = self.trailing_return(self.benchmark_for(category), WINDOWS[label])
+        if np.isnan(value) and label == "1y":
+            return CATEGORY_BENCHMARKS.get(category, DEFAULT_BENCHMARK_RETURN)
+        return round(float(value), 2)
+
+    def _trailing_table(self, names):
+        """(benchmarks x windows) trailing returns"""
+        table = np.array([[self.trailing_return(name, window) for window in WINDOWS.values()] for name in names])
+        return table.reshape(len(names), len(WINDOWS))
+
+    def _risk_statistics(self, funds, names, months):
+        """
+        Annualized tracking error, beta and alpha (percent) per fund over the last months monthly
+        returns both the fund's NAV and its benchmark have; NaN without a full window
+        """
+        statistics = np.full((len(funds), 3), np.nan)
+        nav_rows = np.array([self._nav_rows.get(fund.get("id"), -1) for fund in funds], dtype=int)
+        level_rows = np.array([self._level_rows.get(name, -1) for name in names], dtype=int)
+        found = np.flatnonzero((nav_rows >= 0) & (level_rows >= 0))
+        if not len(found):
+            return statistics
+
+        nav_rows, level_rows = nav_rows[found], level_rows[found]
+        # The months + 1 month-ends up to the last month both series have
+        end = np.minimum(self._nav_last[nav_rows], self._level_last[level_rows])
+        columns = end[:, None] - np.arange(months, -1, -1)
+        navs = self._nav_matrix[nav_rows[:, None], np.clip(columns, 0, None)]
+        levels = self._level_matrix[level_rows[:, None], np.clip(columns, 0, None)]
+        fund_returns = navs[:, 1:] / navs[:, :-1] - 1
+        benchmark_returns = levels[:, 1:] / levels[:, :-1] - 1
+        complete = ((columns[:, 0] >= 0) & ~np.isnan(fund_returns).any(axis=1) &
+                    ~np.isnan(benchmark_returns).any(axis=1))
+        if not complete.any():
+            return statistics
+
+        fund_returns, benchmark_returns = fund_returns[complete], benchmark_returns[complete]
+        tracking_error = (fund_returns - benchmark_returns).std(axis=1, ddof=1) * np.sqrt(12)
+        fund_centered = fund_returns - fund_returns.mean(axis=1, keepdims=True)
+        benchmark_centered = benchmark_returns - benchmark_returns.mean(axis=1, keepdims=True)
+        variance = (benchmark_centered ** 2).sum(axis=1)
+        beta = np.divide((fund_centered * benchmark_centered).sum(axis=1), variance,
+                         out=np.full(len(variance), np.nan), where=variance > 0)
+        # Jensen's alpha against the benchmark, without a risk-free rate
+        alpha = (fund_returns.mean(axis=1) - beta * benchmark_returns.mean(axis=1)) * 12
+        statistics[found[complete]] = np.column_stack([tracking_error * 100, beta, alpha * 100])
+        return statistics
+
+    def compare_funds(self, funds, tracking_window=TRACKING_WINDOW):
+        """
+        Compare each fund's 1y/3y/5y returns with its benchmark's trailing returns, and report
+        tracking error, beta and alpha for funds with a NAV history
+        """
+        names = [self.benchmark_for(fund.get("category", "")) for fund in funds]
+        unique = {name: position for position, name in enumerate(dict.fromkeys(names))}
+        positions = np.array([unique[name] for name in names], dtype=int)
+        benchmark = self._trailing_table(list(unique))[positions] if funds else np.empty((0, len(WINDOWS)))
+        fund_returns = np.array([[fund.get("returns", {}).get(label, np.nan) for label in WINDOWS] for fund in funds],
+                                dtype=float).reshape(len(funds), len(WINDOWS))
+
+        # Categories without an index series keep the static 1y averages
+        missing = np.isnan(benchmark[:, 0])
+        benchmark[missing, 0] = [CATEGORY_BENCHMARKS.get(fund.get("category", ""), DEFAULT_BENCHMARK_RETURN)
+                                 for fund, is_missing in zip(funds, missing) if is_missing]
+        excess = fund_returns - benchmark
+
+        # Rounded and converted a whole matrix at a time
+        fund_rows, benchmark_rows, excess_rows = _rounded(fund_returns), _rounded(benchmark), _rounded(excess)
+        statistics = _rounded(self._risk_statistics(funds, names, tracking_window))
+
+        return [{
+            "name": fund.get("name", ""),
+            "category": fund.get("category", ""),
+            "benchmark": name,
+            "fund_return_1y": fund.get("returns", {}).get("1y", 0),
+            "benchmark_return": benchmark_row[0],
+            "difference": excess_row[0],
+            "returns": {label: {"fund": fund_row[column], "benchmark": benchmark_row[column],
+                                "excess": excess_row[column]}
+                        for column, label in enumerate(WINDOWS)},
+            "tracking_error": statistic_row[0],
+            "beta": statistic_row[1],
+            "alpha": statistic_row[2]
+        } for fund, name, fund_row, benchmark_row, excess_row, statistic_row in
+            zip(funds, names, fund_rows, benchmark_rows, excess_rows, statistics)]
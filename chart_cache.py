@@ -0,0 +1,86 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from instrumentation import stage
+
+
+# Top-level MCP data sections each chart is derived from; a change to any of them invalidates the chart
+CHART_SECTIONS = {
+    "dashboard_net_worth": ["net_worth"],
+    "net_worth_trend": ["net_worth"],
+    "investment_performance": ["investments"],
+    "spending_patterns": ["spending"],
+    "debt_analysis": ["loans", "accounts", "spending"]
+}
+
+# Charts with dates counted from today (e.g. debt-free dates), cached per day as well as per data version
+DATED_CHARTS = {"debt_analysis"}
+
+
+class CachedChart:
+    """A chart payload serialized once, with the bytes and ETag to serve it"""
+
+    def __init__(self, value, serialized=False):
+        """Wrap value; when serialized is True, value is already JSON text"""
+        self.value = value
+        self.text = value if serialized else json.dumps(value)
+        self.body = self.text.encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()
+
+
+class ChartCache:
+    """Serialized chart JSON keyed by (chart type, data version), built lazily on first use"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def get(self, chart_type, version, build, user_id=None, serialized=False):
+        """
+        Get the cached chart for (chart_type, version), calling build() only on a miss.
+        Pass serialized=True when build() already returns JSON text.
+        """
+        key = (chart_type, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        # Only one thread builds a given chart; the others wait and reuse its result
+        with build_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == version:
+                    self.hits += 1
+                    return entry[1]
+            with stage("chart_build"):
+                value = build()
+            with stage("serialization"):
+                chart = CachedChart(value, serialized)
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = (version, chart)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._build_locks.pop(evicted, None)
+            return chart
+
+    def get_stats(self):
+        """Get hit/miss counters of the chart cache"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries)
+        }
@@ -0,0 +1,139 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) that avoids a count_tokens round trip"""
+    return len(text) // 4 + 1
+
+
+class ChatSession:
+    """One user's conversation with the model"""
+
+    def __init__(self, session_id, history):
+        self.session_id = session_id
+        self.history = history
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class ChatSessionManager:
+    """Pool of chat sessions keyed by session id, with bounded history and LRU/TTL eviction"""
+
+    def __init__(self, backend, seed_history=None, max_sessions=1000, ttl_seconds=1800,
+                 max_history_tokens=8000, count_tokens=None):
+        """
+        Initialize the pool over an LLMBackend. Every new session starts from seed_history
+        (e.g. the system prompt and its acknowledgement), which is never truncated; older turns
+        beyond max_history_tokens are dropped before each message is sent.
+        """
+        self.backend = backend
+        self.seed_history = list(seed_history or [])
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_history_tokens = max_history_tokens
+        self.count_tokens = count_tokens or backend.count_tokens
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id):
+        """Get the session for session_id, creating it if needed"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = ChatSession(session_id, list(self.seed_history))
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            return session
+
+    def reset(self, session_id):
+        """Forget a session's conversation"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def history_key(self, session_id):
+        """Hash of a session's turns after the seed history, or "" if it has none yet"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            return ""
+        with session.lock:
+            turns = session.history[len(self.seed_history):]
+            if not turns:
+                return ""
+            digest = hashlib.sha1()
+            for entry in turns:
+                digest.update(entry["role"].encode('utf-8'))
+                for part in entry["parts"]:
+                    digest.update(part.encode('utf-8'))
+            return digest.hexdigest()
+
+    def _evict_expired(self, now):
+        """Drop idle sessions; the dict is in LRU order so expired ones are at the front"""
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_used < self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+
+    def _trim_history(self, session, incoming_tokens=0):
+        """Drop the oldest turns until the history plus the next message fits the token budget"""
+        seed_length = len(self.seed_history)
+        costs = [self.count_tokens(''.join(entry["parts"])) for entry in session.history]
+        total = sum(costs) + incoming_tokens
+
+        # Drop user/model pairs so the history keeps alternating roles
+        dropped = 0
+        while total > self.max_history_tokens and len(session.history) - seed_length - dropped >= 2:
+            total -= costs[seed_length + dropped] + costs[seed_length + dropped + 1]
+            dropped += 2
+
+        if dropped:
+            del session.history[seed_length:seed_length + dropped]
+
+    @staticmethod
+    def _record_turn(session, message, response_text):
+        session.history.append({"role": "user", "parts": [message]})
+        session.history.append({"role": "model", "parts": [response_text]})
+
+    def record_turn(self, session_id, message, response_text):
+        """Add an exchange answered without the model (e.g. from a cache) to a session's history"""
+        session = self.get(session_id)
+        with session.lock:
+            self._trim_history(session, self.count_tokens(message) + self.count_tokens(response_text))
+            self._record_turn(session, message, response_text)
+
+    def send_message(self, session_id, message, timeout=None):
+        """
+        Send a message within a session and return the response text,
+        serializing concurrent requests for the same session only
+        """
+        session = self.get(session_id)
+        with session.lock:
+            self._trim_history(session, self.count_tokens(message))
+            response_text = self.backend.send(session.history, message, timeout=timeout)
+            self._record_turn(session, message, response_text)
+            return response_text
+
+    def stream_message(self, session_id, message, timeout=None):
+        """Send a message and yield the response text chunk by chunk as the model generates it"""
+        session = self.get(session_id)
+        with session.lock:
+            self._trim_history(session, self.count_tokens(message))
+            chunks = []
+            for chunk in self.backend.stream(session.history, message, timeout=timeout):
+                chunks.append(chunk)
+                yield chunk
+            # Only a completed answer becomes part of the conversation
+            self._record_turn(session, message, ''.join(chunks))
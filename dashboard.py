@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Aggregated dashboard payloads: the requested sections, metrics and charts are fetched concurrently
+# from their caches and trimmed to the requested fields, so a page loads with one round trip.
+
+
+def parse_list(value, default=()):
+    """Split a comma-separated query argument, keeping default when it is absent"""
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _group_paths(paths):
+    """Group dotted paths by their first component, e.g. ["loans.home_loan.emi"] -> {"loans": ["home_loan.emi"]}"""
+    grouped = {}
+    for path in paths:
+        head, _, rest = path.partition('.')
+        grouped.setdefault(head, []).append(rest)
+    return grouped
+
+
+def parse_fields(value):
+    """
+    Parse a comma-separated "fields" argument of dotted group.name.path paths into
+    {group: {name: paths}}, e.g. "sections.loans.home_loan.emi" -> {"sections": {"loans": ["home_loan.emi"]}}
+    """
+    return {group: _group_paths(paths) for group, paths in _group_paths(parse_list(value)).items()}
+
+
+def select_fields(value, paths):
+    """
+    Keep only the dotted paths of a value; an empty path keeps everything below it, and
+    paths through a list apply to every item
+    """
+    if not paths or '' in paths:
+        return value
+    if isinstance(value, list):
+        return [select_fields(item, paths) for item in value]
+    if not isinstance(value, dict):
+        return value
+    selected = {}
+    for key, rest in _group_paths(paths).items():
+        if key in value:
+            selected[key] = select_fields(value[key], rest)
+    return selected
+
+
+class DashboardAssembler:
+    """Runs the getters of one dashboard response concurrently on a shared thread pool"""
+
+    def __init__(self, max_workers=8):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dashboard")
+
+    def assemble(self, groups, fields=None):
+        """
+        groups is {group: {name: getter}}; returns {group: {name: value}} with each value trimmed
+        to fields[group][name], plus {"errors": {group: {name: message}}} for getters that raised
+        """
+        fields = fields or {}
+        futures = {(group, name): self.executor.submit(getter)
+                   for group, getters in groups.items() for name, getter in getters.items()}
+        payload = {group: {} for group in groups}
+        errors = {}
+        for (group, name), future in futures.items():
+            try:
+                payload[group][name] = select_fields(future.result(), fields.get(group, {}).get(name))
+            except Exception as e:
+                errors.setdefault(group, {})[name] = str(e)
+        if errors:
+            payload["errors"] = errors
+        return payload
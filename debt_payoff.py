@@ -0,0 +1,166 @@
+from datetime import date
+
+import numpy as np
+
+
+# Debt payoff simulation: every strategy's balances are one row of a (strategies x debts) array,
+# so all strategies advance month by month together with interest accruing on each debt.
+
+# Annual rate assumed for credit card balances, whose data carries no interest_rate
+DEFAULT_CARD_APR = 42.0
+
+
+def _unique_name(name, taken, last4=None):
+    """name, or if a debt already has it, name with the card's last four digits or a number"""
+    candidates = [name] + ([f"{name} ending {last4}"] if last4 else [])
+    candidates += (f"{name} #{number}" for number in range(2, len(taken) + 3))
+    return next(candidate for candidate in candidates if candidate not in taken)
+
+
+def debts_from_data(loans, credit_cards, card_apr=DEFAULT_CARD_APR):
+    """
+    Flatten loans and credit cards into debts with a unique name, a balance, annual rate (percent)
+    and minimum payment. Cards of the same bank and type are told apart by their last four
+    digits, if known, or else numbered.
+    """
+    debts = []
+    for loan_type, loan in loans.items():
+        if loan.get('outstanding_amount', 0) > 0:
+            debts.append({
+                "name": loan_type,
+                "balance": loan['outstanding_amount'],
+                "interest_rate": loan.get('interest_rate', 0),
+                "min_payment": loan.get('emi', 0)
+            })
+    for card in credit_cards:
+        if card.get('outstanding_balance', 0) > 0:
+            name = ' '.join(filter(None, [card.get('bank_name'), card.get('card_type'), "credit card"]))
+            debts.append({
+                "name": _unique_name(name, {debt['name'] for debt in debts}, card.get('last4')),
+                "balance": card['outstanding_balance'],
+                "interest_rate": card.get('interest_rate', card_apr),
+                "min_payment": card.get('min_payment_due', 0)
+            })
+    return debts
+
+
+def build_strategies(debts, extra_payments=(0,), custom_orders=None):
+    """
+    Strategies to compare: minimum payments only, plus avalanche (highest rate first) and snowball
+    (smallest balance first) for each extra monthly payment, and any custom orders of debt names.
+    Avalanche, snowball and custom strategies roll a paid-off debt's minimum into the next debt.
+    Debts a custom order leaves out follow it by rate; unknown or repeated names raise ValueError.
+    """
+    by_rate = sorted(range(len(debts)), key=lambda index: -debts[index]['interest_rate'])
+    by_balance = sorted(range(len(debts)), key=lambda index: debts[index]['balance'])
+    names = [debt['name'] for debt in debts]
+    custom_indexes = []
+    for custom_order in custom_orders or []:
+        unknown = [name for name in custom_order if name not in names]
+        if unknown:
+            raise ValueError(f"Unknown debts in order: {', '.join(unknown)} (debts: {', '.join(names)})")
+        if len(set(custom_order)) < len(custom_order):
+            raise ValueError(f"Debts repeated in order: {', '.join(custom_order)}")
+        order = [names.index(name) for name in custom_order]
+        custom_indexes.append(order + [index for index in by_rate if index not in order])
+
+    strategies = [{"name": "minimum", "order": by_rate, "extra": 0.0, "rollover": False}]
+    for extra in extra_payments:
+        strategies.append({"name": "avalanche", "order": by_rate, "extra": float(extra), "rollover": True})
+        strategies.append({"name": "snowball", "order": by_balance, "extra": float(extra), "rollover": True})
+        for order in custom_indexes:
+            strategies.append({"name": "custom", "order": order, "extra": float(extra), "rollover": True})
+    return strategies
+
+
+def simulate_payoff(debts, strategies, max_months=600):
+    """
+    Simulate all strategies month by month: interest accrues on each balance, minimum payments
+    are made, and the strategy's extra money goes to debts in its priority order.
+    Returns per strategy the months until debt free (None if not within max_months), total interest
+    and total paid, plus the month each debt is paid off.
+    """
+    balances = np.tile(np.array([debt['balance'] for debt in debts], dtype=float), (len(strategies), 1))
+    monthly_rates = np.array([debt['interest_rate'] for debt in debts], dtype=float) / (12 * 100)
+    min_payments = np.array([debt['min_payment'] for debt in debts], dtype=float)
+    orders = np.array([strategy['order'] for strategy in strategies], dtype=int).reshape(len(strategies), len(debts))
+    extras = np.array([strategy['extra'] for strategy in strategies])
+    rollover = np.array([strategy['rollover'] for strategy in strategies])
+    budget = min_payments.sum() + extras
+    rows = np.arange(len(strategies))
+
+    interest_paid = np.zeros(len(strategies))
+    total_paid = np.zeros(len(strategies))
+    payoff_month = np.full(balances.shape, -1)
+    payoff_month[balances <= 0] = 0
+
+    month = 0
+    while month < max_months and balances.max(initial=0) > 0.005:
+        month += 1
+        interest = balances * monthly_rates
+        balances += interest
+        interest_paid += interest.sum(axis=1)
+
+        # Minimum payments, then extra money (and freed-up minimums) in priority order
+        payments = np.minimum(min_payments, balances)
+        balances -= payments
+        available = np.where(rollover, budget - payments.sum(axis=1), extras)
+        spent = payments.sum(axis=1)
+        for rank in range(len(debts)):
+            target = orders[:, rank]
+            amount = np.minimum(available, balances[rows, target])
+            balances[rows, target] -= amount
+            available -= amount
+            spent += amount
+        total_paid += spent
+
+        newly_paid = (balances <= 0.005) & (payoff_month < 0)
+        payoff_month[newly_paid] = month
+        balances[balances <= 0.005] = 0.0
+
+    debt_free = (payoff_month >= 0).all(axis=1)
+    return [
+        {
+            "months_to_debt_free": int(payoff_month[index].max()) if debt_free[index] else None,
+            "total_interest": float(interest_paid[index]),
+            "total_paid": float(total_paid[index]),
+            "payoff_months": {debt['name']: (int(payoff_month[index, position]) if payoff_month[index, position] >= 0
+                                             else None)
+                              for position, debt in enumerate(debts)}
+        }
+        for index in range(len(strategies))
+    ]
+
+
+def add_months(start, months):
+    """The date months after start, as YYYY-MM"""
+    month_index = start.year * 12 + start.month - 1 + months
+    return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
+
+
+def compare_strategies(debts, extra_payments=(0,), custom_orders=None, as_of=None, max_months=600):
+    """Simulate the standard strategies and report payoff dates, total interest and interest saved"""
+    as_of = as_of or date.today()
+    strategies = build_strategies(debts, extra_payments, custom_orders)
+    results = simulate_payoff(debts, strategies, max_months) if debts else [
+        {"months_to_debt_free": 0, "total_interest": 0.0, "total_paid": 0.0, "payoff_months": {}}
+        for _ in strategies
+    ]
+
+    baseline_interest = results[0]["total_interest"]
+    report = []
+    for strategy, result in zip(strategies, results):
+        months = result["months_to_debt_free"]
+        report.append({
+            "strategy": strategy["name"],
+            "extra_payment": strategy["extra"],
+            "order": [debts[index]["name"] for index in strategy["order"]],
+            "months_to_debt_free": months,
+            "debt_free_date": add_months(as_of, months) if months is not None else None,
+            "total_interest": round(result["total_interest"], 2),
+            "total_paid": round(result["total_paid"], 2),
+            "interest_saved": round(baseline_interest - result["total_interest"], 2),
+            "payoff_dates": {name: add_months(as_of, payoff) if payoff is not None else None
+                             for name, payoff in result["payoff_months"].items()}
+        })
+    return {"debts": debts, "strategies": report}
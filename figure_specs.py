@@ -0,0 +1,190 @@
+import json
+
+
+# Lightweight Plotly figure builder: emits the same trace/layout dicts plotly.express produces for
+# the charts in this app directly from Python lists, as plain JSON any plotly.js version can render.
+
+# Layout subsets of Plotly's built-in templates that matter for the 2D charts we draw
+_AXIS_DEFAULTS = {"ticks": "", "title": {"standoff": 15}, "automargin": True, "zerolinewidth": 2}
+_COLORWAY = ["#636efa", "#EF553B", "#00cc96", "#ab63fa", "#FFA15A",
+             "#19d3f3", "#FF6692", "#B6E880", "#FF97FF", "#FECB52"]
+
+TEMPLATES = {
+    "plotly": {
+        "layout": {
+            "colorway": _COLORWAY,
+            "font": {"color": "#2a3f5f"},
+            "paper_bgcolor": "white",
+            "plot_bgcolor": "#E5ECF6",
+            "hovermode": "closest",
+            "hoverlabel": {"align": "left"},
+            "title": {"x": 0.05},
+            "xaxis": dict(_AXIS_DEFAULTS, gridcolor="white", linecolor="white", zerolinecolor="white"),
+            "yaxis": dict(_AXIS_DEFAULTS, gridcolor="white", linecolor="white", zerolinecolor="white"),
+            "coloraxis": {"colorbar": {"outlinewidth": 0, "ticks": ""}}
+        }
+    },
+    "plotly_white": {
+        "layout": {
+            "colorway": _COLORWAY,
+            "font": {"color": "#2a3f5f"},
+            "paper_bgcolor": "white",
+            "plot_bgcolor": "white",
+            "hovermode": "closest",
+            "hoverlabel": {"align": "left"},
+            "title": {"x": 0.05},
+            "xaxis": dict(_AXIS_DEFAULTS, gridcolor="#EBF0F8", linecolor="#EBF0F8", zerolinecolor="#EBF0F8"),
+            "yaxis": dict(_AXIS_DEFAULTS, gridcolor="#EBF0F8", linecolor="#EBF0F8", zerolinecolor="#EBF0F8"),
+            "coloraxis": {"colorbar": {"outlinewidth": 0, "ticks": ""}}
+        }
+    }
+}
+
+
+def _layout(title, template, x_title=None, y_title=None, cartesian=True):
+    """Base layout shared by all figures"""
+    layout = {
+        "template": TEMPLATES[template],
+        "title": {"text": title},
+        "legend": {"tracegroupgap": 0}
+    }
+    if cartesian:
+        layout["xaxis"] = {"anchor": "y", "domain": [0.0, 1.0], "title": {"text": x_title}}
+        layout["yaxis"] = {"anchor": "x", "domain": [0.0, 1.0], "title": {"text": y_title}}
+    return layout
+
+
+def line_figure(x, y, title, x_name='x', y_name='y', template='plotly'):
+    """Single-series line chart, equivalent to px.line"""
+    trace = {
+        "type": "scatter",
+        "mode": "lines",
+        "x": list(x),
+        "y": list(y),
+        "name": "",
+        "showlegend": False,
+        "line": {"color": _COLORWAY[0], "dash": "solid"},
+        "hovertemplate": f"{x_name}=%{{x}}<br>{y_name}=%{{y}}<extra></extra>",
+        "xaxis": "x",
+        "yaxis": "y"
+    }
+    return {"data": [trace], "layout": _layout(title, template, x_name, y_name)}
+
+
+def bar_figure(x, y, title, x_name='x', y_name='y', colorscale=None, range_color=None,
+               texttemplate=None, textposition=None, template='plotly'):
+    """
+    Bar chart colored on a continuous scale by its own values, equivalent to
+    px.bar(..., color=y, color_continuous_scale=colorscale, range_color=range_color)
+    """
+    values = list(y)
+    trace = {
+        "type": "bar",
+        "orientation": "v",
+        "x": list(x),
+        "y": values,
+        "text": values,
+        "name": "",
+        "showlegend": False,
+        "marker": {"color": values, "coloraxis": "coloraxis"},
+        "hovertemplate": f"{x_name}=%{{x}}<br>{y_name}=%{{marker.color}}<extra></extra>",
+        "xaxis": "x",
+        "yaxis": "y"
+    }
+    if texttemplate:
+        trace["texttemplate"] = texttemplate
+    if textposition:
+        trace["textposition"] = textposition
+
+    layout = _layout(title, template, x_name, y_name)
+    layout["barmode"] = "relative"
+    colors = colorscale or ["#0d0887", "#f0f921"]
+    step = 1.0 / (len(colors) - 1)
+    layout["coloraxis"] = {
+        "colorscale": [[index * step, color] for index, color in enumerate(colors)],
+        "colorbar": {"title": {"text": y_name}},
+        "showscale": False
+    }
+    if range_color:
+        layout["coloraxis"]["cmin"], layout["coloraxis"]["cmax"] = range_color
+    return {"data": [trace], "layout": layout}
+
+
+def category_bar_figure(categories, values, title, x_name='x', y_name='y', texttemplate=None,
+                        textposition=None, template='plotly'):
+    """Bar chart with one colored trace per category, equivalent to px.bar(..., color=x)"""
+    traces = []
+    for index, (category, value) in enumerate(zip(categories, values)):
+        trace = {
+            "type": "bar",
+            "orientation": "v",
+            "x": [category],
+            "y": [value],
+            "text": [value],
+            "name": category,
+            "legendgroup": category,
+            "showlegend": True,
+            "marker": {"color": _COLORWAY[index % len(_COLORWAY)]},
+            "hovertemplate": f"{x_name}=%{{x}}<br>{y_name}=%{{text}}<extra></extra>",
+            "xaxis": "x",
+            "yaxis": "y"
+        }
+        if texttemplate:
+            trace["texttemplate"] = texttemplate
+        if textposition:
+            trace["textposition"] = textposition
+        traces.append(trace)
+
+    layout = _layout(title, template, x_name, y_name)
+    layout["xaxis"]["categoryorder"] = "array"
+    layout["xaxis"]["categoryarray"] = list(categories)
+    layout["barmode"] = "relative"
+    layout["showlegend"] = False
+    return {"data": traces, "layout": layout}
+
+
+def pie_figure(labels, values, title, hole=0.4, textinfo='percent+label', textposition='inside',
+               label_name='label', value_name='value', template='plotly'):
+    """Donut (or pie, with hole=0) chart, equivalent to px.pie"""
+    trace = {
+        "type": "pie",
+        "labels": list(labels),
+        "values": list(values),
+        "hole": hole,
+        "name": "",
+        "showlegend": True,
+        "domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]},
+        "hovertemplate": f"{label_name}=%{{label}}<br>{value_name}=%{{value}}<extra></extra>",
+        "textinfo": textinfo,
+        "textposition": textposition
+    }
+    return {"data": [trace], "layout": _layout(title, template, cartesian=False)}
+
+
+# Top-level layout properties whose own names contain an underscore
+_UNDERSCORE_PROPERTIES = {"plot_bgcolor", "paper_bgcolor"}
+
+
+def update_layout(figure, **updates):
+    """
+    Apply layout updates using Plotly's magic underscore names (e.g. xaxis_title='Date'),
+    the same way fig.update_layout does
+    """
+    layout = figure["layout"]
+    for name, value in updates.items():
+        node = layout
+        parts = [name] if name in _UNDERSCORE_PROPERTIES else name.split('_')
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        if parts[-1] == 'title' and isinstance(value, str):
+            value = {"text": value}
+        if isinstance(value, dict) and isinstance(node.get(parts[-1]), dict):
+            node[parts[-1]].update(value)
+        else:
+            node[parts[-1]] = value
+    return figure
+
+
+def to_json(figure):
+    """Serialize a figure the way fig.to_json() would, for JSON.parse on the client"""
+    return json.dumps(figure, separators=(',', ':'))
@@ -1,46 +1,66 @@
-import google.generativeai as genai
-import os
-import json
+import logging
+import threading
+import time
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dotenv import load_dotenv
-import matplotlib.pyplot as plt
-import numpy as np
-import io
-import base64
-from PIL import Image
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import json
+from chat_sessions import ChatSessionManager
+from llm_backends import create_backend
+from response_cache import ResponseCache, hash_data
+from chart_cache import ChartCache, CHART_SECTIONS, DATED_CHARTS
+from query_intents import IntentRouter
+from prompt_context import ContextBuilder, CONTEXT_FORMAT_NOTE
+from instrumentation import metrics, stage, timed_stage
+import figure_specs
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class GeminiFinanceAgent:
     """AI agent powered by Google Gemini to provide financial insights"""
     
-    def __init__(self, mcp_service):
-        """Initialize the Gemini Finance Agent"""
+    # Session used when a caller does not identify the conversation
+    DEFAULT_SESSION_ID = "default"
+    
+    def __init__(self, mcp_service, max_sessions=1000, session_ttl_seconds=1800, max_history_tokens=8000,
+                 chart_cache=None, llm_timeout=60, chart_timeout=10, chart_workers=4, backend=None,
+                 response_cache=None, max_context_tokens=1500, measure_context_baseline=False):
+        """
+        Initialize the Gemini Finance Agent. backend is an LLMBackend; by default it is chosen by
+        the LLM_BACKEND environment variable (Gemini unless set to "fake"). measure_context_baseline
+        adds the tokens prompt context saves over pretty-printed JSON to the context stats, at the
+        cost of an extra serialization per prompt.
+        """
         self.mcp_service = mcp_service
-        api_key = os.getenv("GEMINI_API_KEY")
+        self.chart_cache = chart_cache or ChartCache()
         
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set. Please set it in a .env file.")
+        # The language model the agent talks to, and answers it already gave for the same question and data
+        self.backend = backend or create_backend()
+        self.response_cache = response_cache or ResponseCache()
         
-        # Configure the Gemini API
-        genai.configure(api_key=api_key)
+        # Classifies each query once for data selection, chart choice and parameter extraction
+        self.intent_router = IntentRouter()
         
-        # Get the Gemini Flash model
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        # Compact serialization of the data embedded in prompts, and how many tokens it saved
+        self.context_builder = ContextBuilder(max_context_tokens, count_tokens=self.backend.count_tokens,
+                                              measure_baseline=measure_context_baseline)
+        self.context_stats = dict({"requests": 0, "tokens": 0},
+                                  **({"baseline_tokens": 0, "tokens_saved": 0} if measure_context_baseline else {}))
+        self.last_context_stats = None
+        self._context_stats_lock = threading.Lock()
         
-        # Create a conversation history
-        self.chat = self.model.start_chat(history=[])
+        # Per-request time limits (seconds) and the pool that builds charts alongside model calls
+        self.llm_timeout = llm_timeout
+        self.chart_timeout = chart_timeout
+        self.chart_executor = ThreadPoolExecutor(max_workers=chart_workers, thread_name_prefix="chart")
         
         # Initialize the agent with user data and context
-        self._initialize_agent()
+        self._initialize_agent(max_sessions, session_ttl_seconds, max_history_tokens)
     
-    def _initialize_agent(self):
-        """Initialize the agent with financial data context"""
+    def _initialize_agent(self, max_sessions, session_ttl_seconds, max_history_tokens):
+        """Initialize the per-session chat pool with the financial data context"""
         user_info = self.mcp_service.get_user_info()
         net_worth = self.mcp_service.get_net_worth()
         
@@ -59,6 +79,8 @@ class GeminiFinanceAgent:
         5. Investment portfolio composition
         6. Income and spending patterns
         
+        Financial data is attached to each query as compact JSON. {CONTEXT_FORMAT_NOTE}
+        
         When generating visualizations, make them clear, informative, and visually appealing.
         
         Always maintain a professional and helpful tone. If asked to project scenarios, make clear what assumptions you're making. If asked about topics beyond the user's financial data, politely refocus the conversation on their financial situation.
@@ -66,8 +88,17 @@ class GeminiFinanceAgent:
         Remember, you are a financial advisor helping the user understand and improve their financial health using their actual personal financial data.
         """
         
-        # Initialize the chat with system prompt
-        response = self.chat.send_message(system_prompt)
+        # Seed every chat session with the system prompt instead of sending it once per session
+        self.sessions = ChatSessionManager(
+            self.backend,
+            seed_history=[
+                {"role": "user", "parts": [system_prompt]},
+                {"role": "model", "parts": ["Understood. I will answer using the user's financial data."]}
+            ],
+            max_sessions=max_sessions,
+            ttl_seconds=session_ttl_seconds,
+            max_history_tokens=max_history_tokens
+        )
     
     def get_financial_data_summary(self):
         """Get a summary of the user's financial data"""
@@ -99,343 +130,175 @@ class GeminiFinanceAgent:
     
     def generate_insight(self, insight_type):
         """Generate specific financial insight"""
-        if insight_type == "net_worth_trend":
-            return self._analyze_net_worth_trend()
-        elif insight_type == "investment_performance":
-            return self._analyze_investment_performance()
-        elif insight_type == "spending_patterns":
-            return self._analyze_spending_patterns()
-        elif insight_type == "debt_analysis":
-            return self._analyze_debt()
-        else:
+        entry = self.get_insight_entry(insight_type)
+        if entry is None:
             return "Insight type not recognized."
+        return entry.value
+    
+    def get_insight_entry(self, insight_type, user_id=None):
+        """Get the cached, pre-serialized insight for a user's current data version (None if unknown)"""
+        analyzers = {
+            "net_worth_trend": self._analyze_net_worth_trend,
+            "investment_performance": self._analyze_investment_performance,
+            "spending_patterns": self._analyze_spending_patterns,
+            "debt_analysis": self._analyze_debt
+        }
+        if insight_type not in analyzers:
+            return None
+        version = self.mcp_service.get_data_version(CHART_SECTIONS[insight_type], user_id)
+        if insight_type in DATED_CHARTS:
+            version = (version, date.today().isoformat())
+        return self.chart_cache.get(insight_type, version, lambda: analyzers[insight_type](user_id),
+                                    user_id=self.mcp_service.user_key(user_id))
     
-    def _analyze_net_worth_trend(self):
+    def _analyze_net_worth_trend(self, user_id=None):
         """Analyze net worth trend over time"""
-        net_worth_history = self.mcp_service.get_net_worth_history()
+        net_worth_history = self.mcp_service.get_history_range("net_worth", user_id=user_id)
         
         # Prepare data for the chart
         dates = [entry["date"] for entry in net_worth_history]
         values = [entry["net_worth"] for entry in net_worth_history]
         
-        # Create a DataFrame
-        df = pd.DataFrame({
-            'date': dates,
-            'net_worth': values
-        })
-        
         # Create a plotly figure
-        fig = px.line(df, x='date', y='net_worth', 
-                      title='Net Worth Trend',
-                      labels={'date': 'Date', 'net_worth': 'Net Worth (₹)'},
-                      template='plotly_white')
+        fig = figure_specs.line_figure(dates, values,
+                                       title='Net Worth Trend',
+                                       x_name='Date', y_name='Net Worth (₹)',
+                                       template='plotly_white')
         
-        fig.update_layout(
+        figure_specs.update_layout(fig,
             xaxis_title='Date',
             yaxis_title='Net Worth (₹)',
             yaxis_tickformat=',.0f'
         )
         
         # Convert to JSON for returning
-        chart_json = fig.to_json()
-        
-        # Calculate trend metrics
-        first_value = values[-1] if values else 0
-        last_value = values[0] if values else 0
-        change_value = last_value - first_value
-        change_percent = (change_value / abs(first_value)) * 100 if first_value != 0 else 0
-        
-        # Determine trend direction
-        if change_value > 0:
-            trend = "positive"
-        elif change_value < 0:
-            trend = "negative"
-        else:
-            trend = "neutral"
+        chart_json = figure_specs.to_json(fig)
+        
+        # Trend metrics are maintained incrementally by the history series
+        metrics = self.mcp_service.get_history_metrics("net_worth", user_id=user_id)
         
         result = {
             "chart": chart_json,
             "metrics": {
-                "current_net_worth": last_value,
-                "change_value": change_value,
-                "change_percent": change_percent,
-                "trend": trend,
-                "time_period": f"{net_worth_history[-1]['date']} to {net_worth_history[0]['date']}" if net_worth_history else "N/A"
+                "current_net_worth": metrics["latest"] if metrics["count"] else 0,
+                "change_value": metrics["change_value"],
+                "change_percent": metrics["change_percent"],
+                "trend": metrics["trend"],
+                "slope_per_month": metrics["slope_per_month"],
+                "time_period": metrics["time_period"]
             }
         }
         
         return result
     
-    def _analyze_investment_performance(self):
+    def _analyze_investment_performance(self, user_id=None):
         """Analyze investment performance"""
-        mutual_funds = self.mcp_service.get_mutual_funds()
-        stocks = self.mcp_service.get_stocks()
-        
-        # Prepare mutual funds data
-        mf_names = [fund["name"] for fund in mutual_funds]
-        mf_returns_1y = [fund["returns"]["1y"] for fund in mutual_funds]
-        mf_current_values = [fund["current_value"] for fund in mutual_funds]
+        # holdings pulls in NumPy, so it loads with the first investment analysis rather than the agent
+        from holdings import MUTUAL_FUND, STOCK
         
-        # Prepare stocks data
-        stock_names = [stock["name"] for stock in stocks]
-        stock_returns = [stock["profit_loss_percentage"] for stock in stocks]
-        stock_current_values = [stock["current_value"] for stock in stocks]
+        holdings = self.mcp_service.get_holdings(user_id)
+        analytics = self.mcp_service.get_portfolio_analytics(user_id)
+        mutual_funds = holdings.of_kind(MUTUAL_FUND)
+        stocks = holdings.of_kind(STOCK)
         
         # Create performance chart for mutual funds
-        if mutual_funds:
-            mf_df = pd.DataFrame({
-                'name': mf_names,
-                'returns_1y': mf_returns_1y,
-                'current_value': mf_current_values
-            })
-            
-            mf_fig = px.bar(mf_df, x='name', y='returns_1y', 
+        if len(mutual_funds):
+            mf_fig = figure_specs.bar_figure(mutual_funds["name"].tolist(), mutual_funds["return_1y"].tolist(),
                          title='Mutual Fund 1-Year Returns',
-                         text='returns_1y',
-                         color='returns_1y',
-                         color_continuous_scale=['red', 'yellow', 'green'],
-                         range_color=[-5, 20])
+                         x_name='name', y_name='returns_1y',
+                         colorscale=['red', 'yellow', 'green'],
+                         range_color=[-5, 20],
+                         texttemplate='%{text:.1f}%', textposition='outside')
             
-            mf_fig.update_layout(
+            figure_specs.update_layout(mf_fig,
                 xaxis_title='Fund Name',
                 yaxis_title='1-Year Returns (%)',
                 coloraxis_showscale=False
             )
             
-            mf_fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            
-            mf_chart_json = mf_fig.to_json()
+            mf_chart_json = figure_specs.to_json(mf_fig)
         else:
             mf_chart_json = None
         
         # Create performance chart for stocks
-        if stocks:
-            stock_df = pd.DataFrame({
-                'name': stock_names,
-                'returns': stock_returns,
-                'current_value': stock_current_values
-            })
-            
-            stock_fig = px.bar(stock_df, x='name', y='returns', 
+        if len(stocks):
+            stock_fig = figure_specs.bar_figure(stocks["name"].tolist(), stocks["return_1y"].tolist(),
                             title='Stock Returns',
-                            text='returns',
-                            color='returns',
-                            color_continuous_scale=['red', 'yellow', 'green'],
-                            range_color=[-10, 30])
+                            x_name='name', y_name='returns',
+                            colorscale=['red', 'yellow', 'green'],
+                            range_color=[-10, 30],
+                            texttemplate='%{text:.1f}%', textposition='outside')
             
-            stock_fig.update_layout(
+            figure_specs.update_layout(stock_fig,
                 xaxis_title='Stock Name',
                 yaxis_title='Returns (%)',
                 coloraxis_showscale=False
             )
             
-            stock_fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            
-            stock_chart_json = stock_fig.to_json()
+            stock_chart_json = figure_specs.to_json(stock_fig)
         else:
             stock_chart_json = None
         
         # Create portfolio allocation chart
-        total_mf = sum(mf_current_values) if mf_current_values else 0
-        total_stocks = sum(stock_current_values) if stock_current_values else 0
-        epf_balance = self.mcp_service.get_investments().get("epf", {}).get("balance", 0)
-        ppf_balance = self.mcp_service.get_investments().get("ppf", {}).get("balance", 0)
-        fd_balance = sum(fd["current_value"] for fd in self.mcp_service.get_investments().get("fixed_deposits", []))
-        
-        portfolio_df = pd.DataFrame({
-            'category': ['Mutual Funds', 'Stocks', 'EPF', 'PPF', 'Fixed Deposits'],
-            'value': [total_mf, total_stocks, epf_balance, ppf_balance, fd_balance]
-        })
-        
-        portfolio_fig = px.pie(portfolio_df, values='value', names='category', 
+        allocation = analytics["allocation"]
+        portfolio_fig = figure_specs.pie_figure(
+                            list(allocation),
+                            list(allocation.values()),
                             title='Investment Portfolio Allocation',
-                            hole=0.4)
+                            hole=0.4, textposition='inside', textinfo='percent+label',
+                            label_name='category', value_name='value')
         
-        portfolio_fig.update_traces(textposition='inside', textinfo='percent+label')
-        
-        portfolio_chart_json = portfolio_fig.to_json()
-        
-        # Calculate performance metrics
-        total_investment_value = total_mf + total_stocks + epf_balance + ppf_balance + fd_balance
-        weighted_return = 0
-        
-        if total_investment_value > 0:
-            for fund in mutual_funds:
-                weight = fund["current_value"] / total_investment_value
-                weighted_return += fund["returns"]["1y"] * weight
-            
-            for stock in stocks:
-                weight = stock["current_value"] / total_investment_value
-                weighted_return += stock["profit_loss_percentage"] * weight
-            
-            # Add estimated returns for EPF, PPF, and FDs
-            if epf_balance > 0:
-                epf_weight = epf_balance / total_investment_value
-                epf_return = self.mcp_service.get_investments().get("epf", {}).get("interest_rate", 8.15)
-                weighted_return += epf_return * epf_weight
-            
-            if ppf_balance > 0:
-                ppf_weight = ppf_balance / total_investment_value
-                ppf_return = self.mcp_service.get_investments().get("ppf", {}).get("interest_rate", 7.1)
-                weighted_return += ppf_return * ppf_weight
-            
-            if fd_balance > 0:
-                fd_weight = fd_balance / total_investment_value
-                # Average FD return
-                fd_returns = [fd["interest_rate"] for fd in self.mcp_service.get_investments().get("fixed_deposits", [])]
-                avg_fd_return = sum(fd_returns) / len(fd_returns) if fd_returns else 6.0
-                weighted_return += avg_fd_return * fd_weight
+        portfolio_chart_json = figure_specs.to_json(portfolio_fig)
         
+        # Performance metrics come from one vectorized pass over all holdings
         result = {
             "mutual_funds_chart": mf_chart_json,
             "stocks_chart": stock_chart_json,
             "portfolio_allocation_chart": portfolio_chart_json,
             "metrics": {
-                "total_investment_value": total_investment_value,
-                "weighted_average_return": weighted_return,
-                "best_performing_asset": self._get_best_performing_asset(mutual_funds, stocks),
-                "worst_performing_asset": self._get_worst_performing_asset(mutual_funds, stocks)
+                "total_investment_value": analytics["total_investment_value"],
+                "weighted_average_return": analytics["weighted_average_return"],
+                "best_performing_asset": analytics["best_performing_asset"],
+                "worst_performing_asset": analytics["worst_performing_asset"],
+                "concentration": analytics["concentration"]
             }
         }
         
         return result
     
-    def _get_best_performing_asset(self, mutual_funds, stocks):
-        """Get the best performing asset"""
-        best_mf = None
-        best_mf_return = -float('inf')
-        
-        for fund in mutual_funds:
-            if fund["returns"]["1y"] > best_mf_return:
-                best_mf = fund
-                best_mf_return = fund["returns"]["1y"]
-        
-        best_stock = None
-        best_stock_return = -float('inf')
-        
-        for stock in stocks:
-            if stock["profit_loss_percentage"] > best_stock_return:
-                best_stock = stock
-                best_stock_return = stock["profit_loss_percentage"]
-        
-        if best_mf and best_stock:
-            if best_mf_return > best_stock_return:
-                return {
-                    "type": "Mutual Fund",
-                    "name": best_mf["name"],
-                    "return": best_mf_return
-                }
-            else:
-                return {
-                    "type": "Stock",
-                    "name": best_stock["name"],
-                    "return": best_stock_return
-                }
-        elif best_mf:
-            return {
-                "type": "Mutual Fund",
-                "name": best_mf["name"],
-                "return": best_mf_return
-            }
-        elif best_stock:
-            return {
-                "type": "Stock",
-                "name": best_stock["name"],
-                "return": best_stock_return
-            }
-        else:
-            return None
-    
-    def _get_worst_performing_asset(self, mutual_funds, stocks):
-        """Get the worst performing asset"""
-        worst_mf = None
-        worst_mf_return = float('inf')
-        
-        for fund in mutual_funds:
-            if fund["returns"]["1y"] < worst_mf_return:
-                worst_mf = fund
-                worst_mf_return = fund["returns"]["1y"]
-        
-        worst_stock = None
-        worst_stock_return = float('inf')
-        
-        for stock in stocks:
-            if stock["profit_loss_percentage"] < worst_stock_return:
-                worst_stock = stock
-                worst_stock_return = stock["profit_loss_percentage"]
-        
-        if worst_mf and worst_stock:
-            if worst_mf_return < worst_stock_return:
-                return {
-                    "type": "Mutual Fund",
-                    "name": worst_mf["name"],
-                    "return": worst_mf_return
-                }
-            else:
-                return {
-                    "type": "Stock",
-                    "name": worst_stock["name"],
-                    "return": worst_stock_return
-                }
-        elif worst_mf:
-            return {
-                "type": "Mutual Fund",
-                "name": worst_mf["name"],
-                "return": worst_mf_return
-            }
-        elif worst_stock:
-            return {
-                "type": "Stock",
-                "name": worst_stock["name"],
-                "return": worst_stock_return
-            }
-        else:
-            return None
-    
-    def _analyze_spending_patterns(self):
+    def _analyze_spending_patterns(self, user_id=None):
         """Analyze spending patterns"""
-        monthly_spending = self.mcp_service.get_monthly_spending()
+        monthly_spending = self.mcp_service.get_monthly_spending(user_id)
         
         if not monthly_spending or "categories" not in monthly_spending:
             return "No spending data available."
         
-        # Prepare data for the chart
-        categories = list(monthly_spending["categories"].keys())
-        amounts = list(monthly_spending["categories"].values())
-        
-        # Create a DataFrame
-        df = pd.DataFrame({
-            'category': categories,
-            'amount': amounts
-        })
-        
-        # Sort by amount descending
-        df = df.sort_values('amount', ascending=False)
+        # Prepare data for the chart, sorted by amount descending
+        sorted_categories = sorted(monthly_spending["categories"].items(), key=lambda item: item[1], reverse=True)
+        categories = [category for category, _ in sorted_categories]
+        amounts = [amount for _, amount in sorted_categories]
         
         # Create a bar chart
-        fig = px.bar(df, x='category', y='amount', 
+        fig = figure_specs.category_bar_figure(categories, amounts,
                      title='Monthly Spending by Category',
-                     text='amount',
-                     color='category')
+                     x_name='category', y_name='amount',
+                     texttemplate='₹%{text:,.0f}', textposition='outside')
         
-        fig.update_layout(
+        figure_specs.update_layout(fig,
             xaxis_title='Category',
             yaxis_title='Amount (₹)',
             showlegend=False
         )
         
-        fig.update_traces(texttemplate='₹%{text:,.0f}', textposition='outside')
-        
-        bar_chart_json = fig.to_json()
+        bar_chart_json = figure_specs.to_json(fig)
         
         # Create a pie chart
-        pie_fig = px.pie(df, values='amount', names='category', 
+        pie_fig = figure_specs.pie_figure(categories, amounts,
                      title='Monthly Spending Distribution',
-                     hole=0.4)
+                     hole=0.4, textposition='inside', textinfo='percent+label',
+                     label_name='category', value_name='amount')
         
-        pie_fig.update_traces(textposition='inside', textinfo='percent+label')
-        
-        pie_chart_json = pie_fig.to_json()
+        pie_chart_json = figure_specs.to_json(pie_fig)
         
         # Calculate metrics
         total_spending = monthly_spending.get("total_expense", 0)
@@ -444,7 +307,7 @@ class GeminiFinanceAgent:
         savings_rate = monthly_spending.get("savings_percentage", 0)
         
         # Identify top spending categories
-        top_categories = df.head(3)['category'].tolist()
+        top_categories = categories[:3]
         
         result = {
             "bar_chart": bar_chart_json,
@@ -461,18 +324,14 @@ class GeminiFinanceAgent:
         
         return result
     
-    def _analyze_debt(self):
+    def _analyze_debt(self, user_id=None):
         """Analyze debt situation"""
-        loans = self.mcp_service.get_loans()
-        credit_cards = self.mcp_service.get_credit_cards()
+        loans = self.mcp_service.get_loans(user_id)
+        credit_cards = self.mcp_service.get_credit_cards(user_id)
         
         # Calculate total debt
-        total_debt = 0
-        for loan_type, loan_data in loans.items():
-            total_debt += loan_data.get("outstanding_amount", 0)
-        
-        for card in credit_cards:
-            total_debt += card.get("outstanding_balance", 0)
+        total_debt = (self.mcp_service.get_total_loan_outstanding(user_id) +
+                      self.mcp_service.get_total_credit_card_debt(user_id))
         
         # Prepare data for the chart
         debt_categories = []
@@ -484,30 +343,21 @@ class GeminiFinanceAgent:
         
         if credit_cards:
             debt_categories.append("Credit Cards")
-            debt_amounts.append(sum(card.get("outstanding_balance", 0) for card in credit_cards))
-        
-        # Create a DataFrame
-        df = pd.DataFrame({
-            'category': debt_categories,
-            'amount': debt_amounts
-        })
+            debt_amounts.append(self.mcp_service.get_total_credit_card_debt(user_id))
         
         # Create a pie chart
-        fig = px.pie(df, values='amount', names='category', 
+        fig = figure_specs.pie_figure(debt_categories, debt_amounts,
                      title='Debt Distribution',
-                     hole=0.4)
-        
-        fig.update_traces(textposition='inside', textinfo='percent+label')
+                     hole=0.4, textposition='inside', textinfo='percent+label',
+                     label_name='category', value_name='amount')
         
-        pie_chart_json = fig.to_json()
+        pie_chart_json = figure_specs.to_json(fig)
         
         # Calculate debt metrics
-        monthly_income = self.mcp_service.get_spending_summary().get("monthly_summary", {}).get("total_income", 0)
+        monthly_income = self.mcp_service.get_monthly_spending(user_id).get("total_income", 0)
         
         # Calculate total monthly debt payments
-        monthly_debt_payment = 0
-        for loan_type, loan_data in loans.items():
-            monthly_debt_payment += loan_data.get("emi", 0)
+        monthly_debt_payment = self.mcp_service.get_total_loan_emi(user_id)
         
         # Add minimum credit card payments
         for card in credit_cards:
@@ -516,13 +366,10 @@ class GeminiFinanceAgent:
         # Calculate debt-to-income ratio
         dti_ratio = (monthly_debt_payment / monthly_income) * 100 if monthly_income > 0 else 0
         
-        # Calculate months to debt freedom (assuming no additional debt and paying current EMIs)
-        months_to_debt_freedom = 0
-        remaining_debt = total_debt
-        
-        if monthly_debt_payment > 0:
-            # Simple calculation without considering interest
-            months_to_debt_freedom = remaining_debt / monthly_debt_payment
+        # Simulate paying the debts off with interest: current EMIs and minimum payments only, and
+        # avalanche/snowball with ₹5,000 and ₹10,000 extra a month
+        payoff_plan = self.mcp_service.get_debt_payoff_plan(extra_payments=(5000, 10000), user_id=user_id)
+        minimum_plan = payoff_plan["strategies"][0]
         
         result = {
             "pie_chart": pie_chart_json,
@@ -530,8 +377,11 @@ class GeminiFinanceAgent:
                 "total_debt": total_debt,
                 "monthly_debt_payment": monthly_debt_payment,
                 "debt_to_income_ratio": dti_ratio,
-                "months_to_debt_freedom": months_to_debt_freedom
+                "months_to_debt_freedom": minimum_plan["months_to_debt_free"],
+                "debt_free_date": minimum_plan["debt_free_date"],
+                "total_interest": minimum_plan["total_interest"]
             },
+            "payoff_strategies": payoff_plan["strategies"],
             "loans_detail": [
                 {
                     "type": loan_type.replace("_", " ").title(),
@@ -546,14 +396,43 @@ class GeminiFinanceAgent:
         
         return result
     
-    def process_query(self, query):
+    def process_query(self, query, session_id=None):
         """Process a natural language query and provide a response using the Gemini model"""
-        
-        # Prepare relevant financial data based on the query
+        session_id = session_id or self.DEFAULT_SESSION_ID
         financial_data = self._get_relevant_data_for_query(query)
+        data_hash = self._response_cache_key(financial_data, session_id)
+        
+        # Reuse the answer to the same question asked about the same data at the same point in a conversation
+        response_text = self.response_cache.get(query, data_hash)
+        if response_text is None:
+            # Send the query to the model and get a response
+            prompt = self._build_prompt(query, financial_data)
+            with stage("llm_call"):
+                response_text = self.sessions.send_message(session_id, prompt, timeout=self.llm_timeout)
+            self.response_cache.put(query, data_hash, response_text)
+        else:
+            # Keep the cached exchange in the conversation, so follow-ups have it as context
+            self.sessions.record_turn(session_id, query, response_text)
         
-        # Convert financial data to a string format that can be included in the prompt
-        financial_data_str = json.dumps(financial_data, indent=2)
+        # Process the response to handle any visualization requests
+        processed_response = self._process_response(response_text, query)
+        
+        return processed_response
+    
+    def _response_cache_key(self, financial_data, session_id):
+        """
+        Hash of the data slice and the session's earlier turns; a follow-up depends on the
+        conversation before it, so only sessions at the same point share cached answers
+        """
+        return hash_data({"data": financial_data, "history": self.sessions.history_key(session_id)})
+    
+    @timed_stage("prompt_build")
+    def _build_prompt(self, query, financial_data):
+        """Build the model prompt for a query, including the relevant financial data"""
+        
+        # Serialize the financial data compactly, within the context token budget
+        financial_data_str, stats = self.context_builder.build(financial_data)
+        self._record_context_stats(stats)
         
         # Create a prompt that includes the query and relevant financial data
         prompt = f"""
@@ -569,83 +448,140 @@ class GeminiFinanceAgent:
         If the query requires calculations beyond what's in the data, perform those calculations and explain your methodology.
         """
         
-        # Send the query to the model and get a response
-        response = self.chat.send_message(prompt)
-        
-        # Process the response to handle any visualization requests
-        processed_response = self._process_response(response.text, query)
+        return prompt
+    
+    def _record_context_stats(self, stats):
+        with self._context_stats_lock:
+            self.last_context_stats = stats
+            self.context_stats["requests"] += 1
+            for key in ("baseline_tokens", "tokens", "tokens_saved"):
+                if key in stats:
+                    self.context_stats[key] += stats[key]
+    
+    def get_context_stats(self):
+        """Get prompt context token usage: totals across requests and the most recent request"""
+        with self._context_stats_lock:
+            return dict(self.context_stats, last=self.last_context_stats)
+    
+    def stream_answer(self, query, session_id=None):
+        """
+        Stream the answer to a query as ("token", text) events while the visualization is built
+        in parallel; it is emitted as a ("chart", (chart_data, chart_type)) event as soon as it is ready,
+        or as ("chart", (None, None)) if it fails or misses chart_timeout.
+        """
+        chart_future = self.chart_executor.submit(self.get_visualization_for_query, query)
+        chart_sent = False
         
-        return processed_response
+        session_id = session_id or self.DEFAULT_SESSION_ID
+        financial_data = self._get_relevant_data_for_query(query)
+        data_hash = self._response_cache_key(financial_data, session_id)
+        cached_text = self.response_cache.get(query, data_hash)
+        if cached_text is not None:
+            self.sessions.record_turn(session_id, query, cached_text)
+            chunks = [cached_text]
+        else:
+            chunks = self.sessions.stream_message(
+                session_id, self._build_prompt(query, financial_data), timeout=self.llm_timeout
+            )
+        streamed = []
+        stream_start = time.perf_counter()
+        
+        # Hold back text that could be the start of a chart tag split across chunks
+        tag = "[CHART REQUESTED]"
+        pending = ""
+        chart_requested = False
+        for chunk in chunks:
+            # Cached answers are not model output, so they would skew time to first token
+            if not streamed and cached_text is None:
+                metrics.observe("llm_first_token_seconds", time.perf_counter() - stream_start,
+                                "Time from the streamed model call to its first chunk")
+            streamed.append(chunk)
+            pending += chunk
+            if tag in pending:
+                chart_requested = True
+                pending = pending.replace(tag, "")
+            keep = next((size for size in range(min(len(tag) - 1, len(pending)), 0, -1)
+                         if tag.startswith(pending[-size:])), 0)
+            if len(pending) > keep:
+                yield "token", pending[:len(pending) - keep]
+                pending = pending[len(pending) - keep:]
+            
+            if not chart_sent and chart_future.done():
+                chart_sent = True
+                yield "chart", self._chart_result(chart_future, query)
+        
+        if cached_text is None:
+            self.response_cache.put(query, data_hash, ''.join(streamed))
+        
+        # Add a note about the visualization, as _process_response does
+        chart_type = self._get_chart_type_for_query(query)
+        if chart_requested and chart_type:
+            pending += f"\n\n[A visualization for {chart_type.replace('_', ' ')} has been generated and is available in the UI.]"
+        if pending:
+            yield "token", pending
+        
+        if not chart_sent:
+            yield "chart", self._chart_result(chart_future, query)
     
+    @timed_stage("data_lookup")
     def _get_relevant_data_for_query(self, query):
         """Get relevant financial data based on the query"""
-        query = query.lower()
+        with stage("intent_routing"):
+            intent = self.intent_router.classify(query)
         
         # Basic data always included
         data = {
             "user_info": self.mcp_service.get_user_info()
         }
         
-        # Check for keywords in the query to determine what additional data to include
-        if any(word in query for word in ["money", "cash", "balance", "bank", "account", "savings"]):
+        # Include the additional data the query's keywords point at
+        if intent.wants("bank_accounts"):
             data["bank_accounts"] = self.mcp_service.get_bank_accounts()
         
-        if any(word in query for word in ["invest", "mutual", "fund", "stock", "equity", "portfolio", "sip", "underperform", "market"]):
+        if intent.wants("investments"):
             data["investments"] = {
                 "mutual_funds": self.mcp_service.get_mutual_funds(),
                 "stocks": self.mcp_service.get_stocks()
             }
             
             # If specifically asking about SIP performance vs market
-            if any(word in query for word in ["underperform", "market", "benchmark", "compare"]):
+            if intent.wants("fund_performance_analysis"):
                 data["fund_performance_analysis"] = self.mcp_service.analyze_mutual_fund_performance()
         
-        if any(word in query for word in ["loan", "debt", "emi", "afford", "home loan", "personal loan"]):
+        if intent.wants("loans"):
             data["loans"] = self.mcp_service.get_loans()
             
-            # If asking about affording a new loan
-            if "afford" in query and "loan" in query:
-                # Try to extract loan amount from query
-                import re
-                amount_matches = re.findall(r'(\d+\.?\d*)[lL]', query)
-                if amount_matches:
-                    loan_amount = float(amount_matches[0]) * 100000  # Convert lakhs to rupees
-                    data["loan_affordability"] = self.mcp_service.can_afford_loan(
-                        loan_amount=loan_amount, 
-                        interest_rate=8.5,  # Assume 8.5% interest rate
-                        tenure_years=20     # Assume 20 years tenure
-                    )
-        
-        if any(word in query for word in ["net worth", "networth", "assets", "liabilities", "growing"]):
+            # If asking about affording a new loan of a given amount
+            if intent.loan_amount is not None:
+                data["loan_affordability"] = self.mcp_service.can_afford_loan(
+                    loan_amount=intent.loan_amount,
+                    interest_rate=intent.interest_rate or 8.5,  # Assume 8.5% unless the query names a rate
+                    tenure_years=intent.tenure_years or 20      # Assume 20 years unless the query names a tenure
+                )
+        
+        if intent.wants("net_worth"):
             data["net_worth"] = self.mcp_service.get_net_worth()
             data["net_worth_history"] = self.mcp_service.get_net_worth_history()
         
-        if any(word in query for word in ["spend", "expense", "budget", "category"]):
+        if intent.wants("spending"):
             data["spending"] = self.mcp_service.get_spending_summary()
         
-        if any(word in query for word in ["goal", "target", "retirement", "education", "home"]):
+        if intent.wants("financial_goals"):
             data["financial_goals"] = self.mcp_service.get_financial_goals()
         
-        if any(word in query for word in ["credit", "score", "cibil"]):
+        if intent.wants("credit_score"):
             data["credit_score"] = self.mcp_service.get_credit_score()
         
-        if any(word in query for word in ["insurance", "policy", "health", "term", "vehicle"]):
+        if intent.wants("insurance"):
             data["insurance"] = self.mcp_service.get_insurance_policies()
         
-        if any(word in query for word in ["recommend", "suggestion", "advice"]):
+        if intent.wants("recommendations"):
             data["recommendations"] = self.mcp_service.get_recommendations()
         
         # If asking about future projections
-        if any(phrase in query for phrase in ["at 40", "by 40", "in 5 years", "in 10 years", "future", "will have", "projection"]):
-            age = self.mcp_service.get_user_info().get("age", 30)
-            
-            # Try to extract target age from query
-            import re
-            age_matches = re.findall(r'at (\d+)', query)
-            
-            if age_matches:
-                target_age = int(age_matches[0])
-                years = target_age - age
+        if intent.wants("projection"):
+            if intent.target_age is not None:
+                years = intent.target_age - data["user_info"].get("age", 30)
                 if years > 0:
                     data["projected_net_worth"] = self.mcp_service.get_projected_net_worth(years)
             else:
@@ -654,29 +590,39 @@ class GeminiFinanceAgent:
         
         return data
     
+    def answer_query(self, query, session_id=None):
+        """
+        Answer a query and build its visualization concurrently, so the latency is roughly
+        max(model call, chart build) instead of their sum.
+        Returns (response_text, chart_data, chart_type); the chart is dropped if it fails or misses chart_timeout.
+        """
+        chart_future = self.chart_executor.submit(self.get_visualization_for_query, query)
+        
+        response_text = self.process_query(query, session_id=session_id)
+        
+        chart_data, chart_type = self._chart_result(chart_future, query)
+        return response_text, chart_data, chart_type
+    
+    def _chart_result(self, chart_future, query):
+        """
+        The (chart_data, chart_type) of a chart build, or (None, None) if it failed or missed
+        chart_timeout, so the text answer is still delivered
+        """
+        try:
+            return chart_future.result(timeout=self.chart_timeout)
+        except FutureTimeoutError:
+            logger.warning("Chart generation timed out after %ss for query: %s", self.chart_timeout, query)
+        except Exception:
+            logger.exception("Chart generation failed for query: %s", query)
+        return None, None
+    
     def _process_response(self, response_text, original_query):
         """Process the response from the model to include visualizations if requested"""
         
         # Check if visualization is requested
         if "[CHART REQUESTED]" in response_text:
-            chart_type = None
-            
-            # Determine the type of chart needed based on the query and response
-            if any(word in original_query.lower() for word in ["net worth", "networth", "grow"]):
-                chart_data = self._analyze_net_worth_trend()
-                chart_type = "net_worth_trend"
-            
-            elif any(word in original_query.lower() for word in ["invest", "mutual", "fund", "stock", "portfolio", "sip"]):
-                chart_data = self._analyze_investment_performance()
-                chart_type = "investment_performance"
-            
-            elif any(word in original_query.lower() for word in ["spend", "expense", "budget"]):
-                chart_data = self._analyze_spending_patterns()
-                chart_type = "spending_patterns"
-            
-            elif any(word in original_query.lower() for word in ["loan", "debt", "emi"]):
-                chart_data = self._analyze_debt()
-                chart_type = "debt_analysis"
+            # Only the chart type is needed here; the chart itself is built by get_visualization_for_query
+            chart_type = self._get_chart_type_for_query(original_query)
             
             # Remove the chart request tag from the response
             response_text = response_text.replace("[CHART REQUESTED]", "")
@@ -687,21 +633,17 @@ class GeminiFinanceAgent:
         
         return response_text
     
+    def _get_chart_type_for_query(self, query):
+        """Determine which chart, if any, answers the query"""
+        return self.intent_router.classify(query).chart_type
+    
     def get_visualization_for_query(self, query):
         """Generate visualization based on the query"""
-        query = query.lower()
-        
-        if any(word in query for word in ["net worth", "networth", "grow"]):
-            return self._analyze_net_worth_trend(), "net_worth_trend"
-        
-        elif any(word in query for word in ["invest", "mutual", "fund", "stock", "portfolio", "sip"]):
-            return self._analyze_investment_performance(), "investment_performance"
-        
-        elif any(word in query for word in ["spend", "expense", "budget"]):
-            return self._analyze_spending_patterns(), "spending_patterns"
+        chart_type = self._get_chart_type_for_query(query)
         
-        elif any(word in query for word in ["loan", "debt", "emi"]):
-            return self._analyze_debt(), "debt_analysis"
+        if chart_type:
+            # Served from the chart cache, so repeated queries do not rebuild figures
+            return self.generate_insight(chart_type), chart_type
         
         return None, None
 
@@ -0,0 +1,166 @@
+import numpy as np
+
+
+# Columnar holdings: mutual funds, stocks, fixed deposits, EPF and PPF are flattened once into a
+# NumPy struct array, so portfolio analytics are single vectorized passes over all holdings.
+
+# Holding kinds, in allocation chart order
+KINDS = ("Mutual Fund", "Stock", "EPF", "PPF", "Fixed Deposit")
+MUTUAL_FUND, STOCK, EPF, PPF, FIXED_DEPOSIT = range(len(KINDS))
+
+# Allocation labels per kind, as shown on the portfolio allocation chart
+ALLOCATION_LABELS = ("Mutual Funds", "Stocks", "EPF", "PPF", "Fixed Deposits")
+
+# Benchmark 1-year returns (percent) per mutual fund category
+CATEGORY_BENCHMARKS = {
+    "Equity - Large Cap": 12.0,  # Nifty 50 average annual return
+    "Equity - Mid Cap": 14.0,    # Nifty Midcap 100 average annual return
+    "Debt - Corporate Bond": 7.0  # Corporate Bond index average annual return
+}
+DEFAULT_BENCHMARK_RETURN = 10.0
+
+# Rates assumed for EPF/PPF/FDs whose data carries no interest_rate
+DEFAULT_RATES = {EPF: 8.15, PPF: 7.1, FIXED_DEPOSIT: 6.0}
+
+HOLDING_DTYPE = np.dtype([
+    ("kind", np.int8),
+    ("name", object),
+    ("category", object),
+    ("value", np.float64),
+    ("invested", np.float64),
+    ("return_1y", np.float64),   # 1y return for funds, P/L % for stocks, interest rate otherwise
+    ("benchmark", np.float64)    # benchmark return, NaN where there is none
+])
+
+
+def _rows(investments, benchmarks):
+    for fund in investments.get('mutual_funds', []):
+        category = fund.get('category', '')
+        yield (MUTUAL_FUND, fund.get('name', ''), category, fund.get('current_value', 0),
+               fund.get('invested_amount', 0), fund.get('returns', {}).get('1y', 0),
+               benchmarks.get(category, DEFAULT_BENCHMARK_RETURN))
+    for stock in investments.get('stocks', []):
+        yield (STOCK, stock.get('name', ''), stock.get('sector', ''), stock.get('current_value', 0),
+               stock.get('invested_amount', 0), stock.get('profit_loss_percentage', 0), np.nan)
+    for kind, key in ((EPF, 'epf'), (PPF, 'ppf')):
+        account = investments.get(key)
+        if account:
+            yield (kind, KINDS[kind], '', account.get('balance', 0), account.get('balance', 0),
+                   account.get('interest_rate', DEFAULT_RATES[kind]), np.nan)
+    for deposit in investments.get('fixed_deposits', []):
+        yield (FIXED_DEPOSIT, f"{deposit.get('bank_name', '')} FD".strip(), deposit.get('term', ''),
+               deposit.get('current_value', 0), deposit.get('principal_amount', 0),
+               deposit.get('interest_rate', DEFAULT_RATES[FIXED_DEPOSIT]), np.nan)
+
+
+class Holdings:
+    """All of a portfolio's holdings as one struct array, with vectorized analytics"""
+
+    def __init__(self, array):
+        self.array = array
+
+    @classmethod
+    def from_investments(cls, investments, benchmarks=None):
+        """Build the columnar representation of an MCP investments section"""
+        rows = list(_rows(investments, benchmarks or CATEGORY_BENCHMARKS))
+        return cls(np.array(rows, dtype=HOLDING_DTYPE))
+
+    def __len__(self):
+        return len(self.array)
+
+    def of_kind(self, kind):
+        """The holdings of one kind, in data order"""
+        return self.array[self.array["kind"] == kind]
+
+    @property
+    def total_value(self):
+        return float(self.array["value"].sum())
+
+    def allocation(self):
+        """Current value per kind, in KINDS order"""
+        return np.bincount(self.array["kind"], weights=self.array["value"], minlength=len(KINDS))
+
+    def weighted_return(self):
+        """Value-weighted return (percent) across the holdings with a finite return"""
+        returns = self.array["return_1y"]
+        values = np.where(np.isfinite(returns), self.array["value"], 0.0)
+        total = values.sum()
+        if total <= 0:
+            return 0.0
+        return float(values @ np.where(np.isfinite(returns), returns, 0.0) / total)
+
+    def _extreme_asset(self, sign):
+        """
+        Best (sign=1) or worst (sign=-1) mutual fund or stock by return, skipping non-finite
+        returns. The first holding of a kind wins a tie within it, and a stock a tie with a fund.
+        """
+        returns = self.array["return_1y"]
+        market = (self.array["kind"] <= STOCK) & np.isfinite(returns)
+        if not market.any():
+            return None
+        scores = np.where(market, sign * returns, -np.inf)
+        tied = np.flatnonzero(market & (scores == scores.max()))
+        tied_stocks = tied[self.array["kind"][tied] == STOCK]
+        index = int(tied_stocks[0] if len(tied_stocks) else tied[0])
+        holding = self.array[index]
+        return {"type": KINDS[holding["kind"]], "name": holding["name"], "return": float(holding["return_1y"])}
+
+    def best_asset(self):
+        return self._extreme_asset(1)
+
+    def worst_asset(self):
+        return self._extreme_asset(-1)
+
+    def benchmark_comparison(self, threshold=1.0):
+        """Mutual funds beating or trailing their category benchmark by more than threshold points"""
+        funds = self.of_kind(MUTUAL_FUND)
+        differences = np.round(funds["return_1y"] - funds["benchmark"], 2)
+
+        def analyses(mask):
+            # Whole columns to Python lists, rather than field access per struct row
+            selected = funds[mask]
+            return [{
+                "name": name,
+                "category": category,
+                "fund_return_1y": fund_return,
+                "benchmark_return": benchmark,
+                "difference": difference
+            } for name, category, fund_return, benchmark, difference in zip(
+                selected["name"].tolist(), selected["category"].tolist(), selected["return_1y"].tolist(),
+                selected["benchmark"].tolist(), differences[mask].tolist())]
+
+        return {
+            "underperforming": analyses(differences < -threshold),
+            "outperforming": analyses(differences > threshold)
+        }
+
+    def concentration(self, top=5):
+        """Largest holding, weight of the top holdings and the Herfindahl index of holding weights"""
+        values = self.array["value"]
+        total = values.sum()
+        if total <= 0:
+            return {"largest_holding": None, "largest_weight": 0.0, "top_weight": 0.0,
+                    "herfindahl_index": 0.0, "effective_holdings": 0.0}
+        weights = values / total
+        largest = int(np.argmax(weights))
+        herfindahl = float(weights @ weights)
+        return {
+            "largest_holding": self.array["name"][largest],
+            "largest_weight": float(weights[largest]),
+            "top_weight": float(np.sort(weights)[::-1][:top].sum()),
+            "herfindahl_index": herfindahl,
+            "effective_holdings": 1.0 / herfindahl
+        }
+
+    def summary(self):
+        """Allocation, weighted return, best/worst asset, benchmark deltas and concentration"""
+        allocation = self.allocation()
+        return {
+            "total_investment_value": self.total_value,
+            "allocation": dict(zip(ALLOCATION_LABELS, allocation.tolist())),
+            "weighted_average_return": self.weighted_return(),
+            "best_performing_asset": self.best_asset(),
+            "worst_performing_asset": self.worst_asset(),
+            "benchmark_comparison": self.benchmark_comparison(),
+            "concentration": self.concentration()
+        }
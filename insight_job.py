@@ -0,0 +1,250 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from chart_cache import CHART_SECTIONS, CachedChart
+from response_cache import hash_data
+
+logger = logging.getLogger(__name__)
+
+
+# Offline insight precomputation: every insight (metrics plus chart JSON) is computed for each user's
+# MCP JSON file in a data directory, and each user of an MCPDataStore, with a process pool and written
+# to an InsightStore, which /insights serves from while the data the insights were computed from is
+# unchanged. Run with
+#     python insight_job.py [<data directory>] [--db mcp_data.db] [--cache-dir insight_cache] [--workers N]
+
+INSIGHT_TYPES = ("net_worth_trend", "investment_performance", "spending_patterns", "debt_analysis")
+
+# Precomputed insights older than this (seconds) are recomputed on request, e.g. because
+# payoff dates and goal timelines move with the calendar
+DEFAULT_MAX_AGE = 24 * 3600
+
+
+def source_hash(mcp_service, insight_type, user_id=None):
+    """
+    Hash of what an insight is derived from: the user's sections it reads, and the points of the
+    history series built from them
+    """
+    data = mcp_service.get_all_data(user_id)
+    sections = CHART_SECTIONS[insight_type]
+    return hash_data({
+        "sections": {section: data.get(section) for section in sections},
+        "history": {name: mcp_service.get_history_range(name, user_id=user_id)
+                    for name, (section, _, _) in mcp_service.HISTORY_SERIES.items() if section in sections}
+    })
+
+
+def _compute_insights(service, user_ids):
+    """Compute all insights for each of user_ids (None for the data file's user) of a service"""
+    # Imported here so the pool's workers load the agent (and NumPy) only when they run
+    from gemini_finance_agent import GeminiFinanceAgent
+    from llm_backends import EstimateOnlyBackend
+
+    # The analyzers never call the model
+    agent = GeminiFinanceAgent(service, backend=EstimateOnlyBackend(), chart_workers=1)
+    documents = []
+    try:
+        for user_id in user_ids:
+            try:
+                insights = {
+                    insight_type: {"source_hash": source_hash(service, insight_type, user_id),
+                                   "value": agent.get_insight_entry(insight_type, user_id).value}
+                    for insight_type in INSIGHT_TYPES
+                }
+            except Exception as e:
+                logger.error("Error computing insights for user %s: %s", user_id, e)
+                continue
+            documents.append((user_id, {"user_id": user_id, "computed_at": time.time(), "insights": insights}))
+    finally:
+        agent.chart_executor.shutdown()
+    return documents
+
+
+def compute_user_insights(data_file_path):
+    """Compute all insights for one user's MCP JSON file; returns [(user id, store document)]"""
+    from mcp_data_service import MCPDataService
+
+    service = MCPDataService(data_file_path=data_file_path)
+    user_id = service.get_user_info().get("id") or os.path.splitext(os.path.basename(data_file_path))[0]
+    return [(user_id, dict(document, user_id=user_id)) for _, document in _compute_insights(service, [None])]
+
+
+def compute_store_insights(db_path, user_ids, data_file_path='mcp_data.json'):
+    """
+    Compute all insights for a batch of an MCPDataStore's users; returns [(user id, store document)].
+    The data file provides the default user the agent is set up with, as in the app.
+    """
+    from mcp_data_service import MCPDataService
+    from mcp_store import MCPDataStore
+
+    return _compute_insights(MCPDataService(data_file_path=data_file_path, store=MCPDataStore(db_path)), user_ids)
+
+
+class InsightStore:
+    """Precomputed insights as one JSON file per user in a directory, re-read when a file changes"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._documents = {}  # user id -> ((mtime_ns, size), document)
+        self._lock = threading.Lock()
+
+    def _path(self, user_id):
+        return os.path.join(self.directory, f"{user_id}.json")
+
+    def put(self, user_id, document):
+        """Write a user's document atomically, so readers never see a partial file"""
+        path = self._path(user_id)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'w') as file:
+            json.dump(document, file)
+        os.replace(temporary_path, path)
+
+    def get(self, user_id):
+        """A user's (file stamp, document), or (None, None) if none was written"""
+        try:
+            stat = os.stat(self._path(user_id))
+        except OSError:
+            return None, None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._documents.get(user_id)
+            if cached is not None and cached[0] == stamp:
+                return cached
+        try:
+            with open(self._path(user_id), 'r') as file:
+                document = json.load(file)
+        except Exception as e:
+            logger.error("Error loading precomputed insights for %s: %s", user_id, e)
+            return None, None
+        with self._lock:
+            self._documents[user_id] = (stamp, document)
+        return stamp, document
+
+
+class PrecomputedInsights:
+    """
+    Serves insights from an InsightStore while they are fresh: younger than max_age, computed from
+    data that hashes the same as the service's current sections and history series, and with no
+    change to those sections in this process (e.g. an ingested feed) since the stored file was verified.
+    """
+
+    def __init__(self, store, mcp_service, max_age=DEFAULT_MAX_AGE):
+        self.store = store
+        self.mcp_service = mcp_service
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._verified = {}  # (user id, insight type) -> (file stamp, data version, CachedChart or None)
+        self._lock = threading.Lock()
+
+    def get(self, insight_type, user_id=None):
+        """The precomputed insight as a CachedChart, or None if it is missing or stale"""
+        entry = self._fresh_entry(insight_type, user_id)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def version(self, insight_type, user_id=None):
+        """
+        A value that changes whenever get() may start answering differently for the same data
+        version: when the stored file changes or its insights pass max_age
+        """
+        stamp, document = self.store.get(self.mcp_service.get_user_info(user_id).get("id"))
+        if document is None:
+            return None
+        return stamp, time.time() - document.get("computed_at", 0) > self.max_age
+
+    def _fresh_entry(self, insight_type, user_id):
+        user_key = self.mcp_service.get_user_info(user_id).get("id")
+        stamp, document = self.store.get(user_key)
+        if document is None or insight_type not in document.get("insights", {}):
+            return None
+        if time.time() - document.get("computed_at", 0) > self.max_age:
+            return None
+
+        key = (user_key, insight_type)
+        version = self.mcp_service.get_data_version(CHART_SECTIONS[insight_type], user_id)
+        with self._lock:
+            verified = self._verified.get(key)
+        if verified is not None and verified[0] == stamp:
+            # Same file: still fresh only while this process has not changed the sections since
+            return verified[2] if verified[1] == version else None
+
+        stored = document["insights"][insight_type]
+        current_hash = source_hash(self.mcp_service, insight_type, user_id)
+        entry = CachedChart(stored["value"]) if stored.get("source_hash") == current_hash else None
+        with self._lock:
+            self._verified[key] = (stamp, version, entry)
+        return entry
+
+    def get_stats(self):
+        """Get hit/miss counters of precomputed insight lookups"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+def run(data_directory=None, cache_directory='insight_cache', workers=None, db_path=None,
+        data_file_path='mcp_data.json', batch_size=100):
+    """
+    Precompute insights for every *.json user file in data_directory and every user of the store
+    at db_path (in batches of batch_size per task); returns the user ids written
+    """
+    store = InsightStore(cache_directory)
+    written = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        if data_directory:
+            for name in sorted(os.listdir(data_directory)):
+                if name.endswith('.json'):
+                    path = os.path.join(data_directory, name)
+                    futures[path] = executor.submit(compute_user_insights, path)
+        if db_path:
+            from mcp_store import MCPDataStore
+
+            user_ids = MCPDataStore(db_path).list_user_ids()
+            for start in range(0, len(user_ids), batch_size):
+                batch = user_ids[start:start + batch_size]
+                futures[f"{db_path} users {batch[0]}..{batch[-1]}"] = executor.submit(
+                    compute_store_insights, db_path, batch, data_file_path)
+        for source, future in futures.items():
+            try:
+                documents = future.result()
+            except Exception as e:
+                logger.error("Error computing insights for %s: %s", source, e)
+                continue
+            for user_id, document in documents:
+                store.put(user_id, document)
+                written.append(user_id)
+    return written
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precompute insights for every user file in a data directory "
+                                                 "and every user of a store")
+    parser.add_argument('data_directory', nargs='?', help='directory of per-user MCP JSON files')
+    parser.add_argument('--db', help='MCPDataStore database whose users to precompute')
+    parser.add_argument('--data-file', default='mcp_data.json', help="the app's data file, with --db")
+    parser.add_argument('--cache-dir', default='insight_cache', help='InsightStore directory')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    args = parser.parse_args()
+    if not args.data_directory and not args.db:
+        parser.error("give a data directory, --db or both")
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+
+    start = time.perf_counter()
+    users = run(args.data_directory, args.cache_dir, args.workers, db_path=args.db, data_file_path=args.data_file)
+    print(f"Precomputed insights for {len(users)} users in {time.perf_counter() - start:.1f}s")
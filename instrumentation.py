@@ -0,0 +1,267 @@
+import cProfile
+import functools
+import hmac
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# pyinstrument is optional: without it, profiled requests use cProfile
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+
+logger = logging.getLogger(__name__)
+
+# Latency histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram of one label set"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def samples(self):
+        """(le, cumulative count) per bucket, ending with +Inf"""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield _format_value(bound), cumulative
+        yield "+Inf", self.count
+
+
+class MetricsRegistry:
+    """
+    Latency histograms by metric name and labels, plus gauges read from stats callbacks
+    (e.g. cache hit counters), rendered in the Prometheus text exposition format
+    """
+
+    def __init__(self, namespace="finance", buckets=DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = buckets
+        self._histograms = {}  # name -> (help, {sorted labels: Histogram})
+        self._stats = {}       # name -> (help, get_stats, counter keys)
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, help_text="", **labels):
+        """Record one observation (seconds) of a histogram"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            _, series = self._histograms.setdefault(name, (help_text, {}))
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def stage(self, stage):
+        """Time a block as one stage of request handling"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - start,
+                         "Time spent in each request-handling stage", stage=stage)
+
+    def timed_stage(self, stage):
+        """Decorator form of stage()"""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def register_stats(self, name, get_stats, help_text="", counters=("hits", "misses")):
+        """
+        Export the numeric values of get_stats() as <namespace>_<name>_<key>: counters (keys that
+        only ever grow) with a _total suffix, everything else as gauges
+        """
+        with self._lock:
+            self._stats[name] = (help_text, get_stats, frozenset(counters))
+
+    def get_summary(self):
+        """Count, total and mean seconds per histogram label set"""
+        with self._lock:
+            return {
+                name: [dict(labels, count=histogram.count, sum=histogram.sum,
+                            mean=histogram.sum / histogram.count if histogram.count else 0.0)
+                       for labels, histogram in series.items()]
+                for name, (_, series) in self._histograms.items()
+            }
+
+    def render(self):
+        """All metrics in the Prometheus text format"""
+        lines = []
+        with self._lock:
+            for name, (help_text, series) in sorted(self._histograms.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, histogram in sorted(series.items()):
+                    for bound, cumulative in histogram.samples():
+                        lines.append(f"{metric}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+            stats = sorted(self._stats.items())
+
+        for name, (help_text, get_stats, counters) in stats:
+            try:
+                values = get_stats()
+            except Exception:
+                logger.exception("Error collecting %s stats", name)
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                kind = "counter" if key in counters else "gauge"
+                metric = f"{self.namespace}_{name}_{key}{'_total' if kind == 'counter' else ''}"
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} {kind}")
+                lines.append(f"{metric} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry the service, agent and app report to
+metrics = MetricsRegistry()
+stage = metrics.stage
+timed_stage = metrics.timed_stage
+
+
+# Clients that may ask for a profile without a token
+LOCAL_ADDRESSES = frozenset(("127.0.0.1", "::1"))
+
+
+class RequestProfiler:
+    """
+    Opt-in per-request profiling: a sample_rate fraction of all requests, plus requests that ask
+    for it, run under pyinstrument (if installed) or cProfile, and the report is written to
+    directory. A request asks with ?profile=<token>, or with ?profile=1 from this machine when no
+    token is set. Disabled unless enabled is true.
+    """
+
+    def __init__(self, enabled=False, sample_rate=0.0, directory='profiles', use_sampling_profiler=True,
+                 token=None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.use_sampling_profiler = use_sampling_profiler and SamplingProfiler is not None
+        self.token = token
+
+    def requested(self, request):
+        """Check whether a request asks for a profile and may have one"""
+        value = request.args.get('profile')
+        if value is None:
+            return False
+        if self.token:
+            return hmac.compare_digest(value, self.token)
+        return value == '1' and request.remote_addr in LOCAL_ADDRESSES
+
+    def should_profile(self, request):
+        if not self.enabled:
+            return False
+        return self.requested(request) or random.random() < self.sample_rate
+
+    def start(self):
+        """Start profiling the current request; returns the profiler, or None if one could not start"""
+        try:
+            if self.use_sampling_profiler:
+                profiler = SamplingProfiler()
+                profiler.start()
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+        except Exception:
+            # e.g. another profiler already active in this process
+            logger.warning("Could not start request profiler", exc_info=True)
+            return None
+        return profiler
+
+    def stop(self, profiler, route):
+        """Stop profiling, even if the report then fails to write, and write the report; returns its path"""
+        if self.use_sampling_profiler:
+            profiler.stop()
+        else:
+            profiler.disable()
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{route.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'index'}-{time.time_ns()}"
+        if self.use_sampling_profiler:
+            path = os.path.join(self.directory, f"{name}.html")
+            with open(path, 'w') as report:
+                report.write(profiler.output_html())
+        else:
+            path = os.path.join(self.directory, f"{name}.prof")
+            profiler.dump_stats(path)
+        return path
+
+
+def instrument_app(app, registry=metrics, profiler=None):
+    """
+    Time every request by route, method and status, log server errors, and profile requests
+    chosen by profiler (reports are logged, not returned to the client). Streaming responses
+    are timed until their headers are ready. Profilers are stopped on teardown, which also runs
+    after unhandled exceptions, and a failure to write a report never fails the request.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+        g.request_profiler = profiler.start() if profiler and profiler.should_profile(request) else None
+
+    @app.after_request
+    def record_request(response):
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        start = getattr(g, 'request_start', None)
+        if start is not None:
+            registry.observe("request_duration_seconds", time.perf_counter() - start,
+                             "Request latency by route", route=route, method=request.method,
+                             status=response.status_code)
+        if response.status_code >= 500:
+            logger.error("%s %s returned %s", request.method, request.path, response.status_code)
+        return response
+
+    @app.teardown_request
+    def stop_request_profiler(exception=None):
+        request_profiler = getattr(g, 'request_profiler', None)
+        if request_profiler is None:
+            return
+        g.request_profiler = None
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        try:
+            logger.info("Profile of %s %s written to %s", request.method, request.path,
+                        profiler.stop(request_profiler, route))
+        except Exception:
+            logger.exception("Could not write the profile of %s %s", request.method, request.path)
@@ -0,0 +1,138 @@
+import os
+from abc import ABC, abstractmethod
+import threading
+import time
+
+from chat_sessions import estimate_tokens
+
+
+class LLMBackend(ABC):
+    """
+    Interface the finance agent uses to talk to a language model.
+    History is a list of {"role": "user" | "model", "parts": [text]} dicts owned by the caller.
+    """
+
+    @abstractmethod
+    def send(self, history, message, timeout=None):
+        """Send message after history and return the full response text"""
+
+    @abstractmethod
+    def stream(self, history, message, timeout=None):
+        """Send message after history and yield the response text chunk by chunk"""
+
+    def count_tokens(self, text):
+        """Estimate how many tokens text uses"""
+        return estimate_tokens(text)
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini models through the google-generativeai SDK"""
+
+    def __init__(self, api_key=None, model_name='gemini-2.0-flash'):
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY environment variable not set. Please set it in a .env file.")
+
+        # Imported here rather than at module level: the SDK takes most of a second to import
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def _request(self, history, message, timeout, stream):
+        contents = list(history) + [{"role": "user", "parts": [message]}]
+        request_options = {"timeout": timeout} if timeout else None
+        return self.model.generate_content(contents, stream=stream, request_options=request_options)
+
+    def send(self, history, message, timeout=None):
+        return self._request(history, message, timeout, stream=False).text
+
+    def stream(self, history, message, timeout=None):
+        for chunk in self._request(history, message, timeout, stream=True):
+            yield chunk.text
+
+
+class EstimateOnlyBackend(LLMBackend):
+    """
+    Backend for offline jobs that use the agent without a model (e.g. insight precomputation):
+    it only estimates tokens, and any attempt to call the model raises RuntimeError
+    """
+
+    def send(self, history, message, timeout=None):
+        raise RuntimeError("EstimateOnlyBackend cannot call a language model")
+
+    def stream(self, history, message, timeout=None):
+        raise RuntimeError("EstimateOnlyBackend cannot call a language model")
+
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic local stand-in for load tests and CI: no network, configurable latency
+    (time to first token), throughput (tokens per second) and response length
+    """
+
+    WORDS = ("Based on your financial data, your savings rate is healthy and your debt is "
+             "manageable. Consider reviewing your portfolio allocation and emergency fund.").split()
+
+    def __init__(self, latency=0.0, tokens_per_second=None, output_tokens=60, chunk_tokens=5,
+                 request_chart=True):
+        """
+        latency: seconds before the first token; tokens_per_second: generation speed
+        (None for instant); output_tokens: words per answer; chunk_tokens: words per streamed chunk;
+        request_chart: end answers with the [CHART REQUESTED] tag like the real model may
+        """
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.chunk_tokens = chunk_tokens
+        self.request_chart = request_chart
+        self.calls = 0
+        self.input_tokens = 0
+        self.generated_tokens = 0
+        self._lock = threading.Lock()
+
+    def _words(self, history, message):
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += self.count_tokens(message) + sum(
+                self.count_tokens(''.join(entry["parts"])) for entry in history
+            )
+            self.generated_tokens += self.output_tokens
+        words = [self.WORDS[index % len(self.WORDS)] for index in range(self.output_tokens)]
+        if self.request_chart:
+            words.append("[CHART REQUESTED]")
+        return words
+
+    def _generation_time(self, tokens):
+        return tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def send(self, history, message, timeout=None):
+        words = self._words(history, message)
+        time.sleep(self.latency + self._generation_time(self.output_tokens))
+        return ' '.join(words)
+
+    def stream(self, history, message, timeout=None):
+        words = self._words(history, message)
+        time.sleep(self.latency)
+        for start in range(0, len(words), self.chunk_tokens):
+            chunk = words[start:start + self.chunk_tokens]
+            time.sleep(self._generation_time(len(chunk)))
+            yield ('' if start == 0 else ' ') + ' '.join(chunk)
+
+
+def create_backend(name=None):
+    """
+    Create the backend named by name or the LLM_BACKEND environment variable ("gemini" by default).
+    The fake backend reads FAKE_LLM_LATENCY, FAKE_LLM_TOKENS_PER_SECOND and FAKE_LLM_OUTPUT_TOKENS.
+    """
+    name = (name or os.getenv("LLM_BACKEND", "gemini")).lower()
+    if name == "gemini":
+        return GeminiBackend(model_name=os.getenv("GEMINI_MODEL", "gemini-2.0-flash"))
+    if name == "fake":
+        tokens_per_second = os.getenv("FAKE_LLM_TOKENS_PER_SECOND")
+        return FakeBackend(
+            latency=float(os.getenv("FAKE_LLM_LATENCY", "0")),
+            tokens_per_second=float(tokens_per_second) if tokens_per_second else None,
+            output_tokens=int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "60"))
+        )
+    raise ValueError(f"Unknown LLM backend: {name}")
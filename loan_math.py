@@ -0,0 +1,79 @@
+import numpy as np
+
+
+# Vectorized loan math: amounts, annual rates (percent) and tenures (years) may be scalars or
+# arrays and are broadcast against each other, so whole grids are evaluated in one pass.
+
+
+def monthly_emi(principal, annual_rate, tenure_years):
+    """Equated monthly installment for each loan; a 0% rate repays principal evenly"""
+    principal, annual_rate, tenure_years = np.broadcast_arrays(
+        np.asarray(principal, dtype=float), np.asarray(annual_rate, dtype=float),
+        np.asarray(tenure_years, dtype=float)
+    )
+    r = annual_rate / (12 * 100)  # Monthly interest rate
+    n = tenure_years * 12         # Total number of months
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = (1 + r) ** n
+        emi = np.where(r > 0, principal * r * growth / (growth - 1), principal / n)
+    return emi
+
+
+def affordability_grid(amounts, annual_rates, tenure_years, monthly_income, existing_emi):
+    """
+    Affordability of every (amount, rate, tenure) combination, as arrays shaped
+    (len(amounts), len(annual_rates), len(tenure_years)), using the same rules as
+    MCPDataService.can_afford_loan: total debt-to-income below 50% of income. Tenures are rounded
+    to whole months, which the EMIs are computed over, as in amortization_schedule.
+    """
+    amounts = np.asarray(amounts, dtype=float)[:, None, None]
+    annual_rates = np.asarray(annual_rates, dtype=float)[None, :, None]
+    tenure_years = (np.round(np.asarray(tenure_years, dtype=float) * 12) / 12)[None, None, :]
+
+    emi = monthly_emi(amounts, annual_rates, tenure_years)
+    total_emi = existing_emi + emi
+    dti_ratio = total_emi / monthly_income if monthly_income > 0 else np.ones_like(emi)
+    max_affordable_emi = monthly_income * 0.5 - existing_emi
+
+    # Largest loan whose EMI fits within max_affordable_emi, per (rate, tenure)
+    unit_emi = monthly_emi(1.0, annual_rates[0], tenure_years[0])
+    max_amount = np.maximum(max_affordable_emi, 0) / unit_emi
+
+    return {
+        "emi": emi,
+        "debt_to_income_ratio": dti_ratio * 100,
+        "can_afford": (dti_ratio < 0.5) & (max_affordable_emi > 0),
+        "max_loan_amount": max_amount
+    }
+
+
+def amortization_schedule(principal, annual_rate, tenure_years):
+    """
+    Month-by-month schedule of one loan as arrays (month, payment, principal, interest, balance),
+    computed in closed form rather than by iterating over the balance. The tenure is rounded to
+    whole months, which the EMI is computed over.
+    """
+    months = int(round(tenure_years * 12))
+    if months < 1:
+        raise ValueError("tenure must be at least one month")
+    emi = float(monthly_emi(principal, annual_rate, months / 12))
+    r = annual_rate / (12 * 100)
+    month = np.arange(1, months + 1)
+
+    if r > 0:
+        growth = (1 + r) ** month
+        balance = principal * growth - emi * (growth - 1) / r
+    else:
+        balance = principal - emi * month
+    balance[-1] = 0.0  # Absorb floating point residue in the final payment
+    opening_balance = np.concatenate(([principal], balance[:-1]))
+    interest = opening_balance * r
+    principal_paid = opening_balance - balance
+
+    return {
+        "month": month,
+        "payment": interest + principal_paid,
+        "principal": principal_paid,
+        "interest": interest,
+        "balance": balance
+    }
@@ -1,169 +1,514 @@
-import json
-import os
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+from timeseries import HistoryLog, TimeSeriesStore, merge_history_section, parse_point
+from transactions import SpendingAggregator
+from snapshot import SnapshotManager, changed_sections
+from instrumentation import stage
+
+# The NumPy-backed modules (projection, monte_carlo, loan_math, debt_payoff, holdings) are imported
+# inside the methods that use them, so NumPy stays off the startup path
+
+
+class UnknownUserError(LookupError):
+    """A user_id that is neither the data file's user nor in the store"""
+
 
 class MCPDataService:
     """Service to interact with Fi Money's MCP data"""
     
-    def __init__(self, data_file_path='mcp_data.json'):
-        """Initialize the MCP Data Service with the path to the data file"""
+    # History series: name -> (section, path to the history list, value field)
+    HISTORY_SERIES = {
+        "net_worth": ("net_worth", ("net_worth", "history"), "net_worth"),
+        "credit_score": ("credit_score", ("credit_score", "history"), "score")
+    }
+    
+    def __init__(self, data_file_path='mcp_data.json', store=None, aggregate_cache_size=100000,
+                 history_log_path=None, history_poll_interval=1.0, benchmark_data_path=None,
+                 fund_nav_path=None):
+        """
+        Initialize the MCP Data Service with the path to the data file.
+        The file provides the default user; an optional MCPDataStore serves every other user_id.
+        History points appended for store users are written to the store; for the data file's user,
+        which has no store, they are logged to history_log_path, if given, so they survive restarts
+        and reach every process sharing the log, which is checked for other processes' points at
+        most every history_poll_interval seconds.
+        Mutual funds are compared against the index series in benchmark_data_path, and the NAV
+        series in fund_nav_path, when configured; otherwise against static category averages.
+        """
         self.data_file_path = data_file_path
-        self.data = self._load_data()
-    
-    def _load_data(self):
-        """Load data from the JSON file"""
-        try:
-            with open(self.data_file_path, 'r') as file:
-                return json.load(file)
-        except Exception as e:
-            print(f"Error loading MCP data: {str(e)}")
-            return {}
-    
-    def get_user_info(self):
+        self.store = store
+        self.benchmark_data_path = benchmark_data_path
+        self.fund_nav_path = fund_nav_path
+        self._benchmark_registry = None
+        self._benchmark_lock = threading.Lock()
+        
+        # Data versioning: a global counter, and the counter value at each section's last change
+        self._version = 0
+        self._section_versions = {}
+        
+        # Derived aggregates: (user key, name) -> (data version they were computed at, value), in LRU order
+        self._aggregates = OrderedDict()
+        self.aggregate_cache_size = aggregate_cache_size
+        self._aggregate_lock = threading.Lock()
+        self.aggregate_hits = 0
+        self.aggregate_misses = 0
+        
+        # Net worth and credit score histories as incrementally maintained time series, and the
+        # points appended for the data file's user, merged into every snapshot of the file
+        self.timeseries = TimeSeriesStore()
+        self.history_log = HistoryLog(history_log_path)
+        self._history_lock = threading.Lock()
+        self.history_poll_interval = history_poll_interval
+        self._next_history_poll = 0.0
+        
+        # The data file as an immutable snapshot, replaced whole when the file or a section changes
+        self.snapshots = SnapshotManager(data_file_path, on_change=self._on_snapshot_change,
+                                         prepare=self._with_logged_history)
+    
+    @property
+    def data(self):
+        """The default user's MCP document, from the current snapshot"""
+        return self.snapshots.current.data
+    
+    def get_snapshot(self):
+        """Get the current snapshot of the data file, including its pre-serialized JSON"""
+        return self.snapshots.current
+    
+    def watch_data_file(self, interval=2.0):
+        """Reload the data file in the background whenever it changes"""
+        self.snapshots.watch(interval)
+    
+    def _on_snapshot_change(self, old, new):
+        """Invalidate caches of the default user's sections that changed in a new snapshot"""
+        sections = changed_sections(old, new)
+        if sections:
+            self.invalidate(sections)
+    
+    def _with_logged_history(self, data):
+        """The data file's document with every logged history point merged in"""
+        # Runs under the snapshot lock, so it must not take _history_lock (held around snapshot swaps)
+        self.history_log.read_new()
+        data = dict(data)
+        for name, points in self.history_log.get_points().items():
+            section, path, field = self.HISTORY_SERIES.get(name, (None, None, None))
+            if section in data:
+                data[section] = merge_history_section(data[section], field, points, key=path[-1])
+        return data
+    
+    def _sync_history_log(self, force=False):
+        """
+        Merge the history points logged since the last read (by this or another process) into the
+        data file's user's snapshot, which invalidates the caches of their sections. Only the new
+        points are merged, and series already built are extended in place rather than rebuilt;
+        the snapshot's JSON body is serialized when next served. Unless forced, the log is read at
+        most once per history_poll_interval, the way the data file itself is polled.
+        """
+        if not force and time.monotonic() < self._next_history_poll:
+            return
+        with self._history_lock:
+            self._next_history_poll = time.monotonic() + self.history_poll_interval
+            points = self.history_log.read_new()
+            for name in dict.fromkeys(point[0] for point in points if point[0] in self.HISTORY_SERIES):
+                section, path, field = self.HISTORY_SERIES[name]
+                new_points = {day: value for series, day, value in points if series == name}
+                from_version = self._data_version([section], None)
+                self.snapshots.update_section(
+                    section, lambda current: merge_history_section(current, field, new_points, key=path[-1]))
+                self.timeseries.extend(None, name, [(day, value) for series, day, value in points if series == name],
+                                       from_version, self._data_version([section], None))
+    
+    def has_user(self, user_id):
+        """Check whether user_id is the data file's user or a user in the store (None is the default user)"""
+        if user_id is None or user_id == self.data.get('user', {}).get('id'):
+            return True
+        return self.store is not None and self.store.has_user(user_id)
+    
+    def _uses_store(self, user_id):
+        """Check whether a user's data should be read from the multi-user store"""
+        if user_id is None or user_id == self.data.get('user', {}).get('id'):
+            return False
+        if self.store is None:
+            # Never answer with the default user's data for someone else
+            raise UnknownUserError(f"Unknown user: {user_id}")
+        return True
+    
+    def _get(self, user_id, *path, default=None):
+        """Get the value at path (e.g. 'accounts', 'bank_accounts') for the given user"""
+        if self._uses_store(user_id):
+            return self.store.get_section(user_id, *path, default=default)
+        
+        self._sync_history_log()
+        node = self.data
+        for key in path[:-1]:
+            node = node.get(key, {})
+        return node.get(path[-1], default)
+    
+    def user_key(self, user_id):
+        """
+        Normalize user_id for keying caches of a user's data, so the default user (None or the data
+        file's user id) has a single key. Raises UnknownUserError like the getters.
+        """
+        return user_id if self._uses_store(user_id) else None
+    
+    def get_data_version(self, sections=None, user_id=None):
+        """
+        Get a version that changes whenever any of the given top-level sections (all sections
+        if None) change for the user: a (store revision, section version) pair, compared with ==.
+        The store revision moves with every write to a store user, from any process; the section
+        version with changes made in this one, including history points logged by any process.
+        """
+        user_key = self.user_key(user_id)
+        if user_key is None:
+            self._sync_history_log()
+        return self._data_version(sections, user_key)
+    
+    def _data_version(self, sections, user_key):
+        """get_data_version for a normalized user key, without picking up logged history points"""
+        revision = self.store.get_revision(user_key) if user_key is not None else 0
+        if sections is None:
+            version = max([version for (key, _), version in self._section_versions.items() if key == user_key],
+                          default=0)
+        else:
+            version = max([self._section_versions.get((user_key, section), 0) for section in sections], default=0)
+        return revision, version
+    
+    def invalidate(self, sections=None, user_id=None):
+        """Mark sections (all sections if None) as changed so dependent caches recompute"""
+        user_key = self.user_key(user_id)
+        if sections is None:
+            sections = set(self.get_all_data(user_id)) | {
+                section for key, section in self._section_versions if key == user_key
+            }
+        with self._aggregate_lock:
+            self._version += 1
+            for section in sections:
+                self._section_versions[(user_key, section)] = self._version
+    
+    def update_section(self, section, value, user_id=None):
+        """
+        Replace a top-level section of a user's data and invalidate what depends on it. Store users
+        are written to the store; the data file's user only gets a new in-memory snapshot, which is
+        not written to the file, is per process, and is replaced when the file is next reloaded.
+        """
+        if self._uses_store(user_id):
+            document = dict(self.store.get_document(user_id))
+            document[section] = value
+            self.store.put_user(document)
+        else:
+            self.snapshots.replace_section(section, value)
+        self.invalidate([section], user_id)
+    
+    def _aggregate(self, user_id, name, section, compute):
+        """
+        Return a derived value, recomputing it only when its section's version
+        (or, for a list of sections, any of their versions) has changed
+        """
+        key = (self.user_key(user_id), name)
+        version = self.get_data_version([section] if isinstance(section, str) else section, user_id)
+        with self._aggregate_lock:
+            cached = self._aggregates.get(key)
+            if cached is not None and cached[0] == version:
+                self._aggregates.move_to_end(key)
+                self.aggregate_hits += 1
+                return cached[1]
+        
+        with stage("data_aggregate"):
+            value = compute()
+        with self._aggregate_lock:
+            self.aggregate_misses += 1
+            self._aggregates[key] = (version, value)
+            self._aggregates.move_to_end(key)
+            while len(self._aggregates) > self.aggregate_cache_size:
+                self._aggregates.popitem(last=False)
+        return value
+    
+    def get_aggregate_stats(self):
+        """Get hit/miss counters of the aggregate cache"""
+        total = self.aggregate_hits + self.aggregate_misses
+        return {
+            "hits": self.aggregate_hits,
+            "misses": self.aggregate_misses,
+            "hit_rate": self.aggregate_hits / total if total else 0.0,
+            "entries": len(self._aggregates)
+        }
+    
+    def get_all_data(self, user_id=None):
+        """Get the complete MCP document for a user"""
+        if self._uses_store(user_id):
+            return self.store.get_document(user_id)
+        self._sync_history_log()
+        return self.data
+    
+    def get_user_info(self, user_id=None):
         """Get basic user information"""
-        return self.data.get('user', {})
+        return self._get(user_id, 'user', default={})
     
-    def get_bank_accounts(self):
+    def get_bank_accounts(self, user_id=None):
         """Get all bank accounts"""
-        return self.data.get('accounts', {}).get('bank_accounts', [])
+        return self._get(user_id, 'accounts', 'bank_accounts', default=[])
     
-    def get_total_bank_balance(self):
+    def get_total_bank_balance(self, user_id=None):
         """Get total balance across all bank accounts"""
-        accounts = self.get_bank_accounts()
-        return sum(account.get('balance', 0) for account in accounts)
+        return self._aggregate(user_id, 'bank_balance', 'accounts', lambda: sum(
+            account.get('balance', 0) for account in self.get_bank_accounts(user_id)
+        ))
     
-    def get_credit_cards(self):
+    def get_credit_cards(self, user_id=None):
         """Get all credit cards"""
-        return self.data.get('accounts', {}).get('credit_cards', [])
+        return self._get(user_id, 'accounts', 'credit_cards', default=[])
     
-    def get_total_credit_card_debt(self):
+    def get_total_credit_card_debt(self, user_id=None):
         """Get total outstanding balance across all credit cards"""
-        credit_cards = self.get_credit_cards()
-        return sum(card.get('outstanding_balance', 0) for card in credit_cards)
+        return self._aggregate(user_id, 'credit_card_debt', 'accounts', lambda: sum(
+            card.get('outstanding_balance', 0) for card in self.get_credit_cards(user_id)
+        ))
     
-    def get_investments(self):
+    def get_investments(self, user_id=None):
         """Get all investments"""
-        return self.data.get('investments', {})
+        return self._get(user_id, 'investments', default={})
     
-    def get_mutual_funds(self):
+    def get_mutual_funds(self, user_id=None):
         """Get all mutual funds"""
-        return self.data.get('investments', {}).get('mutual_funds', [])
+        return self._get(user_id, 'investments', 'mutual_funds', default=[])
     
-    def get_stocks(self):
+    def get_stocks(self, user_id=None):
         """Get all stocks"""
-        return self.data.get('investments', {}).get('stocks', [])
+        return self._get(user_id, 'investments', 'stocks', default=[])
     
-    def get_total_mutual_fund_value(self):
+    def get_total_mutual_fund_value(self, user_id=None):
         """Get total current value of all mutual funds"""
-        mutual_funds = self.get_mutual_funds()
-        return sum(fund.get('current_value', 0) for fund in mutual_funds)
+        return self._aggregate(user_id, 'mutual_fund_value', 'investments', lambda: sum(
+            fund.get('current_value', 0) for fund in self.get_mutual_funds(user_id)
+        ))
     
-    def get_total_stock_value(self):
+    def get_total_stock_value(self, user_id=None):
         """Get total current value of all stocks"""
-        stocks = self.get_stocks()
-        return sum(stock.get('current_value', 0) for stock in stocks)
+        return self._aggregate(user_id, 'stock_value', 'investments', lambda: sum(
+            stock.get('current_value', 0) for stock in self.get_stocks(user_id)
+        ))
     
-    def get_retirement_accounts(self):
+    def get_total_fixed_deposit_value(self, user_id=None):
+        """Get total current value of all fixed deposits"""
+        return self._aggregate(user_id, 'fixed_deposit_value', 'investments', lambda: sum(
+            fd.get('current_value', 0) for fd in self.get_investments(user_id).get('fixed_deposits', [])
+        ))
+    
+    def get_retirement_accounts(self, user_id=None):
         """Get all retirement accounts (EPF and PPF)"""
-        investments = self.data.get('investments', {})
+        investments = self.get_investments(user_id)
         return {
             'epf': investments.get('epf', {}),
             'ppf': investments.get('ppf', {})
         }
     
-    def get_loans(self):
+    def get_loans(self, user_id=None):
         """Get all loans"""
-        return self.data.get('loans', {})
+        return self._get(user_id, 'loans', default={})
     
-    def get_total_loan_outstanding(self):
+    def get_total_loan_outstanding(self, user_id=None):
         """Get total outstanding loan amount"""
-        loans = self.get_loans()
-        total = 0
-        for loan_type, loan_data in loans.items():
-            total += loan_data.get('outstanding_amount', 0)
-        return total
+        return self._aggregate(user_id, 'loan_outstanding', 'loans', lambda: sum(
+            loan_data.get('outstanding_amount', 0) for loan_data in self.get_loans(user_id).values()
+        ))
+    
+    def get_total_loan_emi(self, user_id=None):
+        """Get total monthly EMI across all loans"""
+        return self._aggregate(user_id, 'loan_emi', 'loans', lambda: sum(
+            loan_data.get('emi', 0) for loan_data in self.get_loans(user_id).values()
+        ))
     
-    def get_credit_score(self):
+    def get_credit_score(self, user_id=None):
         """Get credit score information"""
-        return self.data.get('credit_score', {})
+        return self._get(user_id, 'credit_score', default={})
     
-    def get_insurance_policies(self):
+    def get_insurance_policies(self, user_id=None):
         """Get all insurance policies"""
-        return self.data.get('insurance', {})
+        return self._get(user_id, 'insurance', default={})
     
-    def get_spending_summary(self):
+    def ingest_transactions(self, transactions, user_id=None):
+        """
+        Fold a stream of transactions (e.g. transactions.read_feed(...)) into the user's spending
+        section: its summaries are the starting totals of their month and fiscal year, a newer month
+        or year in progress is kept as current_month/current_year. Returns the count.
+        The feed is aggregated on its own first, then merged into the section in one step: for store
+        users inside a store write transaction that touches only the spending section, so
+        concurrent ingests and history appends from any process are never lost; for the data file's
+        user into a new in-memory snapshot, which is not written to the file.
+        Ingestion is all-or-nothing: a malformed transaction raises before anything is written, so
+        the whole feed can be retried. Credit card transactions are counted when they arrive in a
+        feed; the excerpts embedded in the cards' sections are not folded in, so that no transaction
+        is counted twice.
+        """
+        feed = SpendingAggregator()
+        count = feed.ingest(transactions)
+        if not count:
+            return 0
+        
+        def merge(spending):
+            aggregator = SpendingAggregator.from_spending(spending)
+            aggregator.merge(feed)
+            recent_limit = max(len(spending.get('recent_transactions', [])), 5)
+            return aggregator.spending_section(spending, recent_limit)
+        
+        if self._uses_store(user_id):
+            self.store.update_spending(user_id, merge)
+            self.invalidate(['spending'], user_id)
+        else:
+            # Swapping the snapshot invalidates the section's caches
+            self.snapshots.update_section('spending', lambda spending: merge(spending or {}))
+        return count
+    
+    def get_spending_summary(self, user_id=None):
         """Get spending summary information"""
-        return self.data.get('spending', {})
+        return self._get(user_id, 'spending', default={})
     
-    def get_monthly_spending(self):
+    def get_monthly_spending(self, user_id=None):
         """Get monthly spending breakdown"""
-        return self.data.get('spending', {}).get('monthly_summary', {})
+        return self._get(user_id, 'spending', 'monthly_summary', default={})
     
-    def get_yearly_spending(self):
+    def get_yearly_spending(self, user_id=None):
         """Get yearly spending breakdown"""
-        return self.data.get('spending', {}).get('yearly_summary', {})
+        return self._get(user_id, 'spending', 'yearly_summary', default={})
     
-    def get_recent_transactions(self):
+    def get_recent_transactions(self, user_id=None):
         """Get recent transactions"""
-        return self.data.get('spending', {}).get('recent_transactions', [])
+        return self._get(user_id, 'spending', 'recent_transactions', default=[])
     
-    def get_financial_goals(self):
+    def get_financial_goals(self, user_id=None):
         """Get financial goals"""
-        return self.data.get('financial_goals', [])
+        return self._get(user_id, 'financial_goals', default=[])
     
-    def get_net_worth(self):
+    def get_net_worth(self, user_id=None):
         """Get net worth information"""
-        return self.data.get('net_worth', {})
+        return self._get(user_id, 'net_worth', default={})
+    
+    def get_net_worth_history(self, user_id=None):
+        """Get net worth history, newest first as in the MCP data, including appended points"""
+        return self.get_history_range('net_worth', user_id=user_id)[::-1]
     
-    def get_net_worth_history(self):
-        """Get net worth history"""
-        return self.data.get('net_worth', {}).get('history', [])
+    def get_history_series(self, name, user_id=None):
+        """Get a history ("net_worth" or "credit_score") as a TimeSeries, oldest first"""
+        section, path, field = self.HISTORY_SERIES[name]
+        return self.timeseries.get(
+            self.user_key(user_id), name, self.get_data_version([section], user_id),
+            lambda: [(entry["date"], entry[field]) for entry in self._get(user_id, *path, default=[])]
+        )
+    
+    def get_history_range(self, name, start=None, end=None, period=None, user_id=None):
+        """
+        Get history points between start and end (ISO dates, inclusive) oldest first,
+        optionally downsampled to the last point of each month or year
+        """
+        field = self.HISTORY_SERIES[name][2]
+        series = self.get_history_series(name, user_id)
+        points = series.downsample(start, end, period) if period else series.range(start, end)
+        return [{"date": day, field: value} for day, value in points]
+    
+    def get_history_metrics(self, name, start=None, end=None, user_id=None):
+        """Get change and trend metrics of a history, over its whole length or a date range"""
+        return self.get_history_series(name, user_id).metrics(start, end)
+    
+    def append_history_point(self, name, day, value, user_id=None):
+        """
+        Record a new history point (e.g. today's net worth snapshot), raising ValueError for a bad
+        date or value. It is written to the store for store users and to the history log for the
+        data file's user, so the section's data and everything cached from it change with it; the
+        series is updated in place rather than rebuilt. A point later than the rest of the history
+        also becomes the section's current value (e.g. net_worth.net_worth).
+        """
+        section, _, field = self.HISTORY_SERIES[name]
+        day, value = parse_point(day, value)
+        if self._uses_store(user_id):
+            from_version = self.get_data_version([section], user_id)
+            revision = self.store.put_history_point(user_id, section, field, day, value)
+            # Only if no other write landed in between is the series one point behind
+            if revision == from_version[0] + 1:
+                self.timeseries.extend(user_id, name, [(day, value)], from_version, (revision, from_version[1]))
+        else:
+            self.history_log.append(name, day, value)
+            self._sync_history_log(force=True)
     
-    def get_recommendations(self):
+    def get_recommendations(self, user_id=None):
         """Get financial recommendations"""
-        return self.data.get('recommendations', [])
+        return self._get(user_id, 'recommendations', default=[])
     
-    def get_projected_net_worth(self, years):
+    def get_projected_net_worth(self, years, user_id=None):
         """
         Estimate projected net worth after specified number of years
         based on current saving and spending patterns
         """
-        current_net_worth = self.data.get('net_worth', {}).get('net_worth', 0)
-        monthly_savings = self.data.get('spending', {}).get('monthly_summary', {}).get('savings', 0)
-        yearly_savings = monthly_savings * 12
+        from projection import project_net_worth
+        
+        current_net_worth = self.get_net_worth(user_id).get('net_worth', 0)
+        monthly_savings = self.get_monthly_spending(user_id).get('savings', 0)
         
         # Simple projection assuming a 8% annual return on investments
-        annual_return_rate = 0.08
-        projected_net_worth = current_net_worth
+        trajectory = project_net_worth(current_net_worth, monthly_savings * 12, 1.0, years, return_rate=0.08)
+        return float(trajectory[-1])
+    
+    def get_net_worth_projections(self, years, return_rates=(0.08,), savings_rates=None, salary_growth=(0.0,),
+                                  inflation=(0.0,), user_id=None):
+        """
+        Project year-by-year net worth for every combination of annual return rate, savings rate
+        (fraction of income; the current rate by default), salary growth and inflation
+        """
+        from projection import project_net_worth, scenario_grid, summarize_final
+        
+        monthly = self.get_monthly_spending(user_id)
+        monthly_income = monthly.get('total_income', 0)
+        if savings_rates is None:
+            savings_rates = (monthly.get('savings', 0) / monthly_income if monthly_income else 0.0,)
         
-        for _ in range(years):
-            # Add yearly savings
-            projected_net_worth += yearly_savings
-            
-            # Apply investment returns (assuming positive net worth)
-            if projected_net_worth > 0:
-                projected_net_worth += projected_net_worth * annual_return_rate
+        grid = scenario_grid(return_rate=return_rates, savings_rate=savings_rates,
+                             salary_growth=salary_growth, inflation=inflation)
+        trajectories = project_net_worth(
+            self.get_net_worth(user_id).get('net_worth', 0), monthly_income * 12, grid["savings_rate"], years,
+            return_rate=grid["return_rate"], salary_growth=grid["salary_growth"], inflation=grid["inflation"]
+        )
+        
+        return {
+            "years": list(range(years + 1)),
+            "scenarios": [
+                dict({name: float(values[index]) for name, values in grid.items()},
+                     trajectory=trajectories[index].round(2).tolist())
+                for index in range(len(trajectories))
+            ],
+            "final": summarize_final(trajectories)
+        }
+    
+    def get_goal_success_probabilities(self, paths=20000, seed=0, workers=None, user_id=None):
+        """
+        Estimate each financial goal's chance of being met with a Monte Carlo simulation of
+        its savings under the current investment allocation, with percentile bands per year
+        """
+        from monte_carlo import allocation_from_investments, simulate_goals
         
-        return projected_net_worth
+        # Cached per data version and day, since months to each target date change daily
+        today = date.today()
+        return self._aggregate(
+            user_id, f'goal_success:{paths}:{seed}:{today.isoformat()}', ['financial_goals', 'investments'],
+            lambda: simulate_goals(self.get_financial_goals(user_id),
+                                   allocation_from_investments(self.get_investments(user_id)),
+                                   paths=paths, seed=seed, as_of=today, workers=workers)
+        )
     
-    def can_afford_loan(self, loan_amount, interest_rate, tenure_years):
+    def can_afford_loan(self, loan_amount, interest_rate, tenure_years, user_id=None):
         """
         Determine if user can afford a new loan based on income and existing obligations
         Returns a tuple of (can_afford, max_affordable_emi, recommended_emi)
         """
         # Get monthly income
-        monthly_income = self.data.get('spending', {}).get('monthly_summary', {}).get('total_income', 0)
+        monthly_income = self.get_monthly_spending(user_id).get('total_income', 0)
         
-        # Calculate EMI for the requested loan
-        r = interest_rate / (12 * 100)  # Monthly interest rate
-        n = tenure_years * 12  # Total number of months
-        emi = (loan_amount * r * ((1 + r) ** n)) / (((1 + r) ** n) - 1)
+        # Calculate EMI for the requested loan, over the tenure rounded to whole months as in the grid
+        from loan_math import monthly_emi
+        emi = float(monthly_emi(loan_amount, interest_rate, round(tenure_years * 12) / 12))
         
         # Get existing EMIs
-        existing_emi = 0
-        loans = self.get_loans()
-        for loan_type, loan_data in loans.items():
-            existing_emi += loan_data.get('emi', 0)
+        existing_emi = self.get_total_loan_emi(user_id)
         
         # Calculate total debt burden
         total_emi = existing_emi + emi
@@ -190,50 +535,103 @@ class MCPDataService:
             "monthly_income": round(monthly_income, 2)
         }
     
-    def analyze_mutual_fund_performance(self):
+    def get_loan_affordability_grid(self, amounts, interest_rates, tenures, user_id=None):
         """
-        Analyze mutual fund performance compared to market benchmarks
-        Returns a list of underperforming and overperforming funds
+        Evaluate can_afford_loan for every combination of loan amount, interest rate (percent)
+        and tenure (years) in one vectorized pass, e.g. for an affordability heatmap
         """
-        mutual_funds = self.get_mutual_funds()
+        from loan_math import affordability_grid
+        
+        monthly_income = self.get_monthly_spending(user_id).get('total_income', 0)
+        existing_emi = self.get_total_loan_emi(user_id)
+        grid = affordability_grid(amounts, interest_rates, tenures, monthly_income, existing_emi)
         
-        # Define benchmark returns for different categories
-        benchmarks = {
-            "Equity - Large Cap": 12.0,  # Nifty 50 average annual return
-            "Equity - Mid Cap": 14.0,    # Nifty Midcap 100 average annual return
-            "Debt - Corporate Bond": 7.0  # Corporate Bond index average annual return
+        return {
+            "amounts": list(amounts),
+            "interest_rates": list(interest_rates),
+            "tenures": list(tenures),
+            # Indexed [amount][interest_rate][tenure]
+            "emi": grid["emi"].round(2).tolist(),
+            "debt_to_income_ratio": grid["debt_to_income_ratio"].round(2).tolist(),
+            "can_afford": grid["can_afford"].tolist(),
+            # Indexed [interest_rate][tenure]
+            "max_loan_amount": grid["max_loan_amount"].round(2).tolist(),
+            "max_affordable_emi": round(monthly_income * 0.5 - existing_emi, 2),
+            "existing_emi": round(existing_emi, 2),
+            "monthly_income": round(monthly_income, 2)
         }
+    
+    def get_amortization_schedule(self, loan_amount, interest_rate, tenure_years):
+        """Get the month-by-month principal/interest split of a loan"""
+        from loan_math import amortization_schedule
         
-        underperforming = []
-        outperforming = []
-        
-        for fund in mutual_funds:
-            category = fund.get("category", "")
-            benchmark_return = benchmarks.get(category, 10.0)  # Default to 10% if category not found
-            
-            # Compare 1-year returns to benchmark
-            fund_1y_return = fund.get("returns", {}).get("1y", 0)
-            
-            # Calculate performance difference
-            diff = fund_1y_return - benchmark_return
-            
-            fund_analysis = {
-                "name": fund.get("name", ""),
-                "category": category,
-                "fund_return_1y": fund_1y_return,
-                "benchmark_return": benchmark_return,
-                "difference": round(diff, 2)
+        schedule = amortization_schedule(loan_amount, interest_rate, tenure_years)
+        return dict(
+            {name: values.round(2).tolist() for name, values in schedule.items() if name != "month"},
+            month=schedule["month"].tolist(),
+            total_interest=round(float(schedule["interest"].sum()), 2)
+        )
+    
+    def get_debt_payoff_plan(self, extra_payments=(0,), custom_orders=None, user_id=None):
+        """
+        Simulate paying off every loan and credit card with interest under the minimum-payment,
+        avalanche, snowball and any custom strategies, for each extra monthly payment
+        """
+        from debt_payoff import compare_strategies, debts_from_data
+        
+        today = date.today()
+        name = f'debt_payoff:{tuple(extra_payments)}:{custom_orders}:{today.isoformat()}'
+        return self._aggregate(user_id, name, ['loans', 'accounts'], lambda: compare_strategies(
+            debts_from_data(self.get_loans(user_id), self.get_credit_cards(user_id)),
+            extra_payments=extra_payments, custom_orders=custom_orders, as_of=today
+        ))
+    
+    def get_benchmark_registry(self):
+        """Get the benchmark registry, loading its data files on first use"""
+        with self._benchmark_lock:
+            if self._benchmark_registry is None:
+                from benchmark_registry import BenchmarkRegistry
+                self._benchmark_registry = BenchmarkRegistry(self.benchmark_data_path, self.fund_nav_path)
+            return self._benchmark_registry
+    
+    def get_holdings(self, user_id=None):
+        """Get every investment holding as one columnar Holdings array, built once per data version"""
+        from holdings import Holdings
+        
+        def build():
+            investments = self.get_investments(user_id)
+            registry = self.get_benchmark_registry()
+            benchmarks = {fund.get('category', ''): registry.category_return(fund.get('category', ''))
+                          for fund in investments.get('mutual_funds', [])}
+            return Holdings.from_investments(investments, benchmarks)
+        
+        return self._aggregate(user_id, 'holdings', 'investments', build)
+    
+    def get_portfolio_analytics(self, user_id=None):
+        """
+        Get allocation, weighted return, best/worst asset, benchmark comparison and
+        concentration of the whole portfolio
+        """
+        return self._aggregate(user_id, 'portfolio_analytics', 'investments',
+                               lambda: self.get_holdings(user_id).summary())
+    
+    def analyze_mutual_fund_performance(self, user_id=None):
+        """
+        Analyze mutual fund performance compared to market benchmarks
+        Returns a list of underperforming and overperforming funds, and every fund's
+        1y/3y/5y comparison with tracking error, beta and alpha
+        """
+        def compare():
+            funds = self.get_benchmark_registry().compare_funds(self.get_mutual_funds(user_id))
+            compared = [fund for fund in funds if fund["difference"] is not None]
+            return {
+                # Trailing the benchmark's 1-year return by more than 1%, or beating it by more than 1%
+                "underperforming": [fund for fund in compared if fund["difference"] < -1.0],
+                "outperforming": [fund for fund in compared if fund["difference"] > 1.0],
+                "funds": funds
             }
-            
-            if diff < -1.0:  # Underperforming by more than 1%
-                underperforming.append(fund_analysis)
-            elif diff > 1.0:  # Outperforming by more than 1%
-                outperforming.append(fund_analysis)
         
-        return {
-            "underperforming": underperforming,
-            "outperforming": outperforming
-        }
+        return self._aggregate(user_id, 'fund_benchmarks', 'investments', compare)
 
 
 # Example usage
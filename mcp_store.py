@@ -0,0 +1,334 @@
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from timeseries import merge_history_section
+
+
+class MCPDataStore:
+    """SQLite-backed store holding MCP data for many users, keyed by user.id"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id TEXT PRIMARY KEY,
+            profile TEXT NOT NULL,
+            revision INTEGER NOT NULL DEFAULT 1
+        );
+        CREATE TABLE IF NOT EXISTS sections (
+            user_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            PRIMARY KEY (user_id, name)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS accounts (
+            user_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            account_id TEXT,
+            payload TEXT NOT NULL,
+            PRIMARY KEY (user_id, kind, position)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_accounts_id ON accounts (user_id, account_id);
+        CREATE TABLE IF NOT EXISTS transactions (
+            user_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            date TEXT,
+            category TEXT,
+            payload TEXT NOT NULL,
+            PRIMARY KEY (user_id, position)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (user_id, date);
+        CREATE TABLE IF NOT EXISTS net_worth_history (
+            user_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            net_worth REAL NOT NULL,
+            PRIMARY KEY (user_id, date)
+        ) WITHOUT ROWID;
+    """
+
+    # Nested lists that live in their own indexed tables instead of the section blobs
+    ACCOUNT_KINDS = ('bank_accounts', 'credit_cards')
+
+    def __init__(self, db_path='mcp_data.db', cache_size=1024):
+        """Open (or create) the store at db_path, caching up to cache_size decoded sections"""
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        conn = self._connection()
+        conn.executescript(self.SCHEMA)
+        # Stores created before users had a revision
+        if 'revision' not in [row[1] for row in conn.execute('PRAGMA table_info(users)')]:
+            with conn:
+                conn.execute('ALTER TABLE users ADD COLUMN revision INTEGER NOT NULL DEFAULT 1')
+
+    def _connection(self):
+        """Get the SQLite connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _cached(self, key, load):
+        """
+        Return a decoded value from the LRU cache, loading it on a miss. Keys include the user's
+        revision, so a write by any process or connection makes the old entries unreachable.
+        """
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = load()
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def _invalidate(self, user_id):
+        """Drop every cached entry belonging to a user, freeing them before LRU eviction would"""
+        with self._cache_lock:
+            for key in [key for key in self._cache if key[0] == user_id]:
+                del self._cache[key]
+
+    def put_user(self, document):
+        """Insert or replace one user's complete MCP document, incrementing the user's revision"""
+        user = document.get('user', {})
+        user_id = user.get('id')
+        if not user_id:
+            raise ValueError("MCP document has no user.id")
+
+        sections = {name: value for name, value in document.items() if name != 'user'}
+        accounts = dict(sections.pop('accounts', {}))
+        spending = dict(sections.get('spending', {}))
+        net_worth = dict(sections.get('net_worth', {}))
+        transactions = spending.pop('recent_transactions', [])
+        history = net_worth.pop('history', [])
+        if 'spending' in sections:
+            sections['spending'] = spending
+        if 'net_worth' in sections:
+            sections['net_worth'] = net_worth
+
+        conn = self._connection()
+        with conn:
+            # Take the write lock before reading the revision, so concurrent writers cannot both
+            # write the same revision
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT revision FROM users WHERE user_id = ?', (user_id,)).fetchone()
+            for table in ('users', 'sections', 'accounts', 'transactions', 'net_worth_history'):
+                conn.execute(f'DELETE FROM {table} WHERE user_id = ?', (user_id,))
+            conn.execute('INSERT INTO users (user_id, profile, revision) VALUES (?, ?, ?)',
+                         (user_id, json.dumps(user), row[0] + 1 if row else 1))
+            conn.executemany(
+                'INSERT INTO sections VALUES (?, ?, ?)',
+                [(user_id, name, json.dumps(value)) for name, value in sections.items()]
+            )
+            for kind in self.ACCOUNT_KINDS:
+                conn.executemany(
+                    'INSERT INTO accounts VALUES (?, ?, ?, ?, ?)',
+                    [(user_id, kind, position, account.get('id'), json.dumps(account))
+                     for position, account in enumerate(accounts.get(kind, []))]
+                )
+            conn.executemany(
+                'INSERT INTO transactions VALUES (?, ?, ?, ?, ?)',
+                [(user_id, position, txn.get('date'), txn.get('category'), json.dumps(txn))
+                 for position, txn in enumerate(transactions)]
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO net_worth_history VALUES (?, ?, ?)',
+                [(user_id, entry['date'], entry['net_worth']) for entry in history]
+            )
+        self._invalidate(user_id)
+        return user_id
+
+    def put_history_point(self, user_id, section, field, day, value):
+        """
+        Add (or replace) one dated point of a user's history, e.g. ('net_worth', 'net_worth',
+        '2025-08-08', -980000.0), incrementing the user's revision. Net worth goes to its indexed
+        table; other histories to the section's history list. The latest point also becomes the
+        section's current value (e.g. net_worth.net_worth). Returns the new revision.
+        """
+        conn = self._connection()
+        with conn:
+            # Take the write lock before reading, so concurrent writers cannot interleave
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT revision FROM users WHERE user_id = ?', (user_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"Unknown user: {user_id}")
+            payload = conn.execute(
+                'SELECT payload FROM sections WHERE user_id = ? AND name = ?', (user_id, section)
+            ).fetchone()
+            stored = json.loads(payload[0]) if payload else {}
+            if section == 'net_worth':
+                latest = conn.execute('SELECT MAX(date) FROM net_worth_history WHERE user_id = ?',
+                                      (user_id,)).fetchone()[0]
+                conn.execute('INSERT OR REPLACE INTO net_worth_history VALUES (?, ?, ?)', (user_id, day, value))
+                if latest is not None and day < latest:
+                    stored = None
+                else:
+                    stored[field] = value
+            else:
+                stored = merge_history_section(stored, field, {day: value})
+            if stored is not None:
+                conn.execute('INSERT OR REPLACE INTO sections VALUES (?, ?, ?)',
+                             (user_id, section, json.dumps(stored)))
+            conn.execute('UPDATE users SET revision = ? WHERE user_id = ?', (row[0] + 1, user_id))
+        self._invalidate(user_id)
+        return row[0] + 1
+
+    def update_spending(self, user_id, update):
+        """
+        Replace a user's spending section (with its recent transactions) by update(current section),
+        reading and writing it in one write transaction, so writers from any process are serialized
+        and nothing else of the user's is rewritten. Returns the new revision.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT revision FROM users WHERE user_id = ?', (user_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"Unknown user: {user_id}")
+            spending = self._load_section(user_id, 'spending') or {}
+            spending = dict(update(dict(spending, recent_transactions=self._load_transactions(user_id))))
+            transactions = spending.pop('recent_transactions', [])
+            conn.execute('INSERT OR REPLACE INTO sections VALUES (?, ?, ?)',
+                         (user_id, 'spending', json.dumps(spending)))
+            conn.execute('DELETE FROM transactions WHERE user_id = ?', (user_id,))
+            conn.executemany(
+                'INSERT INTO transactions VALUES (?, ?, ?, ?, ?)',
+                [(user_id, position, txn.get('date'), txn.get('category'), json.dumps(txn))
+                 for position, txn in enumerate(transactions)]
+            )
+            conn.execute('UPDATE users SET revision = ? WHERE user_id = ?', (row[0] + 1, user_id))
+        self._invalidate(user_id)
+        return row[0] + 1
+
+    def import_file(self, path):
+        """Load a single-user MCP JSON file into the store"""
+        with open(path, 'r') as file:
+            return self.put_user(json.load(file))
+
+    def has_user(self, user_id):
+        """Check whether a user exists in the store"""
+        row = self._connection().execute(
+            'SELECT 1 FROM users WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        return row is not None
+
+    def get_revision(self, user_id):
+        """
+        Get a user's revision, which every put_user (from any process) increments, or None for an
+        unknown user
+        """
+        row = self._connection().execute(
+            'SELECT revision FROM users WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def list_user_ids(self):
+        """Get the ids of all stored users"""
+        rows = self._connection().execute('SELECT user_id FROM users ORDER BY user_id')
+        return [row[0] for row in rows]
+
+    def _load_profile(self, user_id):
+        row = self._connection().execute(
+            'SELECT profile FROM users WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _load_section(self, user_id, name):
+        row = self._connection().execute(
+            'SELECT payload FROM sections WHERE user_id = ? AND name = ?', (user_id, name)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _load_accounts(self, user_id, kind):
+        rows = self._connection().execute(
+            'SELECT payload FROM accounts WHERE user_id = ? AND kind = ? ORDER BY position',
+            (user_id, kind)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def _load_transactions(self, user_id):
+        rows = self._connection().execute(
+            'SELECT payload FROM transactions WHERE user_id = ? ORDER BY position', (user_id,)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def _load_net_worth_history(self, user_id):
+        rows = self._connection().execute(
+            'SELECT date, net_worth FROM net_worth_history WHERE user_id = ? ORDER BY date DESC',
+            (user_id,)
+        )
+        return [{'date': date, 'net_worth': value} for date, value in rows]
+
+    def _top_level(self, user_id, name, revision):
+        """Get a top-level section, re-attaching the lists kept in their own tables"""
+        if name == 'user':
+            return self._cached((user_id, revision, 'user'), lambda: self._load_profile(user_id))
+        if name == 'accounts':
+            return {kind: self._nested(user_id, name, kind, revision) for kind in self.ACCOUNT_KINDS}
+
+        section = self._cached((user_id, revision, name), lambda: self._load_section(user_id, name))
+        if section is None:
+            return None
+        if name == 'spending':
+            section = dict(section, recent_transactions=self._nested(user_id, name, 'recent_transactions', revision))
+        elif name == 'net_worth':
+            section = dict(section, history=self._nested(user_id, name, 'history', revision))
+        return section
+
+    def _nested(self, user_id, name, key, revision):
+        """Get one of the lists stored in an indexed table"""
+        if name == 'accounts' and key in self.ACCOUNT_KINDS:
+            return self._cached((user_id, revision, name, key), lambda: self._load_accounts(user_id, key))
+        if name == 'spending' and key == 'recent_transactions':
+            return self._cached((user_id, revision, name, key), lambda: self._load_transactions(user_id))
+        if name == 'net_worth' and key == 'history':
+            return self._cached((user_id, revision, name, key), lambda: self._load_net_worth_history(user_id))
+        return None
+
+    def get_section(self, user_id, *path, default=None):
+        """Get the value at path (e.g. 'accounts', 'bank_accounts') for a user"""
+        revision = self.get_revision(user_id)
+        if revision is None:
+            return default
+        if len(path) == 2:
+            value = self._nested(user_id, *path, revision)
+            if value is not None:
+                return value
+
+        node = self._top_level(user_id, path[0], revision)
+        for key in path[1:]:
+            if not isinstance(node, dict):
+                return default
+            node = node.get(key)
+        return default if node is None else node
+
+    def get_document(self, user_id):
+        """Reassemble a user's complete MCP document"""
+        revision = self.get_revision(user_id)
+        if revision is None:
+            return {}
+        names = [row[0] for row in self._connection().execute(
+            'SELECT name FROM sections WHERE user_id = ?', (user_id,)
+        )]
+        document = {'user': self._top_level(user_id, 'user', revision),
+                    'accounts': self._top_level(user_id, 'accounts', revision)}
+        for name in names:
+            document[name] = self._top_level(user_id, name, revision)
+        return document
+
+# Example usage: python mcp_store.py mcp_data.db mcp_data.json [more_users.json ...]
+if __name__ == "__main__":
+    import sys
+
+    store = MCPDataStore(sys.argv[1])
+    for path in sys.argv[2:]:
+        print(f"Imported user {store.import_file(path)} from {path}")
+    print(f"Store now holds {len(store.list_user_ids())} users")
@@ -0,0 +1,156 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import numpy as np
+
+
+# Monte Carlo goal simulation: each path compounds the goal's savings and monthly contributions
+# through random monthly portfolio returns, all paths advancing together as one NumPy array.
+
+# Assumed long-run annual return and volatility of each asset class
+ASSET_CLASS_ASSUMPTIONS = {
+    "equity": {"return": 0.12, "volatility": 0.18},
+    "debt": {"return": 0.075, "volatility": 0.04},
+    "fixed_income": {"return": 0.075, "volatility": 0.005}
+}
+
+# Correlations between asset classes, in ASSET_CLASS_ASSUMPTIONS order
+ASSET_CLASS_CORRELATION = np.array([
+    [1.0, 0.1, 0.0],
+    [0.1, 1.0, 0.2],
+    [0.0, 0.2, 1.0]
+])
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def allocation_from_investments(investments):
+    """Split current investment value into equity, debt and fixed income weights"""
+    values = dict.fromkeys(ASSET_CLASS_ASSUMPTIONS, 0.0)
+    for fund in investments.get('mutual_funds', []):
+        category = fund.get('category', '').lower()
+        asset_class = 'debt' if category.startswith('debt') else 'equity'
+        values[asset_class] += fund.get('current_value', 0)
+    for stock in investments.get('stocks', []):
+        values['equity'] += stock.get('current_value', 0)
+    for key in ('epf', 'ppf'):
+        values['fixed_income'] += investments.get(key, {}).get('balance', 0)
+    for deposit in investments.get('fixed_deposits', []):
+        values['fixed_income'] += deposit.get('current_value', 0)
+
+    total = sum(values.values())
+    if not total:
+        return {"equity": 0.5, "debt": 0.3, "fixed_income": 0.2}
+    return {asset_class: value / total for asset_class, value in values.items()}
+
+
+def portfolio_return_and_volatility(allocation, assumptions=None, correlation=None):
+    """Expected annual return and volatility of an allocation"""
+    assumptions = assumptions or ASSET_CLASS_ASSUMPTIONS
+    correlation = ASSET_CLASS_CORRELATION if correlation is None else correlation
+    weights = np.array([allocation.get(asset_class, 0.0) for asset_class in assumptions])
+    returns = np.array([assumptions[asset_class]["return"] for asset_class in assumptions])
+    volatilities = np.array([assumptions[asset_class]["volatility"] for asset_class in assumptions])
+    covariance = np.outer(volatilities, volatilities) * correlation
+    return float(weights @ returns), float(np.sqrt(weights @ covariance @ weights))
+
+
+def months_until(target_date, as_of=None):
+    """Whole months from as_of (today by default) until an ISO target date"""
+    as_of = as_of or date.today()
+    target = datetime.strptime(target_date, '%Y-%m-%d').date()
+    return max(0, (target.year - as_of.year) * 12 + target.month - as_of.month)
+
+
+def simulate_goal(target_amount, current_savings, monthly_contribution, months, annual_return, annual_volatility,
+                  paths=20000, seed=None, percentiles=PERCENTILES):
+    """
+    Simulate paths of a goal's savings over months of lognormal portfolio returns.
+    Returns the probability of reaching target_amount plus percentile bands at each year end.
+    A goal whose target date has passed (months <= 0) is decided by its current savings.
+    """
+    if months <= 0:
+        reached = current_savings >= target_amount
+        return {
+            "months": 0,
+            "paths": paths,
+            "success_probability": 1.0 if reached else 0.0,
+            "final_percentiles": {f"p{p}": float(current_savings) for p in percentiles},
+            "bands": dict({"month": [0]}, **{f"p{p}": [round(float(current_savings), 2)] for p in percentiles})
+        }
+
+    rng = np.random.default_rng(seed)
+    # Monthly log-return parameters whose compounded mean matches the annual return
+    monthly_sigma = annual_volatility / np.sqrt(12)
+    monthly_mu = np.log1p(annual_return) / 12 - monthly_sigma ** 2 / 2
+
+    wealth = np.full(paths, float(current_savings))
+    band_months = [month for month in range(12, months + 1, 12)]
+    if not band_months or band_months[-1] != months:
+        band_months.append(months)
+    band_month_set = set(band_months)
+    bands = [np.percentile(wealth, percentiles)]
+    for month in range(1, months + 1):
+        wealth += monthly_contribution
+        wealth *= np.exp(monthly_mu + monthly_sigma * rng.standard_normal(paths))
+        if month in band_month_set:
+            bands.append(np.percentile(wealth, percentiles))
+    bands = np.array(bands)
+
+    return {
+        "months": months,
+        "paths": paths,
+        "success_probability": float(np.mean(wealth >= target_amount)),
+        "final_percentiles": {f"p{p}": float(value) for p, value in zip(percentiles, bands[-1])},
+        "bands": dict(
+            {"month": [0] + band_months},
+            **{f"p{p}": bands[:, index].round(2).tolist() for index, p in enumerate(percentiles)}
+        )
+    }
+
+
+def _simulate_goal_job(job):
+    goal, annual_return, annual_volatility, months, paths, seed = job
+    result = simulate_goal(
+        goal.get('target_amount', 0), goal.get('current_savings', 0), goal.get('monthly_contribution', 0),
+        months, annual_return, annual_volatility, paths=paths, seed=seed
+    )
+    result.update(name=goal.get('name'), target_amount=goal.get('target_amount', 0),
+                  target_date=goal.get('target_date'))
+    return result
+
+
+def simulate_goals(goals, allocation, paths=20000, seed=0, as_of=None, workers=None):
+    """
+    Simulate every goal under the portfolio implied by allocation. Each goal gets its own
+    random stream spawned from seed, so results do not depend on workers; workers > 1 fans
+    the goals out over a process pool. Goals without a target_date are reported with an error
+    instead of a simulation.
+    """
+    annual_return, annual_volatility = portfolio_return_and_volatility(allocation)
+    seeds = np.random.SeedSequence(seed).spawn(len(goals))
+    jobs = [
+        (goal, annual_return, annual_volatility, months_until(goal['target_date'], as_of), paths, goal_seed)
+        for goal, goal_seed in zip(goals, seeds) if goal.get('target_date')
+    ]
+
+    if workers and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            simulated = iter(list(executor.map(_simulate_goal_job, jobs)))
+    else:
+        simulated = (_simulate_goal_job(job) for job in jobs)
+
+    # In the goals' order, with the undated ones in place
+    results = [
+        next(simulated) if goal.get('target_date') else
+        {"name": goal.get('name'), "target_amount": goal.get('target_amount', 0), "target_date": None,
+         "error": "goal has no target_date"}
+        for goal in goals
+    ]
+
+    return {
+        "allocation": allocation,
+        "expected_return": annual_return,
+        "volatility": annual_volatility,
+        "goals": results
+    }
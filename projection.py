@@ -0,0 +1,55 @@
+import numpy as np
+
+
+# Vectorized net worth projections: every parameter may be a scalar or an array, and arrays are
+# broadcast against each other, so a whole grid of what-if scenarios is evaluated in one pass
+# over the years instead of one Python loop per scenario.
+
+
+def project_net_worth(current_net_worth, annual_income, savings_rate, years, return_rate=0.08,
+                      salary_growth=0.0, inflation=0.0):
+    """
+    Year-by-year net worth trajectories. Each year the year's savings (income * savings_rate, with
+    income growing by salary_growth) are added, then return_rate is applied if net worth is positive.
+    Values are deflated by inflation to today's money. Returns an array of shape
+    broadcast(parameters) + (years + 1,), where index 0 is the current net worth.
+    """
+    current_net_worth, annual_income, savings_rate, return_rate, salary_growth, inflation = np.broadcast_arrays(
+        *(np.asarray(value, dtype=float) for value in
+          (current_net_worth, annual_income, savings_rate, return_rate, salary_growth, inflation))
+    )
+
+    trajectories = np.empty(current_net_worth.shape + (years + 1,))
+    trajectories[..., 0] = current_net_worth
+    net_worth = current_net_worth.copy()
+    savings = annual_income * savings_rate
+    growth = 1.0 + return_rate
+    for year in range(1, years + 1):
+        net_worth += savings
+        # Returns only compound on positive net worth
+        np.multiply(net_worth, growth, out=net_worth, where=net_worth > 0)
+        trajectories[..., year] = net_worth
+        savings = savings * (1.0 + salary_growth)
+
+    if np.any(inflation):
+        trajectories /= (1.0 + inflation)[..., np.newaxis] ** np.arange(years + 1)
+    return trajectories
+
+
+def scenario_grid(**axes):
+    """
+    Cartesian product of parameter values, e.g. scenario_grid(return_rate=[0.06, 0.08],
+    savings_rate=[0.2, 0.3]) -> {"return_rate": array([0.06, 0.06, 0.08, 0.08]), "savings_rate": ...}
+    """
+    names = list(axes)
+    mesh = np.meshgrid(*(np.atleast_1d(np.asarray(axes[name], dtype=float)) for name in names), indexing='ij')
+    return {name: values.ravel() for name, values in zip(names, mesh)}
+
+
+def summarize_final(trajectories, percentiles=(10, 50, 90)):
+    """Spread of final net worth across scenarios"""
+    final = trajectories[..., -1].ravel()
+    summary = {"min": float(final.min()), "max": float(final.max()), "mean": float(final.mean())}
+    for percentile, value in zip(percentiles, np.percentile(final, percentiles)):
+        summary[f"p{percentile}"] = float(value)
+    return summary
@@ -0,0 +1,158 @@
+import json
+
+from chat_sessions import estimate_tokens
+
+
+# Fields the model never needs to answer a question: internal ids, sync timestamps, contact
+# details and policy numbers
+DROPPED_KEYS = frozenset({"id", "last_updated", "email", "policy_number"})
+
+# Sections dropped first (in this order) when the context is over its token budget
+DROP_ORDER = ["recommendations", "insurance", "credit_score", "financial_goals", "bank_accounts",
+              "fund_performance_analysis", "spending", "investments", "loans", "net_worth",
+              "net_worth_history"]
+
+# Keys are kept in full rather than abbreviated: tables already name each field once, and the
+# model reads whole field names more reliably than a legend of short ones
+CONTEXT_FORMAT_NOTE = (
+    'Amounts are in INR unless a currency is given. Tables are encoded as '
+    '{"cols": [...], "rows": [[...], ...]}, with nested fields as dotted column names; '
+    '"rows_omitted" counts rows left out for brevity and "see" points at a section with the same data.'
+)
+
+
+def _compact_value(value):
+    """Drop unneeded and empty fields, whole-number floats and the default currency"""
+    if isinstance(value, dict):
+        compact = {}
+        for key, item in value.items():
+            if key in DROPPED_KEYS or (key == "currency" and item == "INR"):
+                continue
+            item = _compact_value(item)
+            if item is None or item == {} or item == []:
+                continue
+            compact[key] = item
+        return compact
+    if isinstance(value, list):
+        return _tabulate([_compact_value(item) for item in value])
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _flatten(row, prefix=''):
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict) and value:
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _tabulate(items):
+    """Encode a list of two or more records as one header plus value rows"""
+    if len(items) < 2 or not all(isinstance(item, dict) for item in items):
+        return items
+    rows = [_flatten(item) for item in items]
+    columns = []
+    for row in rows:
+        columns.extend(column for column in row if column not in columns)
+    return {"cols": columns, "rows": [[row.get(column) for column in columns] for row in rows]}
+
+
+def _tables(value):
+    """Every table in a compacted value, so they can be shortened to fit a budget"""
+    if isinstance(value, dict):
+        if "rows" in value and "cols" in value:
+            yield value
+        else:
+            for item in value.values():
+                yield from _tables(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _tables(item)
+
+
+def _dedupe(sections):
+    """Replace a nested table that repeats another section (e.g. net_worth.history) with a reference"""
+    seen = {}
+    for name, value in sections.items():
+        if isinstance(value, dict) and "rows" in value:
+            seen.setdefault(json.dumps(value, sort_keys=True), name)
+
+    def replace(value, section):
+        if not isinstance(value, dict):
+            return value
+        if "rows" in value:
+            owner = seen.get(json.dumps(value, sort_keys=True))
+            return {"see": owner} if owner and owner != section else value
+        return {key: replace(item, section) for key, item in value.items()}
+
+    return {name: replace(value, name) for name, value in sections.items()}
+
+
+def _serialize(sections):
+    return json.dumps(sections, separators=(',', ':'), ensure_ascii=False)
+
+
+class ContextBuilder:
+    """Serializes the financial data for a prompt compactly and within a token budget"""
+
+    def __init__(self, max_tokens=1500, count_tokens=None, min_rows=3, measure_baseline=False):
+        """
+        max_tokens: budget for the serialized data (None for unlimited); count_tokens: token
+        counter (the cheap estimate by default); min_rows: rows kept when tables are shortened;
+        measure_baseline: also count the tokens of the pretty-printed JSON prompts used to embed,
+        which costs a second serialization per build
+        """
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens or estimate_tokens
+        self.min_rows = min_rows
+        self.measure_baseline = measure_baseline
+
+    def build(self, financial_data):
+        """
+        Serialize financial data and return (text, stats), where stats reports the tokens used and
+        any truncation, and with measure_baseline the tokens saved against pretty-printed JSON
+        """
+        sections = _dedupe({name: _compact_value(value) for name, value in financial_data.items()})
+        text = _serialize(sections)
+        tokens = self.count_tokens(text)
+
+        truncated_rows = 0
+        dropped_sections = []
+        if self.max_tokens is not None and tokens > self.max_tokens:
+            # First shorten the longest tables (histories, transaction lists), keeping the leading rows
+            tables = sorted(_tables(sections), key=lambda table: len(table["rows"]), reverse=True)
+            for table in tables:
+                if tokens <= self.max_tokens:
+                    break
+                while len(table["rows"]) > self.min_rows and tokens > self.max_tokens:
+                    keep = max(self.min_rows, len(table["rows"]) // 2)
+                    omitted = len(table["rows"]) - keep
+                    del table["rows"][keep:]
+                    table["rows_omitted"] = table.get("rows_omitted", 0) + omitted
+                    truncated_rows += omitted
+                    text = _serialize(sections)
+                    tokens = self.count_tokens(text)
+
+            # Then leave out whole sections, least relevant first
+            for name in DROP_ORDER:
+                if tokens <= self.max_tokens:
+                    break
+                if name in sections:
+                    del sections[name]
+                    dropped_sections.append(name)
+                    text = _serialize(sections)
+                    tokens = self.count_tokens(text)
+
+        stats = {
+            "tokens": tokens,
+            "truncated_rows": truncated_rows,
+            "dropped_sections": dropped_sections
+        }
+        if self.measure_baseline:
+            baseline_tokens = self.count_tokens(json.dumps(financial_data, indent=2))
+            stats.update(baseline_tokens=baseline_tokens, tokens_saved=baseline_tokens - tokens)
+        return text, stats
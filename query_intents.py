@@ -0,0 +1,164 @@
+import re
+import threading
+from collections import OrderedDict
+
+
+# Keywords (matched as substrings of the lowercased query) for each data section the agent can include
+SECTION_KEYWORDS = {
+    "bank_accounts": ["money", "cash", "balance", "bank", "account", "savings"],
+    "investments": ["invest", "mutual", "fund", "stock", "equity", "portfolio", "sip", "underperform", "market"],
+    "fund_performance_analysis": ["underperform", "market", "benchmark", "compare"],
+    "loans": ["loan", "debt", "emi", "afford", "home loan", "personal loan"],
+    "net_worth": ["net worth", "networth", "assets", "liabilities", "growing"],
+    "spending": ["spend", "expense", "budget", "category"],
+    "financial_goals": ["goal", "target", "retirement", "education", "home"],
+    "credit_score": ["credit", "score", "cibil"],
+    "insurance": ["insurance", "policy", "health", "term", "vehicle"],
+    "recommendations": ["recommend", "suggestion", "advice"],
+    "projection": ["at 40", "by 40", "in 5 years", "in 10 years", "future", "will have", "projection"],
+    "afford": ["afford"],
+    "loan": ["loan"]
+}
+
+# Chart keywords in priority order: the first chart with a matching keyword answers the query
+CHART_KEYWORDS = [
+    ("net_worth_trend", ["net worth", "networth", "grow"]),
+    ("investment_performance", ["invest", "mutual", "fund", "stock", "portfolio", "sip"]),
+    ("spending_patterns", ["spend", "expense", "budget"]),
+    ("debt_analysis", ["loan", "debt", "emi"])
+]
+
+_LAKH_AMOUNT = re.compile(r'(\d+\.?\d*)l')
+_TARGET_AGE = re.compile(r'at (\d+)')
+_INTEREST_RATE = re.compile(r'(\d+\.?\d*)\s*%')
+_TENURE_YEARS = re.compile(r'(\d+)\s*(?:years?|yrs?)\b')
+
+
+def _trie_pattern(keywords):
+    """
+    Regex alternation over keywords with shared prefixes factored out ("fund|future" becomes
+    "f(?:und|uture)"), so each position is tested against a trie instead of every keyword in turn;
+    the greedy optional groups make it match the longest keyword at a position
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = None
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{pattern})?' if '' in node else pattern
+
+    return build(trie)
+
+
+class QueryIntent:
+    """What a query is about: the data sections it needs, the chart that answers it and any parameters in it"""
+
+    __slots__ = ("sections", "chart_type", "loan_amount", "target_age", "interest_rate", "tenure_years")
+
+    def __init__(self, sections, chart_type=None, loan_amount=None, target_age=None, interest_rate=None,
+                 tenure_years=None):
+        self.sections = sections
+        self.chart_type = chart_type
+        self.loan_amount = loan_amount      # rupees, from the first "<n>L" amount
+        self.target_age = target_age        # from "at <age>"
+        self.interest_rate = interest_rate  # percent, from "<rate>%"
+        self.tenure_years = tenure_years    # from "<n> years"
+
+    def wants(self, section):
+        """Whether the query asks about a data section"""
+        return section in self.sections
+
+    def __repr__(self):
+        return (f"QueryIntent(sections={sorted(self.sections)}, chart_type={self.chart_type!r}, "
+                f"loan_amount={self.loan_amount!r}, target_age={self.target_age!r}, "
+                f"interest_rate={self.interest_rate!r}, tenure_years={self.tenure_years!r})")
+
+
+class IntentRouter:
+    """
+    Classifies queries in a single pass of one compiled keyword-trie regex over the query,
+    with results memoized per query so every consumer of a request shares one classification
+    """
+
+    def __init__(self, section_keywords=None, chart_keywords=None, cache_size=4096):
+        self.section_keywords = section_keywords or SECTION_KEYWORDS
+        self.chart_keywords = chart_keywords or CHART_KEYWORDS
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        # keyword -> (sections, chart priorities) it signals
+        signals = {}
+        for section, keywords in self.section_keywords.items():
+            for keyword in keywords:
+                signals.setdefault(keyword, (set(), set()))[0].add(section)
+        for priority, (_, keywords) in enumerate(self.chart_keywords):
+            for keyword in keywords:
+                signals.setdefault(keyword, (set(), set()))[1].add(priority)
+
+        # The lookahead finds the longest keyword starting at each position; keywords that are
+        # substrings of it (e.g. "loan" in "home loan") would be hidden, so each keyword also
+        # carries the signals of every keyword it contains
+        self._signals = {}
+        for keyword in signals:
+            sections, charts = set(), set()
+            for other, (other_sections, other_charts) in signals.items():
+                if other in keyword:
+                    sections |= other_sections
+                    charts |= other_charts
+            self._signals[keyword] = (frozenset(sections), frozenset(charts))
+
+        self._pattern = re.compile('(?=(' + _trie_pattern(self._signals) + '))')
+
+    def classify(self, query):
+        """Get the QueryIntent for a query"""
+        query = query.lower()
+        with self._lock:
+            intent = self._cache.get(query)
+            if intent is not None:
+                self._cache.move_to_end(query)
+                return intent
+
+        intent = self._classify(query)
+
+        with self._lock:
+            self._cache[query] = intent
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return intent
+
+    def _classify(self, query):
+        sections = set()
+        charts = set()
+        for keyword in set(self._pattern.findall(query)):
+            keyword_sections, keyword_charts = self._signals[keyword]
+            sections |= keyword_sections
+            charts |= keyword_charts
+
+        chart_type = self.chart_keywords[min(charts)][0] if charts else None
+        intent = QueryIntent(frozenset(sections), chart_type)
+
+        if "afford" in sections and "loan" in sections:
+            amount = _LAKH_AMOUNT.search(query)
+            if amount:
+                intent.loan_amount = float(amount.group(1)) * 100000  # Convert lakhs to rupees
+            rate = _INTEREST_RATE.search(query)
+            if rate:
+                intent.interest_rate = float(rate.group(1))
+            tenure = _TENURE_YEARS.search(query)
+            if tenure:
+                intent.tenure_years = int(tenure.group(1))
+
+        if "projection" in sections:
+            age = _TARGET_AGE.search(query)
+            if age:
+                intent.target_age = int(age.group(1))
+
+        return intent
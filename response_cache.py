@@ -0,0 +1,134 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+# Words that do not change what a finance question is asking about. Negations and question
+# words are kept: "should I pay off my loan" and "should I not pay off my loan", or "why ..."
+# and "how ...", are different questions.
+STOPWORDS = frozenset("""
+a an the is are was were be been am i me my mine we our you your it its this that these those
+of to in on at by for with about from as and or but so if then than do does did can could
+would should will shall may might must please tell show give let us much many any some there
+here have has had get got
+""".split())
+
+# Tokens a fuzzy match must agree on exactly
+NEGATIONS = frozenset("not no never cannot without nor neither".split())
+QUESTION_WORDS = frozenset("how what which who whom whose why when where whether".split())
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_CONTRACTED_NEGATION = re.compile(r"n['’]t\b")
+
+
+def normalize_query(query):
+    """Lowercase a query and reduce it to its meaningful tokens, in order"""
+    # "shouldn't" -> "should not", so the negation survives tokenization
+    query = _CONTRACTED_NEGATION.sub(" not", query.lower())
+    return [
+        token for token in _TOKEN_PATTERN.findall(query)
+        if token not in STOPWORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+def hash_data(data):
+    """Stable hash of the financial data slice a response was based on"""
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Cache of model responses keyed by normalized query plus a hash of the data slice used to answer it,
+    with opt-in token-set similarity matching, TTL and a size bound
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, similarity_threshold=None):
+        """
+        similarity_threshold is the minimum Jaccard similarity of token sets for a fuzzy hit;
+        None (the default) serves exact matches of the normalized query only
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()  # (normalized query, data hash) -> (created, token set, response)
+        self._by_data_hash = {}        # data hash -> set of normalized queries, for fuzzy lookups
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _similar(tokens, other_tokens, threshold):
+        # Numbers (amounts, ages, years) must match exactly: "50l" and "60l" are different questions;
+        # so must negations and question words
+        def exact(token_set):
+            return {t for t in token_set if t[0].isdigit() or t in NEGATIONS or t in QUESTION_WORDS}
+
+        if exact(tokens) != exact(other_tokens):
+            return False
+        union = tokens | other_tokens
+        return bool(union) and len(tokens & other_tokens) / len(union) >= threshold
+
+    def _remove(self, key):
+        del self._entries[key]
+        queries = self._by_data_hash.get(key[1])
+        if queries is not None:
+            queries.discard(key[0])
+            if not queries:
+                del self._by_data_hash[key[1]]
+
+    def get(self, query, data_hash):
+        """Get a cached response for the query and data, or None"""
+        tokens = normalize_query(query)
+        key = (' '.join(tokens), data_hash)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry[2]
+
+            if self.similarity_threshold is not None:
+                token_set = set(tokens)
+                for normalized in list(self._by_data_hash.get(data_hash, ())):
+                    candidate_key = (normalized, data_hash)
+                    created, candidate_tokens, response = self._entries[candidate_key]
+                    if now - created >= self.ttl_seconds:
+                        self._remove(candidate_key)
+                    elif self._similar(token_set, candidate_tokens, self.similarity_threshold):
+                        self._entries.move_to_end(candidate_key)
+                        self.fuzzy_hits += 1
+                        return response
+
+            self.misses += 1
+            return None
+
+    def put(self, query, data_hash, response):
+        """Cache a response for the query and data"""
+        tokens = normalize_query(query)
+        key = (' '.join(tokens), data_hash)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), set(tokens), response)
+            self._by_data_hash.setdefault(data_hash, set()).add(key[0])
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def get_stats(self):
+        """Get hit rate and the number of LLM calls the cache avoided"""
+        hits = self.exact_hits + self.fuzzy_hits
+        lookups = hits + self.misses
+        return {
+            "lookups": lookups,
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "llm_calls_avoided": hits,
+            "entries": len(self._entries)
+        }
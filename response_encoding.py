@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from instrumentation import stage
+
+# orjson and brotli are optional: without them JSON falls back to the stdlib encoder and
+# responses are only gzip-compressed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Bodies smaller than this are sent uncompressed; compression would barely shrink them
+MIN_COMPRESS_SIZE = 1024
+
+
+def dumps(value):
+    """Encode a value as compact JSON bytes with sorted keys, as jsonify does"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick "br", "gzip" or None (identity) from an Accept-Encoding header"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        name, *params = part.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(name.strip().lower())
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+class EncodedBody:
+    """A JSON body encoded once, with its ETag and lazily cached compressed variants"""
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self._compressed = {}
+
+    def get(self, encoding):
+        """The body for a content coding ("br", "gzip" or None); returns (bytes, applied coding)"""
+        if encoding is None or len(self.body) < MIN_COMPRESS_SIZE:
+            return self.body, None
+        compressed = self._compressed.get(encoding)
+        if compressed is None:
+            if encoding == 'br':
+                compressed = brotli.compress(self.body, quality=5)
+            else:
+                compressed = gzip.compress(self.body, compresslevel=6, mtime=0)
+            self._compressed[encoding] = compressed
+        return compressed, encoding
+
+
+class ResponseEncoder:
+    """Cache of encoded response bodies keyed by name and data version, in LRU order"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (version, EncodedBody)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version, build, cache_if=None):
+        """
+        Get the encoded body for key at version, encoding build()'s value (or bytes) on a miss.
+        A built value is only kept if cache_if(value) is true, when given.
+        """
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+
+        value = build()
+        with stage("serialization"):
+            encoded = EncodedBody(value if isinstance(value, bytes) else dumps(value))
+        with self._lock:
+            self.misses += 1
+            if cache_if is not None and not cache_if(value):
+                return encoded
+            self._entries[key] = (version, encoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return encoded
+
+    def get_stats(self):
+        """Get hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries)
+        }
@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import threading
+
+from response_encoding import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class Snapshot:
+    """One immutable version of the MCP document, with its pre-serialized JSON body"""
+
+    __slots__ = ("data", "version", "source_stamp", "_body")
+
+    def __init__(self, data, version, source_stamp=None, serialize=True):
+        """serialize=False defers the body to its first use, e.g. for frequent section changes"""
+        self.data = data
+        self.version = version
+        self.source_stamp = source_stamp  # (mtime_ns, size) of the file it was read from
+        # Serialized once, the same way jsonify would: here, off the request path, for a file read
+        self._body = dumps(data) if serialize else None
+
+    @property
+    def body(self):
+        if self._body is None:
+            self._body = dumps(self.data)
+        return self._body
+
+
+class SnapshotManager:
+    """
+    Holds the current Snapshot of a JSON data file. A background thread polls the file's
+    mtime and size, parses a changed file off the request path and swaps the new snapshot in
+    with a single reference assignment, so readers always see one complete version.
+    """
+
+    def __init__(self, path, on_change=None, prepare=None):
+        """
+        on_change(old, new) is called after every swap, e.g. to invalidate caches; prepare(data),
+        if given, returns the document to serve for the data read from the file
+        """
+        self.path = path
+        self.on_change = on_change
+        self.prepare = prepare
+        self.reloads = 0
+        self._version = 0
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self._failed_stamp = None
+        self.current = self._read() or Snapshot({}, self._next_version())
+
+    def _next_version(self):
+        self._version += 1
+        return self._version
+
+    def _stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self):
+        """Parse the file into a new snapshot, or None if it is missing or malformed"""
+        try:
+            stamp = self._stamp()
+            with open(self.path, 'r') as file:
+                data = json.load(file)
+        except Exception as e:
+            logger.error("Error loading MCP data from %s: %s", self.path, e)
+            return None
+        if self.prepare:
+            data = self.prepare(data)
+        return Snapshot(data, self._next_version(), stamp)
+
+    def _swap(self, snapshot):
+        old, self.current = self.current, snapshot
+        if self.on_change:
+            self.on_change(old, snapshot)
+
+    def check(self):
+        """Reload the file if it changed since the current snapshot; returns whether it was swapped"""
+        with self._lock:
+            try:
+                stamp = self._stamp()
+            except OSError:
+                return False
+            if stamp in (self.current.source_stamp, self._failed_stamp):
+                return False
+            snapshot = self._read()
+            if snapshot is None:
+                # Keep serving the last good version (e.g. while the file is half written),
+                # and do not retry until the file changes again
+                self._failed_stamp = stamp
+                return False
+            self.reloads += 1
+            self._swap(snapshot)
+            return True
+
+    def replace_section(self, section, value):
+        """Swap in a copy of the current snapshot with one top-level section replaced"""
+        self.update_section(section, lambda current: value)
+
+    def update_section(self, section, update):
+        """
+        Swap in a copy of the current snapshot with a top-level section replaced by
+        update(current value or None), computed under the lock so no concurrent swap is lost
+        """
+        with self._lock:
+            data = dict(self.current.data)
+            data[section] = update(data.get(section))
+            self._swap(Snapshot(data, self._next_version(), self.current.source_stamp, serialize=False))
+
+    def watch(self, interval=2.0):
+        """Start polling the file every interval seconds in a daemon thread"""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def poll():
+            while not self._stop.wait(interval):
+                self.check()
+
+        self._watcher = threading.Thread(target=poll, name="mcp-data-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        """Stop the polling thread"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+def changed_sections(old, new):
+    """Top-level sections that differ between two snapshots"""
+    return {
+        section for section in set(old.data) | set(new.data)
+        if old.data.get(section) != new.data.get(section)
+    }
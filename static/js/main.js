@@ -65,25 +65,47 @@ document.addEventListener('DOMContentLoaded', function() {
         // Add loading indicator
         const loadingMessage = addMessage('Thinking...', 'ai', true);
         
-        // Send query to backend
-        fetch('/chat', {
+        // Stream the answer from the backend as Server-Sent Events
+        let aiMessage = null;
+        let responseText = '';
+        
+        fetch('/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({ query: query })
         })
-        .then(response => response.json())
-        .then(data => {
-            // Remove loading message
-            loadingMessage.remove();
-            
-            // Add AI response to chat
-            addMessage(data.response, 'ai');
+        .then(response => {
+            if (!response.ok || !response.body) {
+                throw new Error(`Chat request failed with status ${response.status}`);
+            }
             
-            // Handle visualization if available
-            if (data.has_visualization) {
-                handleVisualization(data.chart_data, data.chart_type);
+            return readEventStream(response.body, {
+                token: data => {
+                    // Replace the loading indicator with the answer on the first token
+                    if (!aiMessage) {
+                        loadingMessage.remove();
+                        aiMessage = addMessage('', 'ai');
+                    }
+                    responseText += data.text;
+                    aiMessage.querySelector('.message-content').innerHTML = formatMessage(responseText);
+                    chatMessages.scrollTop = chatMessages.scrollHeight;
+                },
+                chart: data => {
+                    // Handle visualization if available
+                    if (data.has_visualization) {
+                        handleVisualization(data.chart_data, data.chart_type);
+                    }
+                },
+                error: data => {
+                    throw new Error(data.error);
+                }
+            });
+        })
+        .then(() => {
+            if (!aiMessage) {
+                loadingMessage.remove();
             }
         })
         .catch(error => {
@@ -96,6 +118,46 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Read a text/event-stream response body, calling handlers[event](data) for each event
+    function readEventStream(body, handlers) {
+        const reader = body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        function dispatch(rawEvent) {
+            let eventName = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) {
+                    eventName = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    data += line.slice(5).trim();
+                }
+            });
+            if (handlers[eventName] && data) {
+                handlers[eventName](JSON.parse(data));
+            }
+        }
+        
+        function pump() {
+            return reader.read().then(({ done, value }) => {
+                if (done) {
+                    if (buffer.trim()) {
+                        dispatch(buffer);
+                    }
+                    return;
+                }
+                buffer += decoder.decode(value, { stream: true });
+                const events = buffer.split('\n\n');
+                buffer = events.pop();
+                events.forEach(dispatch);
+                return pump();
+            });
+        }
+        
+        return pump();
+    }
+    
     function addMessage(content, sender, isLoading = false) {
         const messageDiv = document.createElement('div');
         messageDiv.className = `message ${sender}`;
@@ -338,7 +400,8 @@ document.addEventListener('DOMContentLoaded', function() {
             <p><strong>Total Debt:</strong> ₹${formatNumber(chartData.metrics.total_debt)}</p>
             <p><strong>Monthly Payment:</strong> ₹${formatNumber(chartData.metrics.monthly_debt_payment)}</p>
             <p><strong>Debt-to-Income Ratio:</strong> ${chartData.metrics.debt_to_income_ratio.toFixed(2)}%</p>
-            <p><strong>Est. Months to Debt Freedom:</strong> ${Math.ceil(chartData.metrics.months_to_debt_freedom)}</p>
+            <p><strong>Est. Months to Debt Freedom:</strong> ${chartData.metrics.months_to_debt_freedom === null ? 'Not at current payments' : `${chartData.metrics.months_to_debt_freedom} (${chartData.metrics.debt_free_date})`}</p>
+            <p><strong>Interest Still to Pay:</strong> ₹${formatNumber(chartData.metrics.total_interest)}</p>
         `;
         visualizationArea.appendChild(metricsDiv);
     }
@@ -0,0 +1,291 @@
+import json
+import math
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date
+
+
+# Day numbers are offset from this date in the trend sums to keep them well conditioned
+_EPOCH = date(2000, 1, 1).toordinal()
+
+
+def _to_ordinal(value):
+    """Day number of an ISO date (or datetime) string or a date"""
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10]).toordinal()
+    return value.toordinal()
+
+
+def _to_iso(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+
+def parse_point(day, value):
+    """Validate a point as (ISO date, finite float), raising ValueError for a bad date or value"""
+    day = date.fromisoformat(day[:10] if isinstance(day, str) else day.isoformat()[:10]).isoformat()
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"{value} is not a finite number")
+    return day, value
+
+
+class TimeSeries:
+    """
+    Date-ordered series of values in compact arrays. Range queries bisect to the range, so they
+    cost O(log n + range); count/sum/min/max and least-squares trend accumulators are updated on
+    every append instead of being recomputed from the whole history.
+    """
+
+    def __init__(self, points=()):
+        self._days = array('l')
+        self._values = array('d')
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        # Running sums for the least-squares slope over (day, value)
+        self._sum_x = self._sum_xx = self._sum_xy = 0.0
+        for day, value in sorted((_to_ordinal(day), value) for day, value in points):
+            self.append(day, value)
+
+    def __len__(self):
+        return len(self._days)
+
+    def _add_stats(self, day, value, sign):
+        day -= _EPOCH
+        self.count += sign
+        self.total += sign * value
+        self._sum_x += sign * day
+        self._sum_xx += sign * day * day
+        self._sum_xy += sign * day * value
+
+    def append(self, day, value):
+        """Add or replace the value for a date; appending in date order is O(1)"""
+        day = _to_ordinal(day) if not isinstance(day, int) else day
+        value = float(value)
+        if self._days and day <= self._days[-1]:
+            index = bisect_left(self._days, day)
+            if index < len(self._days) and self._days[index] == day:
+                # Replacing a value: undo its contribution first
+                old = self._values[index]
+                self._values[index] = value
+                self._add_stats(day, old, -1)
+                self._add_stats(day, value, 1)
+                if old in (self.min, self.max):
+                    self.min, self.max = min(self._values), max(self._values)
+                else:
+                    self.min, self.max = min(self.min, value), max(self.max, value)
+                return
+            self._days.insert(index, day)
+            self._values.insert(index, value)
+        else:
+            self._days.append(day)
+            self._values.append(value)
+        self._add_stats(day, value, 1)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def _bounds(self, start=None, end=None):
+        low = 0 if start is None else bisect_left(self._days, _to_ordinal(start))
+        high = len(self._days) if end is None else bisect_right(self._days, _to_ordinal(end))
+        return low, high
+
+    def range(self, start=None, end=None):
+        """(ISO date, value) points between start and end (inclusive), oldest first"""
+        low, high = self._bounds(start, end)
+        return [(_to_iso(self._days[index]), self._values[index]) for index in range(low, high)]
+
+    def latest(self):
+        """The most recent (ISO date, value), or None"""
+        return (_to_iso(self._days[-1]), self._values[-1]) if self._days else None
+
+    def downsample(self, start=None, end=None, period='month'):
+        """The last point of each month (or year) between start and end, oldest first"""
+        if period not in ('month', 'year'):
+            raise ValueError(f"Unknown period: {period}")
+        key_length = 7 if period == 'month' else 4
+        buckets = {}
+        for iso_date, value in self.range(start, end):
+            buckets[iso_date[:key_length]] = (iso_date, value)
+        return list(buckets.values())
+
+    def metrics(self, start=None, end=None):
+        """
+        Change and trend between the first and latest points. The whole series is served from the
+        running accumulators; a sub-range is computed over that range only.
+        """
+        low, high = self._bounds(start, end)
+        if high <= low:
+            return {"count": 0, "first": None, "latest": None, "change_value": 0, "change_percent": 0,
+                    "trend": "neutral", "slope_per_month": 0, "min": None, "max": None, "mean": None,
+                    "time_period": "N/A"}
+
+        if low == 0 and high == len(self._days):
+            count, total, low_value, high_value = self.count, self.total, self.min, self.max
+            sum_x, sum_xx, sum_xy = self._sum_x, self._sum_xx, self._sum_xy
+        else:
+            days, values = [day - _EPOCH for day in self._days[low:high]], self._values[low:high]
+            count, total, low_value, high_value = len(values), sum(values), min(values), max(values)
+            sum_x = float(sum(days))
+            sum_xx = float(sum(day * day for day in days))
+            sum_xy = sum(day * value for day, value in zip(days, values))
+
+        first_value, last_value = self._values[low], self._values[high - 1]
+        change_value = last_value - first_value
+        denominator = count * sum_xx - sum_x * sum_x
+        slope = (count * sum_xy - sum_x * total) / denominator if count > 1 and denominator else 0.0
+
+        return {
+            "count": count,
+            "first": first_value,
+            "latest": last_value,
+            "change_value": change_value,
+            "change_percent": (change_value / abs(first_value)) * 100 if first_value != 0 else 0,
+            "trend": "positive" if change_value > 0 else "negative" if change_value < 0 else "neutral",
+            "slope_per_month": slope * 30.44,
+            "min": low_value,
+            "max": high_value,
+            "mean": total / count,
+            "time_period": f"{_to_iso(self._days[low])} to {_to_iso(self._days[high - 1])}"
+        }
+
+
+class TimeSeriesStore:
+    """
+    Time series per (user, series name), built lazily by a loader from the data at a version and
+    rebuilt when that version changes. At most max_series series are kept, least recently used
+    first out, so memory stays bounded however many users are served.
+    """
+
+    def __init__(self, max_series=10000):
+        self.max_series = max_series
+        self._series = OrderedDict()  # (user key, name) -> (data version, TimeSeries), in LRU order
+        self._lock = threading.Lock()
+
+    def get(self, user_key, name, version, load):
+        """Get a series, rebuilding it with load() if its source data version changed"""
+        key = (user_key, name)
+        with self._lock:
+            cached = self._series.get(key)
+            if cached is not None and cached[0] == version:
+                self._series.move_to_end(key)
+                return cached[1]
+
+        series = TimeSeries(load())
+        with self._lock:
+            self._series[key] = (version, series)
+            self._series.move_to_end(key)
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        return series
+
+    def extend(self, user_key, name, points, from_version, to_version):
+        """
+        Apply points written to a series' source data in place, instead of rebuilding it, if the
+        series was built from the data at from_version; it is then current at to_version
+        """
+        key = (user_key, name)
+        with self._lock:
+            cached = self._series.get(key)
+            if cached is None or cached[0] != from_version:
+                return
+            for day, value in points:
+                cached[1].append(day, value)
+            self._series[key] = (to_version, cached[1])
+
+
+def merge_history(history, field, points):
+    """
+    A history list (newest first, as in the MCP data) with points ({date: value}) added; a point
+    replaces an entry for the same date. Points newer than the whole history, the usual append,
+    are put in front without re-sorting it.
+    """
+    newest_first = sorted(points.items(), reverse=True)
+    if not history or (newest_first and newest_first[-1][0] > history[0]["date"]):
+        return [{"date": day, field: value} for day, value in newest_first] + list(history)
+    merged = {entry["date"]: entry for entry in history}
+    for day, value in points.items():
+        merged[day] = {"date": day, field: value}
+    return sorted(merged.values(), key=lambda entry: entry["date"], reverse=True)
+
+
+def merge_history_section(section, field, points, key='history'):
+    """
+    A copy of an MCP section (e.g. net_worth) with points merged into its history; when the
+    newest point is the latest in the history, it also becomes the section's current value
+    (section[field], e.g. net_worth.net_worth)
+    """
+    section = dict(section or {})
+    history = section[key] = merge_history(section.get(key, []), field, points)
+    if history and history[0]["date"] in points:
+        section[field] = history[0][field]
+    return section
+
+
+class HistoryLog:
+    """
+    Append-only JSON lines log of the history points added for the data file's user, which has no
+    store to write them to. The log is read incrementally (from the last offset read), so points
+    survive restarts and points appended by other processes sharing the log are picked up; every
+    point read is kept, one per series and date, to be merged into each reload of the data file.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.points = {}    # series name -> {ISO date: value}, as of the last read_new
+        self._offset = 0    # bytes of the log already read
+        self._pending = []  # points appended without a log file, not yet returned by read_new
+        self._lock = threading.Lock()
+
+    def append(self, name, day, value):
+        """Record a point; it is returned by the next read_new (in this and any other process)"""
+        day, value = parse_point(day, value)
+        with self._lock:
+            if self.path:
+                with open(self.path, 'a') as log:
+                    log.write(json.dumps({"series": name, "date": day, "value": value}) + '\n')
+            else:
+                self._pending.append((name, day, value))
+
+    def read_new(self):
+        """The (series name, ISO date, value) points recorded since the last call, oldest first"""
+        with self._lock:
+            points, self._pending = self._pending, []
+            if self.path:
+                points.extend(self._read_log())
+            for name, day, value in points:
+                self.points.setdefault(name, {})[day] = value
+            return points
+
+    def get_points(self):
+        """Every point read so far: series name -> {ISO date: value}"""
+        with self._lock:
+            return {name: dict(points) for name, points in self.points.items()}
+
+    def _read_log(self):
+        """Parse the complete lines added to the log since the last read"""
+        try:
+            if os.path.getsize(self.path) <= self._offset:
+                return []
+            with open(self.path, 'rb') as log:
+                log.seek(self._offset)
+                data = log.read()
+        except FileNotFoundError:
+            return []
+        # A line another process is still writing is left for the next read
+        complete = data[:data.rfind(b'\n') + 1]
+        self._offset += len(complete)
+        points = []
+        for line in complete.splitlines():
+            # A malformed line, or one logged for a store user by an older version, is skipped, not fatal
+            try:
+                entry = json.loads(line)
+                if entry.get("user") is not None:
+                    continue
+                points.append((entry["series"], *parse_point(entry["date"], entry["value"])))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+        return points
@@ -0,0 +1,331 @@
+import csv
+import heapq
+import io
+import json
+import math
+import re
+import threading
+from datetime import date, datetime
+
+
+# Streaming transaction ingestion: feeds are read lazily one transaction at a time, categorized,
+# and folded into per-month and per-fiscal-year totals, so memory does not grow with feed size.
+
+# Description keywords (case-insensitive) for transactions that arrive without a category
+CATEGORY_KEYWORDS = {
+    "Income": ["salary", "interest credit", "dividend", "refund"],
+    "Housing": ["rent", "home loan", "maintenance", "society"],
+    "EMI": ["emi", "personal loan", "car loan"],
+    "Food & Dining": ["swiggy", "zomato", "restaurant", "cafe", "dominos", "grocery", "bigbasket", "blinkit"],
+    "Shopping": ["amazon", "flipkart", "myntra", "ajio", "nykaa"],
+    "Transportation": ["uber", "ola", "rapido", "petrol", "fuel", "irctc", "metro", "fastag"],
+    "Entertainment": ["netflix", "spotify", "hotstar", "prime video", "bookmyshow", "pvr"],
+    "Utilities": ["electricity", "airtel", "jio", "vodafone", "broadband", "water bill", "gas bill"],
+    "Healthcare": ["apollo", "pharmacy", "hospital", "clinic", "medplus", "1mg"]
+}
+
+
+class Categorizer:
+    """Assigns a category from the description with one compiled regex over all keywords"""
+
+    def __init__(self, category_keywords=None, default='Others'):
+        category_keywords = category_keywords or CATEGORY_KEYWORDS
+        self.default = default
+        self._categories = {}
+        for category, keywords in category_keywords.items():
+            for keyword in keywords:
+                self._categories[keyword] = category
+        # Whole words only ("ola" not in "granola"); longest keywords first, so "home loan" wins
+        # over shorter keywords at the same position
+        alternatives = sorted(self._categories, key=len, reverse=True)
+        self._pattern = re.compile(r'\b(?:' + '|'.join(re.escape(keyword) for keyword in alternatives) + r')\b',
+                                   re.IGNORECASE)
+
+    def categorize(self, description):
+        match = self._pattern.search(description or '')
+        return self._categories[match.group(0).lower()] if match else self.default
+
+
+def read_jsonl(source):
+    """
+    Yield transactions from a JSON lines file path or text stream, one line at a time; a line that
+    is not a JSON object raises ValueError
+    """
+    if isinstance(source, str):
+        with open(source, encoding='utf-8') as stream:
+            yield from read_jsonl(stream)
+        return
+    for number, line in enumerate(source, 1):
+        line = line.strip()
+        if line:
+            transaction = json.loads(line)
+            if not isinstance(transaction, dict):
+                raise ValueError(f"line {number} is not a JSON object")
+            yield transaction
+
+
+def read_csv(source):
+    """Yield transactions from a CSV file path or text stream with a header row (date, description, amount, ...)"""
+    if isinstance(source, str):
+        with open(source, newline='', encoding='utf-8') as stream:
+            yield from read_csv(stream)
+        return
+    for row in csv.DictReader(source):
+        row["amount"] = float(row["amount"])
+        yield row
+
+
+def read_feed(source, format='jsonl'):
+    """Yield transactions from a feed in the given format ("jsonl" or "csv")"""
+    if format == 'jsonl':
+        return read_jsonl(source)
+    if format == 'csv':
+        return read_csv(source)
+    raise ValueError(f"Unknown transaction feed format: {format}")
+
+
+def fiscal_year(year, month):
+    """Indian fiscal year (April to March) of a month, as in the MCP data, e.g. "2024-2025" """
+    start = year if month >= 4 else year - 1
+    return f"{start}-{start + 1}"
+
+
+def _new_bucket():
+    return {"total_income": 0.0, "total_expense": 0.0, "categories": {}, "transactions": 0}
+
+
+def _month_key(summary):
+    """ "YYYY-MM" of a monthly summary's "month" label (e.g. "June 2025"), or None if it has none"""
+    try:
+        return datetime.strptime(summary.get("month", ""), '%B %Y').strftime('%Y-%m')
+    except ValueError:
+        return None
+
+
+def _year_key(summary):
+    return summary.get("year") or None
+
+
+def _latest_complete(buckets):
+    """
+    The latest period that is complete: seeded from a document's summary, or followed by a newer
+    period. Transactions of the newest period may still be arriving, so a partial month does not
+    replace a full one; the newest is returned only if no period is complete.
+    """
+    newest = max(buckets)
+    complete = [period for period, bucket in buckets.items() if period < newest or bucket.get("complete")]
+    return max(complete) if complete else newest
+
+
+def _summary(bucket, period_key, period_label):
+    """A period's summary; the transaction count is left out where the seeded totals had none"""
+    income, expense = bucket["total_income"], bucket["total_expense"]
+    savings = income - expense
+    summary = {
+        "total_income": round(income, 2),
+        "total_expense": round(expense, 2),
+        "savings": round(savings, 2),
+        "savings_percentage": round(savings / income * 100, 2) if income else 0.0,
+        period_key: period_label,
+        "categories": {category: round(amount, 2) for category, amount in
+                       sorted(bucket["categories"].items(), key=lambda item: item[1], reverse=True)}
+    }
+    if bucket["transactions"] is not None:
+        summary["transactions"] = bucket["transactions"]
+    return summary
+
+
+class SpendingAggregator:
+    """
+    Rolling per-category totals by month and fiscal year, updated one transaction at a time,
+    plus the most recent transactions. Memory is bounded by the number of months seen.
+    """
+
+    def __init__(self, categorizer=None, recent_size=20):
+        self.categorizer = categorizer or Categorizer()
+        self._months = {}  # "YYYY-MM" -> bucket
+        self._years = {}   # "YYYY-YYYY" fiscal year -> bucket
+        self.recent_size = recent_size
+        self._recent = []
+        self._sequence = 0  # Arrival order, so later transactions win date ties in the recent list
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def __bool__(self):
+        return self.count > 0
+
+    @classmethod
+    def from_spending(cls, spending, **kwargs):
+        """
+        An aggregator starting from an MCP spending section: its monthly and yearly summaries seed
+        the (complete) buckets of their month and fiscal year, current_month/current_year those of
+        the periods in progress, and its recent transactions the recent list
+        """
+        aggregator = cls(**kwargs)
+        for buckets, key, periods in ((aggregator._months, _month_key, ("monthly_summary", "current_month")),
+                                      (aggregator._years, _year_key, ("yearly_summary", "current_year"))):
+            for name in periods:
+                summary = spending.get(name)
+                period = key(summary) if summary else None
+                if period is not None:
+                    buckets[period] = {
+                        "total_income": float(summary.get("total_income", 0)),
+                        "total_expense": float(summary.get("total_expense", 0)),
+                        "categories": {category: float(amount)
+                                       for category, amount in summary.get("categories", {}).items()},
+                        # Unknown (None) for a document's summary, whose totals cover uncounted transactions
+                        "transactions": summary.get("transactions"),
+                        "complete": name in ("monthly_summary", "yearly_summary")
+                    }
+        # Oldest first, so the document's order breaks date ties as it did there
+        for transaction in reversed(spending.get("recent_transactions", [])):
+            aggregator._remember(transaction, (transaction.get("type") or "debit").lower(), abs(float(transaction["amount"])),
+                                 transaction.get("category") or aggregator.categorizer.categorize(
+                                     transaction.get("description")))
+        return aggregator
+
+    def _remember(self, transaction, kind, amount, category):
+        """Keep the newest transactions by date (later arrivals win ties) in a bounded min-heap"""
+        self._sequence += 1
+        entry = (str(transaction["date"])[:10], self._sequence, transaction, kind, amount, category)
+        if len(self._recent) < self.recent_size:
+            heapq.heappush(self._recent, entry)
+        elif entry[:2] > self._recent[0][:2]:
+            heapq.heapreplace(self._recent, entry)
+
+    def add(self, transaction):
+        """
+        Fold one transaction into the aggregates. Without a "type", negative amounts are debits
+        and positive ones credits; without a "category", it is derived from the description.
+        A NaN or infinite amount raises ValueError.
+        """
+        amount = float(transaction["amount"])
+        if not math.isfinite(amount):
+            raise ValueError(f"{transaction['amount']} is not a finite amount")
+        kind = (transaction.get("type") or ("debit" if amount < 0 else "credit")).lower()
+        amount = abs(amount)
+        category = transaction.get("category") or self.categorizer.categorize(transaction.get("description"))
+        day = str(transaction["date"])[:10]
+        year, month = int(day[:4]), int(day[5:7])
+
+        with self._lock:
+            self.count += 1
+            for buckets, key in ((self._months, day[:7]), (self._years, fiscal_year(year, month))):
+                bucket = buckets.get(key)
+                if bucket is None:
+                    bucket = buckets[key] = _new_bucket()
+                if bucket["transactions"] is not None:
+                    bucket["transactions"] += 1
+                if kind == "credit":
+                    bucket["total_income"] += amount
+                else:
+                    bucket["total_expense"] += amount
+                    bucket["categories"][category] = bucket["categories"].get(category, 0.0) + amount
+            self._remember(transaction, kind, amount, category)
+
+    def ingest(self, transactions):
+        """Fold an iterable of transactions (e.g. a read_feed generator) into the aggregates; returns the count"""
+        count = 0
+        for transaction in transactions:
+            self.add(transaction)
+            count += 1
+        return count
+
+    def merge(self, other):
+        """
+        Fold another aggregator's totals and recent transactions into this one, e.g. a feed
+        aggregated on its own into the aggregator of a stored spending section
+        """
+        with self._lock, other._lock:
+            for buckets, other_buckets in ((self._months, other._months), (self._years, other._years)):
+                for period, source in other_buckets.items():
+                    bucket = buckets.get(period)
+                    if bucket is None:
+                        bucket = buckets[period] = _new_bucket()
+                    bucket["total_income"] += source["total_income"]
+                    bucket["total_expense"] += source["total_expense"]
+                    if bucket["transactions"] is not None:
+                        bucket["transactions"] += source["transactions"]
+                    for category, amount in source["categories"].items():
+                        bucket["categories"][category] = bucket["categories"].get(category, 0.0) + amount
+            # In arrival order, so the other's later arrivals still win date ties
+            for entry in sorted(other._recent, key=lambda entry: entry[1]):
+                self._remember(*entry[2:])
+            self.count += other.count
+
+    def months(self):
+        """Months with data, oldest first"""
+        return sorted(self._months)
+
+    def monthly_summary(self, month=None):
+        """
+        Summary of a month ("YYYY-MM") in the shape of spending.monthly_summary; by default the
+        latest complete month (see _latest_complete)
+        """
+        with self._lock:
+            if not self._months:
+                return {}
+            month = month or _latest_complete(self._months)
+            bucket = self._months.get(month, _new_bucket())
+            label = date(int(month[:4]), int(month[5:7]), 1).strftime('%B %Y')
+            return _summary(bucket, "month", label)
+
+    def yearly_summary(self, year=None):
+        """
+        Summary of a fiscal year ("2024-2025") in the shape of spending.yearly_summary; by default
+        the latest complete fiscal year (see _latest_complete)
+        """
+        with self._lock:
+            if not self._years:
+                return {}
+            year = year or _latest_complete(self._years)
+            return _summary(self._years.get(year, _new_bucket()), "year", year)
+
+    def recent_transactions(self, limit=5):
+        """The newest transactions, newest first as in the MCP data"""
+        with self._lock:
+            newest = sorted(self._recent, key=lambda entry: entry[:2], reverse=True)[:limit]
+        return [dict(transaction, date=day, type=kind, amount=amount, category=category)
+                for day, _, transaction, kind, amount, category in newest]
+
+    def spending_section(self, spending=None, recent_limit=5):
+        """
+        An MCP spending section (updating spending, if given) with the latest complete month and
+        fiscal year as its summaries, a newer period in progress as current_month/current_year,
+        and the newest transactions. Fields the aggregates do not compute (e.g. last_updated) are
+        kept from spending's summary of the same period.
+        """
+        section = dict(spending or {})
+        section["recent_transactions"] = self.recent_transactions(recent_limit)
+        for (complete_name, progress_name), summary, buckets, key in (
+                (("monthly_summary", "current_month"), self.monthly_summary, self._months, _month_key),
+                (("yearly_summary", "current_year"), self.yearly_summary, self._years, _year_key)):
+            previous = {key(section[name]): section[name] for name in (complete_name, progress_name)
+                        if section.get(name)}
+            section.pop(progress_name, None)
+            with self._lock:
+                newest = max(buckets) if buckets else None
+                complete = _latest_complete(buckets) if buckets else None
+            if newest is None:
+                section[complete_name] = {}
+                continue
+            section[complete_name] = dict(previous.get(complete, {}), **summary(complete))
+            if newest != complete:
+                section[progress_name] = dict(previous.get(newest, {}), **summary(newest))
+        return section
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Aggregate a transaction feed into monthly and yearly spending")
+    parser.add_argument('feed', help='JSON lines or CSV file ("-" for stdin)')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+    args = parser.parse_args()
+
+    aggregator = SpendingAggregator()
+    source = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8') if args.feed == '-' else args.feed
+    count = aggregator.ingest(read_feed(source, args.format))
+    print(f"Ingested {count} transactions")
+    print(json.dumps({"monthly_summary": aggregator.monthly_summary(),
+                      "yearly_summary": aggregator.yearly_summary()}, indent=2))